@@ -0,0 +1,733 @@
+/***
+ * Display geometries of restrictions, generated in the database.
+ *
+ * PL/pgSQL versions of TOMsGeometryElement (TOMsPlugin/core/tomsGeometryElement.py):
+ *   toms.toms_get_shape         - getShape / getShapePoints (and getLine)
+ *   toms.toms_get_zigzag        - getZigZag
+ *   toms.toms_get_bay_dividers  - getBayDividers
+ *   toms.toms_display_geometry  - ElementGeometryFactory.generateElementGeometry
+ *
+ * The same operations are applied in the same order as in Python, so the results
+ * match (tests/testTomsDisplayGeometrySql.py checks this for each GeomShapeID).
+ * Any change to the Python generators needs to be made here too.
+ ****/
+
+-- as GenerateGeometryUtils.checkDegrees: azimuth in [0, 360)
+CREATE OR REPLACE FUNCTION toms.toms_check_degrees(azimuth double precision) RETURNS double precision AS $$
+
+    SELECT azimuth - 360.0 * floor(azimuth / 360.0);
+
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+-- as QgsPointXY.azimuth: degrees clockwise from north, in (-180, 180]
+CREATE OR REPLACE FUNCTION toms.toms_azimuth(x1 double precision, y1 double precision,
+                                             x2 double precision, y2 double precision) RETURNS double precision AS $$
+
+    SELECT degrees(atan2(x2 - x1, y2 - y1));
+
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+-- as GenerateGeometryUtils.turnToCL: direction of turn (-90 or 90) to the road centre line
+CREATE OR REPLACE FUNCTION toms.toms_turn_to_cl(az1 double precision, az2 double precision) RETURNS double precision AS $$
+DECLARE
+    az_cl double precision := az1 - 90.0;
+BEGIN
+
+    IF az_cl < 0 THEN
+        az_cl := az_cl + 360.0;
+    END IF;
+
+    -- Need to check quadrant
+    IF az_cl >= 0 AND az_cl <= 90.0 THEN
+        IF az2 >= 270.0 AND az2 <= 359.999 THEN
+            az_cl := az_cl + 360.0;
+        END IF;
+    ELSIF az2 >= 0 AND az2 <= 90.0 THEN
+        IF az_cl >= 270.0 AND az_cl <= 359.999 THEN
+            az2 := az2 + 360.0;
+        END IF;
+    END IF;
+
+    IF abs(az_cl - az2) < 90 THEN
+        RETURN -90.0;
+    END IF;
+    RETURN 90.0;
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+-- as GenerateGeometryUtils.calcBisector
+CREATE OR REPLACE FUNCTION toms.toms_calc_bisector(prev_az double precision, curr_az double precision,
+                                                   turn double precision, width_rest double precision,
+                                                   OUT bisect_az double precision, OUT dist_to_pt double precision) AS $$
+DECLARE
+    prev_az_a double precision := toms.toms_check_degrees(prev_az + turn);
+    curr_az_a double precision := toms.toms_check_degrees(curr_az + turn);
+    diff_angle double precision;
+BEGIN
+
+    diff_angle := (prev_az_a - curr_az_a) / 2.0;
+    bisect_az := prev_az_a - diff_angle;
+    dist_to_pt := width_rest / cos(radians(diff_angle));
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+-- as GenerateGeometryUtils.getLineForAz: the first line of the kerb geometry
+CREATE OR REPLACE FUNCTION toms.toms_kerb_line(kerb geometry) RETURNS geometry AS $$
+
+    SELECT CASE
+        WHEN GeometryType(kerb) = 'LINESTRING' THEN kerb
+        WHEN GeometryType(kerb) = 'MULTILINESTRING' THEN ST_GeometryN(kerb, 1)
+        ELSE NULL
+    END;
+
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+-- as tomsSelfIntersections.segmentIntersection: ARRAY[x, y], or NULL
+CREATE OR REPLACE FUNCTION toms.toms_segment_intersection(ax1 double precision, ay1 double precision,
+                                                          ax2 double precision, ay2 double precision,
+                                                          bx1 double precision, by1 double precision,
+                                                          bx2 double precision, by2 double precision) RETURNS double precision[] AS $$
+DECLARE
+    rx double precision := ax2 - ax1;
+    ry double precision := ay2 - ay1;
+    sx double precision := bx2 - bx1;
+    sy double precision := by2 - by1;
+    qpx double precision := bx1 - ax1;
+    qpy double precision := by1 - ay1;
+    denom double precision;
+    rr double precision;
+    t0 double precision;
+    t1 double precision;
+    t_min double precision;
+    t_max double precision;
+    t double precision;
+    u double precision;
+BEGIN
+
+    denom := rx * sy - ry * sx;
+
+    IF denom = 0.0 THEN
+        IF qpx * ry - qpy * rx <> 0.0 THEN
+            RETURN NULL;  -- parallel
+        END IF;
+
+        -- collinear - only a single shared point counts as an intersection
+        rr := rx * rx + ry * ry;
+        IF rr = 0.0 THEN
+            RETURN NULL;
+        END IF;
+        t0 := (qpx * rx + qpy * ry) / rr;
+        t1 := t0 + (sx * rx + sy * ry) / rr;
+        t_min := greatest(least(t0, t1), 0.0);
+        t_max := least(greatest(t0, t1), 1.0);
+        IF t_min <> t_max THEN
+            RETURN NULL;
+        END IF;
+        IF t_min = 0.0 THEN
+            RETURN ARRAY[ax1, ay1];
+        END IF;
+        IF t_min = 1.0 THEN
+            RETURN ARRAY[ax2, ay2];
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    t := (qpx * sy - qpy * sx) / denom;
+    u := (qpx * ry - qpy * rx) / denom;
+
+    IF t < 0.0 OR t > 1.0 OR u < 0.0 OR u > 1.0 THEN
+        RETURN NULL;
+    END IF;
+
+    -- use the vertices where the segments touch
+    IF u = 0.0 THEN
+        RETURN ARRAY[bx1, by1];
+    END IF;
+    IF u = 1.0 THEN
+        RETURN ARRAY[bx2, by2];
+    END IF;
+    IF t = 0.0 THEN
+        RETURN ARRAY[ax1, ay1];
+    END IF;
+    IF t = 1.0 THEN
+        RETURN ARRAY[ax2, ay2];
+    END IF;
+    RETURN ARRAY[ax1 + t * rx, ay1 + t * ry];
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+-- as tomsSelfIntersections.resolveSelfIntersections: removes the loops from a line
+CREATE OR REPLACE FUNCTION toms.toms_resolve_self_intersections(line geometry) RETURNS geometry AS $$
+DECLARE
+    nr_pts integer := ST_NPoints(line);
+    xs double precision[];
+    ys double precision[];
+    new_pts geometry[];
+    curr_start_vertex_nr integer := 1;
+    curr_x double precision;
+    curr_y double precision;
+    end_x double precision;
+    end_y double precision;
+    intersect_line_start_vertex_nr integer;
+    intersect_pt double precision[];
+    next_pt double precision[];
+    test_vertex_nr integer;
+BEGIN
+
+    IF nr_pts < 3 THEN
+        RETURN line;
+    END IF;
+
+    SELECT array_agg(ST_X(d.geom) ORDER BY d.path), array_agg(ST_Y(d.geom) ORDER BY d.path)
+    INTO xs, ys
+    FROM ST_DumpPoints(line) d;
+
+    curr_x := xs[1];
+    curr_y := ys[1];
+    new_pts := ARRAY[ST_MakePoint(curr_x, curr_y)];
+
+    LOOP
+        end_x := xs[curr_start_vertex_nr + 1];
+        end_y := ys[curr_start_vertex_nr + 1];
+
+        intersect_line_start_vertex_nr := -1;
+        next_pt := NULL;
+
+        -- the last intersected segment is the one used - so test from the end
+        FOR test_vertex_nr IN REVERSE nr_pts - 1 .. curr_start_vertex_nr + 1 LOOP
+            intersect_pt := toms.toms_segment_intersection(
+                curr_x, curr_y, end_x, end_y,
+                xs[test_vertex_nr], ys[test_vertex_nr], xs[test_vertex_nr + 1], ys[test_vertex_nr + 1]);
+            IF intersect_pt IS NOT NULL THEN
+                intersect_line_start_vertex_nr := test_vertex_nr;
+                next_pt := intersect_pt;
+                EXIT;
+            END IF;
+        END LOOP;
+
+        IF intersect_line_start_vertex_nr > 0 THEN
+            -- intersect was found
+            curr_x := next_pt[1];
+            curr_y := next_pt[2];
+            curr_start_vertex_nr := intersect_line_start_vertex_nr;
+        ELSE
+            curr_start_vertex_nr := curr_start_vertex_nr + 1;
+            curr_x := xs[curr_start_vertex_nr];
+            curr_y := ys[curr_start_vertex_nr];
+        END IF;
+
+        new_pts := new_pts || ST_MakePoint(curr_x, curr_y);
+
+        -- check to see if the end point of the test line is the end of the line ...
+        EXIT WHEN curr_start_vertex_nr = nr_pts;
+    END LOOP;
+
+    RETURN ST_SetSRID(ST_MakeLine(new_pts), ST_SRID(line));
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+/***
+ * as TOMsGeometryElement.getShape: the shape line (from the kerb offset out to
+ * shp_extent and back) and the parallel line (at the kerb offset)
+ ****/
+CREATE OR REPLACE FUNCTION toms.toms_get_shape(kerb geometry, geom_shape_id integer, bay_orientation double precision,
+                                               azimuth_to_cl double precision, shp_extent double precision,
+                                               kerb_offset double precision,
+                                               OUT shape geometry, OUT parallel_line geometry) AS $$
+DECLARE
+    line geometry := toms.toms_kerb_line(kerb);
+    srid integer := ST_SRID(kerb);
+    nr_pts integer;
+    xs double precision[];
+    ys double precision[];
+    pts geometry[] := ARRAY[]::geometry[];
+    parallel_pts geometry[] := ARRAY[]::geometry[];
+    orientation double precision := bay_orientation;
+    diff_echelon_az double precision := 0.0;
+    azimuth double precision;
+    prev_az double precision;
+    turn double precision;
+    new_az double precision;
+    cosa double precision;
+    cosb double precision;
+    dist_width double precision;
+    dist_offset double precision;
+    this_offset double precision;
+    i integer;
+BEGIN
+
+    nr_pts := ST_NPoints(line);
+    IF nr_pts IS NULL OR nr_pts < 2 THEN
+        RETURN;
+    END IF;
+
+    SELECT array_agg(ST_X(d.geom) ORDER BY d.path), array_agg(ST_Y(d.geom) ORDER BY d.path)
+    INTO xs, ys
+    FROM ST_DumpPoints(line) d;
+
+    -- now loop through each of the vertices and process as required
+    FOR i IN 1 .. nr_pts - 1 LOOP
+
+        azimuth := toms.toms_check_degrees(toms.toms_azimuth(xs[i], ys[i], xs[i + 1], ys[i + 1]));
+
+        IF i = 1 THEN
+            -- determine which way to turn towards CL (center line)
+            turn := toms.toms_turn_to_cl(azimuth, azimuth_to_cl);
+
+            new_az := toms.toms_check_degrees(azimuth + turn);
+            cosa := sin(radians(new_az));
+            cosb := cos(radians(new_az));
+
+            pts := pts || ST_MakePoint(xs[i] + kerb_offset * cosa, ys[i] + kerb_offset * cosb);
+            parallel_pts := parallel_pts || ST_MakePoint(xs[i] + kerb_offset * cosa, ys[i] + kerb_offset * cosb);
+
+            IF geom_shape_id IN (5, 25, 9, 29) THEN  -- echelon
+                IF orientation IS NULL THEN
+                    orientation := azimuth_to_cl;
+                END IF;
+
+                diff_echelon_az := toms.toms_check_degrees(orientation - new_az);
+
+                new_az := toms.toms_check_degrees(new_az + diff_echelon_az);
+                cosa := sin(radians(new_az));
+                cosb := cos(radians(new_az));
+            END IF;
+
+            pts := pts || ST_MakePoint(xs[i] + shp_extent * cosa, ys[i] + shp_extent * cosb);
+
+        ELSE
+            SELECT b.bisect_az, b.dist_to_pt INTO new_az, dist_width
+            FROM toms.toms_calc_bisector(prev_az, azimuth, turn, shp_extent) b;
+            SELECT b.dist_to_pt INTO dist_offset
+            FROM toms.toms_calc_bisector(prev_az, azimuth, turn, kerb_offset) b;
+
+            cosa := sin(radians(new_az + diff_echelon_az));
+            cosb := cos(radians(new_az + diff_echelon_az));
+            pts := pts || ST_MakePoint(xs[i] + dist_width * cosa, ys[i] + dist_width * cosb);
+
+            this_offset := dist_offset;
+            IF dist_width < 0 THEN
+                IF abs(dist_width) + abs(dist_offset) <> abs(dist_width + dist_offset) THEN
+                    this_offset := -dist_offset;
+                END IF;
+            END IF;
+
+            parallel_pts := parallel_pts || ST_MakePoint(xs[i] + this_offset * cosa, ys[i] + this_offset * cosb);
+        END IF;
+
+        prev_az := azimuth;
+
+    END LOOP;
+
+    new_az := toms.toms_check_degrees(azimuth + turn + diff_echelon_az);
+    cosa := sin(radians(new_az));
+    cosb := cos(radians(new_az));
+
+    pts := pts || ST_MakePoint(xs[nr_pts] + shp_extent * cosa, ys[nr_pts] + shp_extent * cosb);
+
+    -- add end point (without any consideration of Echelon)
+    new_az := azimuth + turn;
+    cosa := sin(radians(new_az));
+    cosb := cos(radians(new_az));
+
+    pts := pts || ST_MakePoint(xs[nr_pts] + kerb_offset * cosa, ys[nr_pts] + kerb_offset * cosb);
+    parallel_pts := parallel_pts || ST_MakePoint(xs[nr_pts] + kerb_offset * cosa, ys[nr_pts] + kerb_offset * cosb);
+
+    shape := ST_SetSRID(ST_MakeLine(pts), srid);
+    parallel_line := ST_SetSRID(ST_MakeLine(parallel_pts), srid);
+
+    IF NOT ST_IsSimple(shape) THEN
+        shape := toms.toms_resolve_self_intersections(shape);
+    END IF;
+    IF NOT ST_IsSimple(parallel_line) THEN
+        parallel_line := toms.toms_resolve_self_intersections(parallel_line);
+    END IF;
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- as TOMsGeometryElement.getZigZag
+CREATE OR REPLACE FUNCTION toms.toms_get_zigzag(kerb geometry, azimuth_to_cl double precision,
+                                                kerb_offset double precision, shp_extent double precision,
+                                                wavelength double precision DEFAULT 3.0) RETURNS geometry AS $$
+DECLARE
+    line geometry := toms.toms_kerb_line(kerb);
+    line_length double precision;
+    length_along double precision := ST_Length(kerb);
+    nr_segments integer;
+    seg_interval double precision;
+    azimuth double precision;
+    turn double precision;
+    cosa double precision;
+    cosb double precision;
+    pts geometry[];
+    distance_along_line double precision := 0.0;
+    pt geometry;
+    count_segments integer;
+BEGIN
+
+    IF line IS NULL OR ST_NPoints(line) < 2 THEN
+        RETURN NULL;
+    END IF;
+    line_length := ST_Length(line);
+
+    nr_segments := trunc(length_along / wavelength)::integer;  -- e.g., length = 33, wavelength = 4
+    IF nr_segments = 0 THEN
+        nr_segments := 1;
+    END IF;
+    seg_interval := trunc(length_along / nr_segments * 10000) / 10000;
+
+    azimuth := toms.toms_azimuth(ST_X(ST_PointN(line, 1)), ST_Y(ST_PointN(line, 1)),
+                                 ST_X(ST_PointN(line, 2)), ST_Y(ST_PointN(line, 2)));
+    turn := toms.toms_turn_to_cl(azimuth, azimuth_to_cl);
+
+    cosa := sin(radians(azimuth + turn));
+    cosb := cos(radians(azimuth + turn));
+
+    -- deal with two points
+    pt := ST_StartPoint(line);
+    pts := ARRAY[ST_MakePoint(ST_X(pt) + kerb_offset * cosa, ST_Y(pt) + kerb_offset * cosb),
+                 ST_MakePoint(ST_X(pt) + shp_extent * cosa, ST_Y(pt) + shp_extent * cosb)];
+
+    FOR count_segments IN 1 .. nr_segments LOOP
+
+        distance_along_line := distance_along_line + seg_interval / 2;
+        IF distance_along_line <= line_length THEN
+            pt := ST_LineInterpolatePoint(line, least(distance_along_line / line_length, 1.0));
+            pts := pts || ST_MakePoint(ST_X(pt) + kerb_offset * cosa, ST_Y(pt) + kerb_offset * cosb);
+        END IF;
+
+        distance_along_line := distance_along_line + seg_interval / 2;
+        IF distance_along_line <= line_length THEN
+            pt := ST_LineInterpolatePoint(line, least(distance_along_line / line_length, 1.0));
+            pts := pts || ST_MakePoint(ST_X(pt) + shp_extent * cosa, ST_Y(pt) + shp_extent * cosb);
+        END IF;
+
+    END LOOP;
+
+    -- deal with last point
+    pt := ST_EndPoint(line);
+    pts := pts || ST_MakePoint(ST_X(pt) + kerb_offset * cosa, ST_Y(pt) + kerb_offset * cosb);
+
+    RETURN ST_SetSRID(ST_MakeLine(pts), ST_SRID(kerb));
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- as tomsBayDividers.edgeSegments: the part of an edge (segments kerb_segment_nr - 1 to kerb_segment_nr + 1,
+-- numbered from 1) to test for a divider on kerb segment kerb_segment_nr
+CREATE OR REPLACE FUNCTION toms.toms_edge_segments(edge geometry, nr_kerb_vertices integer,
+                                                   kerb_segment_nr integer) RETURNS geometry AS $$
+DECLARE
+    nr_segments integer := ST_NPoints(edge) - 1;
+    part geometry;
+BEGIN
+
+    IF nr_segments + 1 <> nr_kerb_vertices THEN
+        -- the edges do not match the kerb (e.g., loops removed) - test all segments
+        RETURN edge;
+    END IF;
+
+    SELECT ST_SetSRID(ST_MakeLine(d.geom ORDER BY d.path), ST_SRID(edge)) INTO part
+    FROM ST_DumpPoints(edge) d
+    WHERE d.path[1] >= greatest(kerb_segment_nr - 1, 1)
+      AND d.path[1] <= least(kerb_segment_nr + 1, nr_segments) + 1;
+
+    RETURN part;
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+-- as TOMsGeometryElement.getBayDividers: the lines across the shape between the bays
+CREATE OR REPLACE FUNCTION toms.toms_get_bay_dividers(kerb geometry, shape geometry, parallel_line geometry,
+                                                      geom_shape_id integer, bay_orientation double precision,
+                                                      nr_bays integer, azimuth_to_cl double precision,
+                                                      shp_extent double precision,
+                                                      kerb_offset double precision) RETURNS geometry[] AS $$
+DECLARE
+    line geometry := toms.toms_kerb_line(kerb);
+    srid integer := ST_SRID(kerb);
+    outside_line geometry;
+    orientation double precision := bay_orientation;
+    turn double precision;
+    azimuth double precision;
+    new_az double precision;
+    cosa double precision;
+    cosb double precision;
+    xs double precision[];
+    ys double precision[];
+    nr_pts integer;
+    nr_kerb_vertices integer;
+    parallel_part geometry;
+    outside_part geometry;
+    seg_interval double precision;
+    distance_along_line double precision := 0.0;
+    segment_start double precision := 0.0;
+    segment_length double precision;
+    segment_nr integer := 1;
+    fraction double precision;
+    pt_x double precision;
+    pt_y double precision;
+    test_start geometry;
+    test_end geometry;
+    test_line geometry;
+    start_pt geometry;
+    end_pt geometry;
+    divider_length double precision;
+    dx double precision;
+    dy double precision;
+    dividers geometry[] := ARRAY[]::geometry[];
+    count_segments integer;
+BEGIN
+
+    IF line IS NULL OR shape IS NULL OR parallel_line IS NULL OR ST_NPoints(parallel_line) < 2 THEN
+        RETURN NULL;
+    END IF;
+
+    -- the bay shape "outside line"
+    SELECT ST_SetSRID(ST_MakeLine(d.geom ORDER BY d.path), srid) INTO outside_line
+    FROM ST_DumpPoints(shape) d
+    WHERE d.path[1] > 1 AND d.path[1] < ST_NPoints(shape);
+
+    -- get Az and calc turn to CL
+    azimuth := toms.toms_check_degrees(toms.toms_azimuth(
+        ST_X(ST_PointN(parallel_line, 1)), ST_Y(ST_PointN(parallel_line, 1)),
+        ST_X(ST_PointN(parallel_line, 2)), ST_Y(ST_PointN(parallel_line, 2))));
+    turn := toms.toms_turn_to_cl(azimuth, azimuth_to_cl);
+
+    IF geom_shape_id IN (5, 25, 9, 29) THEN  -- echelon
+        IF orientation IS NULL THEN
+            orientation := azimuth_to_cl;
+        END IF;
+    END IF;
+
+    seg_interval := trunc(ST_Length(kerb) / nr_bays * 10000) / 10000;
+
+    SELECT array_agg(ST_X(d.geom) ORDER BY d.path), array_agg(ST_Y(d.geom) ORDER BY d.path)
+    INTO xs, ys
+    FROM ST_DumpPoints(line) d;
+    nr_pts := array_length(xs, 1);
+    nr_kerb_vertices := CASE WHEN GeometryType(kerb) = 'LINESTRING' THEN nr_pts ELSE -1 END;
+
+    FOR count_segments IN 1 .. nr_bays - 1 LOOP
+
+        distance_along_line := distance_along_line + seg_interval;
+
+        -- find the segment with the point (the first, if it is on a vertex) ...
+        segment_length := sqrt((xs[segment_nr + 1] - xs[segment_nr]) ^ 2 + (ys[segment_nr + 1] - ys[segment_nr]) ^ 2);
+        WHILE segment_nr < nr_pts - 1 AND segment_start + segment_length < distance_along_line LOOP
+            segment_start := segment_start + segment_length;
+            segment_nr := segment_nr + 1;
+            segment_length := sqrt((xs[segment_nr + 1] - xs[segment_nr]) ^ 2 + (ys[segment_nr + 1] - ys[segment_nr]) ^ 2);
+        END LOOP;
+
+        fraction := CASE WHEN segment_length > 0 THEN (distance_along_line - segment_start) / segment_length ELSE 0.0 END;
+        pt_x := xs[segment_nr] + (xs[segment_nr + 1] - xs[segment_nr]) * fraction;
+        pt_y := ys[segment_nr] + (ys[segment_nr + 1] - ys[segment_nr]) * fraction;
+
+        -- ... and its azimuth
+        azimuth := toms.toms_check_degrees(toms.toms_azimuth(
+            xs[segment_nr], ys[segment_nr], xs[segment_nr + 1], ys[segment_nr + 1]));
+        new_az := toms.toms_check_degrees(azimuth + turn);
+
+        IF geom_shape_id IN (5, 25, 9, 29) THEN  -- echelon
+            new_az := toms.toms_check_degrees(new_az + toms.toms_check_degrees(orientation - new_az));
+        END IF;
+
+        cosa := sin(radians(new_az));
+        cosb := cos(radians(new_az));
+
+        test_start := ST_SetSRID(ST_MakePoint(pt_x + kerb_offset * cosa, pt_y + kerb_offset * cosb), srid);
+        test_end := ST_SetSRID(ST_MakePoint(pt_x + shp_extent * cosa, pt_y + shp_extent * cosb), srid);
+        test_line := ST_MakeLine(test_start, test_end);
+
+        -- check for intersection ... on the segments of the edges next to the point
+        parallel_part := toms.toms_edge_segments(parallel_line, nr_kerb_vertices, segment_nr);
+        IF ST_Intersects(parallel_part, test_line) THEN
+            start_pt := test_start;
+        ELSE
+            start_pt := ST_ClosestPoint(parallel_part, test_start);
+        END IF;
+
+        outside_part := toms.toms_edge_segments(outside_line, nr_kerb_vertices, segment_nr);
+        IF ST_Intersects(outside_part, test_line) THEN
+            end_pt := test_end;
+        ELSE
+            end_pt := ST_ClosestPoint(outside_part, test_end);
+        END IF;
+
+        -- slightly extend the divider (as QgsGeometry.extendLine) to deal with rounding in the split
+        dx := ST_X(end_pt) - ST_X(start_pt);
+        dy := ST_Y(end_pt) - ST_Y(start_pt);
+        divider_length := sqrt(dx * dx + dy * dy);
+        IF divider_length > 0 THEN
+            dx := dx / divider_length * 0.0001;
+            dy := dy / divider_length * 0.0001;
+        END IF;
+
+        dividers := dividers || ST_SetSRID(ST_MakeLine(
+            ST_MakePoint(ST_X(start_pt) - dx, ST_Y(start_pt) - dy),
+            ST_MakePoint(ST_X(end_pt) + dx, ST_Y(end_pt) + dy)), srid);
+
+    END LOOP;
+
+    RETURN dividers;
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- as TOMsGeometryElement.generatePolygon: the polygon between the shape and the parallel line
+CREATE OR REPLACE FUNCTION toms.toms_generate_polygon(shape geometry, parallel_line geometry) RETURNS geometry AS $$
+DECLARE
+    rings geometry[];
+BEGIN
+
+    SELECT array_agg(
+        CASE WHEN ST_IsClosed(d.geom) THEN d.geom ELSE ST_AddPoint(d.geom, ST_StartPoint(d.geom)) END
+        ORDER BY d.path)
+    INTO rings
+    FROM ST_Dump(ST_LineMerge(ST_Union(shape, parallel_line))) d;
+
+    IF array_length(rings, 1) = 1 THEN
+        RETURN ST_MakePolygon(rings[1]);
+    END IF;
+    RETURN ST_MakePolygon(rings[1], rings[2:]);
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+/***
+ * A bay (or line) shape with its dividers, as the GeneratedGeometry*LineType and
+ * GeneratedGeometry*PolygonType classes
+ ****/
+CREATE OR REPLACE FUNCTION toms.toms_get_bay_geometry(kerb geometry, geom_shape_id integer,
+                                                      bay_orientation double precision, nr_bays integer,
+                                                      azimuth_to_cl double precision, shp_extent double precision,
+                                                      kerb_offset double precision, as_polygon boolean) RETURNS geometry AS $$
+DECLARE
+    shape geometry;
+    parallel_line geometry;
+    output_geometry geometry;
+    dividers geometry[];
+    divider geometry;
+    pieces geometry[];
+BEGIN
+
+    SELECT s.shape, s.parallel_line INTO shape, parallel_line
+    FROM toms.toms_get_shape(kerb, geom_shape_id, bay_orientation, azimuth_to_cl, shp_extent, kerb_offset) s;
+
+    IF shape IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF as_polygon THEN
+        output_geometry := toms.toms_generate_polygon(shape, parallel_line);
+    ELSE
+        output_geometry := shape;
+    END IF;
+
+    IF coalesce(nr_bays, 0) <= 0 THEN
+        RETURN output_geometry;
+    END IF;
+
+    dividers := toms.toms_get_bay_dividers(kerb, shape, parallel_line, geom_shape_id, bay_orientation,
+                                           nr_bays, azimuth_to_cl, shp_extent, kerb_offset);
+    IF dividers IS NULL THEN
+        RETURN CASE WHEN as_polygon THEN output_geometry ELSE NULL END;
+    END IF;
+
+    IF NOT as_polygon THEN
+        -- add "legs" to bay shape to show dividers
+        RETURN ST_Multi(ST_Union(dividers || shape));
+    END IF;
+
+    -- split output polygon(s) to show bay dividers
+    pieces := ARRAY[output_geometry];
+    FOREACH divider IN ARRAY dividers LOOP
+        SELECT array_agg(d.geom) INTO pieces
+        FROM unnest(pieces) p(geom), ST_Dump(ST_Split(p.geom, divider)) d;
+    END LOOP;
+
+    RETURN ST_Multi(ST_Collect(pieces));
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- as TOMsGeometryElement.__init__ and ElementGeometryFactory.generateElementGeometry
+CREATE OR REPLACE FUNCTION toms.toms_display_geometry(kerb geometry, geom_shape_id integer,
+                                                      azimuth_to_cl double precision, nr_bays integer,
+                                                      bay_orientation double precision, bay_width double precision,
+                                                      default_bay_width double precision,
+                                                      bay_length double precision,
+                                                      bay_offset_from_kerb double precision,
+                                                      line_offset_from_kerb double precision,
+                                                      crossover_shape_width double precision,
+                                                      show_bay_divisions boolean DEFAULT false) RETURNS geometry AS $$
+DECLARE
+    is_bay boolean := geom_shape_id < 10 OR (geom_shape_id >= 20 AND geom_shape_id < 30);
+    width double precision := default_bay_width;
+    orientation double precision := 0.0;
+    nr integer := 0;
+    az double precision := coalesce(azimuth_to_cl, 0.0);
+    reverse_az double precision;
+BEGIN
+
+    IF is_bay THEN
+        nr := CASE WHEN show_bay_divisions THEN nr_bays ELSE -1 END;
+        orientation := bay_orientation;
+        IF bay_width IS NOT NULL THEN
+            width := bay_width;
+        END IF;
+    END IF;
+
+    -- as GenerateGeometryUtils.getReverseAzimuth
+    reverse_az := toms.toms_check_degrees(az);
+
+    CASE geom_shape_id
+        WHEN 1 THEN  -- PARALLEL_BAY
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, az, width, bay_offset_from_kerb, false);
+        WHEN 2 THEN  -- HALF_ON_HALF_OFF
+            RETURN ST_Multi(ST_Union(
+                toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, az, width / 2, bay_offset_from_kerb, false),
+                toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, reverse_az, width / 2, bay_offset_from_kerb, false)));
+        WHEN 3 THEN  -- ON_PAVEMENT
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, reverse_az, width, bay_offset_from_kerb, false);
+        WHEN 4, 5 THEN  -- PERPENDICULAR, ECHELON
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, az, bay_length, bay_offset_from_kerb, false);
+        WHEN 6, 9 THEN  -- PERPENDICULAR_ON_PAVEMENT, ECHELON_ON_PAVEMENT
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, reverse_az, bay_length, bay_offset_from_kerb, false);
+        WHEN 7, 8 THEN  -- OTHER, CENTRAL_PARKING
+            RETURN kerb;
+        WHEN 10 THEN  -- PARALLEL_LINE
+            RETURN (toms.toms_get_shape(kerb, geom_shape_id, orientation, az, line_offset_from_kerb, line_offset_from_kerb)).shape;
+        WHEN 12 THEN  -- ZIG_ZAG
+            RETURN toms.toms_get_zigzag(kerb, az, bay_offset_from_kerb, width / 2);
+        WHEN 21 THEN  -- PARALLEL_BAY_POLYGON
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, az, width, bay_offset_from_kerb, true);
+        WHEN 22 THEN  -- HALF_ON_HALF_OFF_POLYGON
+            RETURN ST_Multi(ST_Collect(ARRAY(
+                SELECT (ST_Dump(g)).geom
+                FROM unnest(ARRAY[
+                    toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, az, width / 2, bay_offset_from_kerb, true),
+                    toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, reverse_az, width / 2, bay_offset_from_kerb, true)
+                ]) g)));
+        WHEN 23 THEN  -- ON_PAVEMENT_POLYGON
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, reverse_az, width, bay_offset_from_kerb, true);
+        WHEN 24, 25 THEN  -- PERPENDICULAR_POLYGON, ECHELON_POLYGON
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, az, bay_length, bay_offset_from_kerb, true);
+        WHEN 26, 29 THEN  -- PERPENDICULAR_ON_PAVEMENT_POLYGON, ECHELON_ON_PAVEMENT_POLYGON
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, nr, reverse_az, bay_length, bay_offset_from_kerb, true);
+        WHEN 28 THEN  -- OUTLINE_BAY_POLYGON
+            RETURN ST_MakePolygon(CASE WHEN ST_IsClosed(kerb) THEN kerb ELSE ST_AddPoint(kerb, ST_StartPoint(kerb)) END);
+        WHEN 35 THEN  -- CROSSOVER
+            RETURN toms.toms_get_bay_geometry(kerb, geom_shape_id, orientation, 0, reverse_az, crossover_shape_width, bay_offset_from_kerb, true);
+        ELSE
+            RAISE EXCEPTION 'Restriction Geometry Type % NOT found', geom_shape_id;
+    END CASE;
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
@@ -0,0 +1,40 @@
+/***
+ * Views with the display geometries of Bays and Lines, generated in the database by
+ * toms.toms_display_geometry (0063a_display_geometry_functions.sql), for QGIS Server
+ * and other clients that do not have the TOMs expression functions.
+ *
+ * The widths and offsets are read from mhtc_operations."project_parameters" and
+ * need to be the same as the QGIS project variables BayWidth, BayLength,
+ * BayOffsetFromKerb, LineOffsetFromKerb and CrossoverShapeWidth. Bay divisions are
+ * shown if the parameter ShowBayDivisions is 'True' (as in TOMs.conf).
+ ****/
+
+CREATE OR REPLACE VIEW toms."BaysDisplayGeometry" AS
+    SELECT b."GeometryID", b."GeomShapeID", b."OpenDate", b."CloseDate",
+           toms.toms_display_geometry(
+               b.geom, b."GeomShapeID", b."AzimuthToRoadCentreLine", b."NrBays", b."BayOrientation", b."BayWidth",
+               p."BayWidth", p."BayLength", p."BayOffsetFromKerb", p."LineOffsetFromKerb",
+               p."CrossoverShapeWidth", p."ShowBayDivisions") AS geom
+    FROM toms."Bays" b,
+        (SELECT mhtc_operations."getParameter"('BayWidth')::double precision AS "BayWidth",
+                mhtc_operations."getParameter"('BayLength')::double precision AS "BayLength",
+                mhtc_operations."getParameter"('BayOffsetFromKerb')::double precision AS "BayOffsetFromKerb",
+                mhtc_operations."getParameter"('LineOffsetFromKerb')::double precision AS "LineOffsetFromKerb",
+                mhtc_operations."getParameter"('CrossoverShapeWidth')::double precision AS "CrossoverShapeWidth",
+                coalesce(mhtc_operations."getParameter"('ShowBayDivisions') = 'True', false) AS "ShowBayDivisions") p;
+
+CREATE OR REPLACE VIEW toms."LinesDisplayGeometry" AS
+    SELECT l."GeometryID", l."GeomShapeID", l."OpenDate", l."CloseDate",
+           toms.toms_display_geometry(
+               l.geom, l."GeomShapeID", l."AzimuthToRoadCentreLine", NULL, NULL, NULL,
+               p."BayWidth", p."BayLength", p."BayOffsetFromKerb", p."LineOffsetFromKerb",
+               p."CrossoverShapeWidth", false) AS geom
+    FROM toms."Lines" l,
+        (SELECT mhtc_operations."getParameter"('BayWidth')::double precision AS "BayWidth",
+                mhtc_operations."getParameter"('BayLength')::double precision AS "BayLength",
+                mhtc_operations."getParameter"('BayOffsetFromKerb')::double precision AS "BayOffsetFromKerb",
+                mhtc_operations."getParameter"('LineOffsetFromKerb')::double precision AS "LineOffsetFromKerb",
+                mhtc_operations."getParameter"('CrossoverShapeWidth')::double precision AS "CrossoverShapeWidth") p;
+
+GRANT SELECT ON TABLE toms."BaysDisplayGeometry" TO toms_public, toms_operator, toms_admin;
+GRANT SELECT ON TABLE toms."LinesDisplayGeometry" TO toms_public, toms_operator, toms_admin;
@@ -0,0 +1,26 @@
+/***
+ * Restrictions of a proposal, for the layer filters set by TOMsProposalsManager.updateMapCanvas.
+ *
+ * The filter of each restriction layer refers to this function instead of listing every
+ * RestrictionID of the current proposal, so its text (and plan) does not depend on the
+ * size of the proposal, e.g.
+ *
+ *   "RestrictionID" IN (SELECT "RestrictionID" FROM toms.restrictions_in_proposal(12, 2, 1))
+ *
+ * The function is a single SQL statement, so it is inlined by the planner and uses the
+ * primary key of RestrictionsInProposals ("ProposalID", "RestrictionTableID", "RestrictionID").
+ ****/
+
+CREATE OR REPLACE FUNCTION toms.restrictions_in_proposal(proposal_id integer, restriction_table_id integer,
+                                                         action_on_acceptance integer)
+    RETURNS TABLE ("RestrictionID" character varying) AS $$
+
+    SELECT RiP."RestrictionID"
+    FROM toms."RestrictionsInProposals" RiP
+    WHERE RiP."ProposalID" = proposal_id
+    AND RiP."RestrictionTableID" = restriction_table_id
+    AND RiP."ActionOnProposalAcceptance" = action_on_acceptance;
+
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION toms.restrictions_in_proposal(integer, integer, integer) TO toms_public, toms_operator, toms_admin;
@@ -0,0 +1,21 @@
+/***
+ * Indexes on the open/close dates of the restriction layers.
+ *
+ * Used by the date filter set by TOMsProposalsManager and, in temporal mode (TOMs.conf
+ * TemporalMode = True), by the filter QGIS builds from the layer temporal properties
+ * ("OpenDate" <= end of day OR "OpenDate" IS NULL) AND ("CloseDate" > start of day OR
+ * "CloseDate" IS NULL). The IS NULL tests also use these (btree) indexes.
+ ****/
+
+CREATE INDEX IF NOT EXISTS "Bays_OpenDate_idx" ON toms."Bays" USING btree ("OpenDate");
+CREATE INDEX IF NOT EXISTS "Bays_CloseDate_idx" ON toms."Bays" USING btree ("CloseDate");
+CREATE INDEX IF NOT EXISTS "Lines_OpenDate_idx" ON toms."Lines" USING btree ("OpenDate");
+CREATE INDEX IF NOT EXISTS "Lines_CloseDate_idx" ON toms."Lines" USING btree ("CloseDate");
+CREATE INDEX IF NOT EXISTS "Signs_OpenDate_idx" ON toms."Signs" USING btree ("OpenDate");
+CREATE INDEX IF NOT EXISTS "Signs_CloseDate_idx" ON toms."Signs" USING btree ("CloseDate");
+CREATE INDEX IF NOT EXISTS "RestrictionPolygons_OpenDate_idx" ON toms."RestrictionPolygons" USING btree ("OpenDate");
+CREATE INDEX IF NOT EXISTS "RestrictionPolygons_CloseDate_idx" ON toms."RestrictionPolygons" USING btree ("CloseDate");
+CREATE INDEX IF NOT EXISTS "ControlledParkingZones_OpenDate_idx" ON toms."ControlledParkingZones" USING btree ("OpenDate");
+CREATE INDEX IF NOT EXISTS "ControlledParkingZones_CloseDate_idx" ON toms."ControlledParkingZones" USING btree ("CloseDate");
+CREATE INDEX IF NOT EXISTS "ParkingTariffAreas_OpenDate_idx" ON toms."ParkingTariffAreas" USING btree ("OpenDate");
+CREATE INDEX IF NOT EXISTS "ParkingTariffAreas_CloseDate_idx" ON toms."ParkingTariffAreas" USING btree ("CloseDate");
@@ -18,10 +18,51 @@ from qgis.core import (
 from qgis.PyQt.QtCore import QDate, QObject, pyqtSignal
 from qgis.utils import iface
 
+from ..constants import RestrictionAction
 from ..restrictionTypeUtilsClass import TOMsLayers
-from ..utils import getRestrictionLayersList
 from .tomsMessageLog import TOMsMessageLog
 from .tomsProposal import TOMsProposal
+from .tomsRefreshScheduler import TOMsRefreshScheduler
+from .tomsRestrictionLayers import TOMsRestrictionLayers
+from .tomsTemporalMode import TOMsTemporalMode
+
+
+def dateFilterString(dateString):
+    """
+    Restrictions open at the date (given as dd-MM-yyyy) - or, without a date, all the
+    restrictions that have been opened (in temporal mode, QGIS filters the date)
+    """
+    if dateString is None:
+        return '"OpenDate" IS NOT NULL'
+    return (
+        f"\"OpenDate\" <= to_date('{dateString}', 'dd-MM-yyyy') "
+        + f"AND (\"CloseDate\" > to_date('{dateString}', 'dd-MM-yyyy') OR \"CloseDate\" IS NULL)"
+    )
+
+
+def restrictionFilterString(dateString, proposalID, layerID):
+    """
+    Restrictions of the layer (RestrictionLayers code layerID) shown at the date (None in
+    temporal mode) for the proposal - using toms.restrictions_in_proposal, for layers in
+    PostgreSQL
+    """
+
+    filterString = dateFilterString(dateString)
+    if proposalID == 0:
+        return filterString
+
+    restrictionsToOpen = (
+        'SELECT "RestrictionID" FROM toms.restrictions_in_proposal('
+        + f"{proposalID}, {layerID}, {RestrictionAction.OPEN.value})"
+    )
+    restrictionsToClose = (
+        'SELECT "RestrictionID" FROM toms.restrictions_in_proposal('
+        + f"{proposalID}, {layerID}, {RestrictionAction.CLOSE.value})"
+    )
+    return (
+        f'"RestrictionID" IN ({restrictionsToOpen}) '
+        + f'OR ({filterString} AND "RestrictionID" NOT IN ({restrictionsToClose}))'
+    )
 
 
 class TOMsProposalsManager(QObject):
@@ -56,6 +97,9 @@ class TOMsProposalsManager(QObject):
 
         self.currProposalObject = TOMsProposal(self)
 
+        self.refreshScheduler = TOMsRefreshScheduler(self, self.canvas)
+        self.temporalMode = TOMsTemporalMode(self, self.canvas)
+
         self.setTOMsActivated: int = False
         self.proposalsLayer = None
 
@@ -75,7 +119,9 @@ class TOMsProposalsManager(QObject):
         )
         self.__date = value
         self.dateChanged.emit()
-        self.updateMapCanvas()
+        if not self.temporalMode.isActive():
+            # (in temporal mode, the filters do not depend on the date)
+            self.refreshScheduler.scheduleRefresh("date")
 
     def currentProposal(self):
         """
@@ -114,119 +160,108 @@ class TOMsProposalsManager(QObject):
 
         self.currProposalObject.setProposal(self.currentProposal())
 
-        self.updateMapCanvas()
-
-        box = self.currProposalObject.getProposalBoundingBox()
-        if not box.isNull():
-            self.canvas.setExtent(box)
+        # the canvas is updated (and zoomed to the proposal) once the changes are made
+        self.refreshScheduler.scheduleRefresh("proposal", zoomToProposal=True)
 
     def updateMapCanvas(self):
         """
         Whenever the current proposal or the date changes we need to update the canvas.
+        Updates it now, including any changes scheduled by setDate/setCurrentProposal.
         """
 
-        TOMsMessageLog.logMessage("Entering updateMapCanvas ... ", level=Qgis.Warning)
+        return self.refreshScheduler.flush("update")
 
-        dateString = self.__date.toString("dd-MM-yyyy")
-        currProposalID = self.currentProposal()
+    def applyRestrictionFilters(self):
+        """Sets the filters of the restriction layers for the current date/proposal"""
 
-        filterString = (
-            f"\"OpenDate\" \u003C\u003D to_date('{dateString}', 'dd-MM-yyyy') "
-            + f"AND ((\"CloseDate\" \u003E to_date('{dateString}', 'dd-MM-yyyy')  OR \"CloseDate\" IS NULL)"
+        TOMsMessageLog.logMessage(
+            "Entering applyRestrictionFilters ... ", level=TOMsMessageLog.DEBUG
         )
 
-        for layerID, layerName in getRestrictionLayersList(self.tableNames):
+        for restrictionLayer in TOMsRestrictionLayers().getRestrictionLayers(
+            self.tableNames
+        ):
             TOMsMessageLog.logMessage(
-                f"updateMapCanvas: Considering layer: {layerName}",
+                f"applyRestrictionFilters: Considering layer: {restrictionLayer.name}",
                 level=TOMsMessageLog.DEBUG,
             )
 
-            layerFilterString = filterString
-
-            if currProposalID > 0:  # need to consider a proposal
-
-                restrictionsToClose = (
-                    self.currProposalObject.getRestrictionsToCloseForLayer(layerID)
+            try:
+                layerFilterString = self.getRestrictionFilterString(
+                    restrictionLayer.code, restrictionLayer.layer
                 )
-                if len(restrictionsToClose) > 0:
-                    layerFilterString = f'{layerFilterString} AND "RestrictionID" NOT IN ({restrictionsToClose}))'
-
-                restrictionsToOpen = (
-                    self.currProposalObject.getRestrictionsToOpenForLayer(layerID)
+                TOMsMessageLog.logMessage(
+                    f"In applyRestrictionFilters. Layer: {restrictionLayer.name} Date Filter: {layerFilterString}",
+                    level=TOMsMessageLog.DEBUG,
                 )
-                if len(restrictionsToOpen) > 0:
-                    layerFilterString = f' "RestrictionID"  IN ({restrictionsToOpen}) OR ({layerFilterString})'
-
-                if len(restrictionsToClose) == 0:
-                    layerFilterString = layerFilterString + ")"
-
-            else:
-                layerFilterString = layerFilterString + ")"
-
-            TOMsMessageLog.logMessage(
-                f"In updateMapCanvas. Layer: {layerName} Date Filter: {layerFilterString}",
-                level=TOMsMessageLog.DEBUG,
-            )
-            try:
-                self.tableNames.getLayer(layerName).dataProvider().setSubsetString(
-                    layerFilterString
+                self.refreshScheduler.setSubsetString(
+                    restrictionLayer.layer, layerFilterString
                 )
             except Exception as e:
                 TOMsMessageLog.logMessage(
-                    f"updateMapCanvas: error in layer {layerName}: {e}",
+                    f"applyRestrictionFilters: error in layer {restrictionLayer.name}: {e}",
                     level=Qgis.Warning,
                 )
                 return False
 
-            # *** deal with labels ...
-            # get the corresponding label layers
-            if layerName == "Bays":
-                labelLayersNames = ["Bays.label_pos", "Bays.label_ldr"]
-            if layerName == "Lines":
-                labelLayersNames = [
-                    "Lines.label_pos",
-                    "Lines.label_ldr",
-                    "Lines.label_loading_pos",
-                    "Lines.label_loading_ldr",
-                ]
-            if layerName == "RestrictionPolygons":
-                labelLayersNames = [
-                    "RestrictionPolygons.label_pos",
-                    "RestrictionPolygons.label_ldr",
-                ]
-            if layerName == "CPZs":
-                labelLayersNames = ["CPZs.label_pos", "CPZs.label_ldr"]
-            if layerName == "ParkingTariffAreas":
-                labelLayersNames = [
-                    "ParkingTariffAreas.label_pos",
-                    "ParkingTariffAreas.label_ldr",
-                ]
-
             # now apply the filter to the labels ...
-
-            for labelLayersName in labelLayersNames:
-                # get the label layer
+            for labelLayer in restrictionLayer.labelLayers:
                 TOMsMessageLog.logMessage(
-                    f"updateMapCanvas: Considering layer: {labelLayersName}",
+                    f"applyRestrictionFilters: Considering layer: {labelLayer.name()}",
                     level=TOMsMessageLog.DEBUG,
                 )
                 try:
-                    QgsProject.instance().mapLayersByName(labelLayersName)[
-                        0
-                    ].dataProvider().setSubsetString(layerFilterString)
+                    self.refreshScheduler.setSubsetString(
+                        labelLayer, layerFilterString
+                    )
                 except Exception as e:
                     TOMsMessageLog.logMessage(
-                        f"updateMapCanvas: error in layer {labelLayersName}: {e}",
+                        f"applyRestrictionFilters: error in layer {labelLayer.name()}: {e}",
                         level=Qgis.Warning,
                     )
                     return False
 
         TOMsMessageLog.logMessage(
-            "Finished updateMapCanvas ... ", level=TOMsMessageLog.DEBUG
+            "Finished applyRestrictionFilters ... ", level=TOMsMessageLog.DEBUG
         )
 
         return True
 
+    def getRestrictionFilterString(self, layerID, layer):
+        """
+        Subset string for a restriction layer: the restrictions open at the current
+        date, with those of the current proposal opened/closed
+        """
+
+        dateString = None
+        if not self.temporalMode.isActive():
+            dateString = self.__date.toString("dd-MM-yyyy")
+        currProposalID = self.currentProposal()
+
+        if layer.providerType() == "postgres":
+            # the restrictions of the proposal are found by the database (see
+            # DATAMODEL/0064_restrictions_in_proposal.sql), so the filter does not
+            # grow with the proposal
+            return restrictionFilterString(dateString, currProposalID, layerID)
+
+        layerFilterString = dateFilterString(dateString)
+
+        if currProposalID > 0:  # need to consider a proposal
+
+            restrictionsToClose = (
+                self.currProposalObject.getRestrictionsToCloseForLayer(layerID)
+            )
+            if len(restrictionsToClose) > 0:
+                layerFilterString = f'{layerFilterString} AND "RestrictionID" NOT IN ({restrictionsToClose})'
+
+            restrictionsToOpen = (
+                self.currProposalObject.getRestrictionsToOpenForLayer(layerID)
+            )
+            if len(restrictionsToOpen) > 0:
+                layerFilterString = f'"RestrictionID" IN ({restrictionsToOpen}) OR ({layerFilterString})'
+
+        return layerFilterString
+
     def clearRestrictionFilters(self):
         # This is to be used at the close of the plugin to clear any filters that have been set
 
@@ -234,58 +269,21 @@ class TOMsProposalsManager(QObject):
             "Entering clearRestrictionFilters ... ", level=Qgis.Info
         )
 
-        for (_, layerName) in getRestrictionLayersList(self.tableNames):
-            TOMsMessageLog.logMessage(
-                f"Clearing filter for layer: {layerName}", level=Qgis.Info
-            )
-            try:
-                self.tableNames.getLayer(layerName).dataProvider().setSubsetString(None)
-            except Exception as e:
-                TOMsMessageLog.logMessage(
-                    f"clearRestrictionFilters: error in layer {layerName}: {e}",
-                    level=Qgis.Warning,
-                )
-                return False
-
-            # *** deal with labels ...
-            # get the corresponding label layers
-            if layerName == "Bays":
-                labelLayersNames = ["Bays.label_pos", "Bays.label_ldr"]
-            if layerName == "Lines":
-                labelLayersNames = [
-                    "Lines.label_pos",
-                    "Lines.label_ldr",
-                    "Lines.label_loading_pos",
-                    "Lines.label_loading_ldr",
-                ]
-            if layerName == "RestrictionPolygons":
-                labelLayersNames = [
-                    "RestrictionPolygons.label_pos",
-                    "RestrictionPolygons.label_ldr",
-                ]
-            if layerName == "CPZs":
-                labelLayersNames = ["CPZs.label_pos", "CPZs.label_ldr"]
-            if layerName == "ParkingTariffAreas":
-                labelLayersNames = [
-                    "ParkingTariffAreas.label_pos",
-                    "ParkingTariffAreas.label_ldr",
-                ]
-
-            # now apply the filter to the labels ...
+        # any scheduled refresh would set them again
+        self.refreshScheduler.cancel()
 
-            for labelLayersName in labelLayersNames:
-                # get the label layer
-                TOMsMessageLog.logMessage(
-                    f"clearRestrictionFilters: Clearing filter for layer: {labelLayersName}",
-                    level=Qgis.Info,
-                )
+        for restrictionLayer in TOMsRestrictionLayers().getRestrictionLayers(
+            self.tableNames
+        ):
+            for layer in (restrictionLayer.layer,) + restrictionLayer.labelLayers:
                 try:
-                    QgsProject.instance().mapLayersByName(labelLayersName)[
-                        0
-                    ].dataProvider().setSubsetString(None)
+                    TOMsMessageLog.logMessage(
+                        f"Clearing filter for layer: {layer.name()}", level=Qgis.Info
+                    )
+                    self.refreshScheduler.setSubsetString(layer, None)
                 except Exception as e:
                     TOMsMessageLog.logMessage(
-                        f"clearRestrictionFilters: error in layer {labelLayersName}: {e}",
+                        f"clearRestrictionFilters: error in layer {restrictionLayer.name}: {e}",
                         level=Qgis.Warning,
                     )
                     return False
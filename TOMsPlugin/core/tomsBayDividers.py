@@ -0,0 +1,175 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+"""
+Bay dividers on plain coordinates.
+
+The two edges of a bay shape - the parallel line (at the kerb offset) and the outside
+line - have one vertex for each kerb vertex, so kerb segment k corresponds to segment k
+of each edge. A divider at a point of kerb segment k is therefore only tested against
+segments k - 1 to k + 1 of the edges, and positions along the edges are given as
+(segment number, fraction) - from which all the bay spaces are built in one go.
+"""
+
+import math
+
+from .tomsSelfIntersections import segmentIntersection
+
+
+def edgeSegments(nrEdgeVertices, nrKerbVertices, kerbSegmentNr):
+    """Segment numbers of an edge to test for a divider on kerb segment kerbSegmentNr"""
+
+    nrSegments = nrEdgeVertices - 1
+    if nrEdgeVertices != nrKerbVertices:
+        # the edges do not match the kerb (e.g., loops removed) - test all segments
+        return range(nrSegments)
+    return range(max(kerbSegmentNr - 1, 0), min(kerbSegmentNr + 2, nrSegments))
+
+
+def nearestPointOnSegments(xs, ys, segmentNrs, x, y):
+    """The point of the segments nearest to (x, y), as QgsGeometry.nearestPoint"""
+
+    nearest = None
+    nearestDistance = None
+    for segmentNr in segmentNrs:
+        ax, ay = xs[segmentNr], ys[segmentNr]
+        dx, dy = xs[segmentNr + 1] - ax, ys[segmentNr + 1] - ay
+        segmentLength2 = dx * dx + dy * dy
+        fraction = 0.0
+        if segmentLength2 > 0.0:
+            fraction = ((x - ax) * dx + (y - ay) * dy) / segmentLength2
+            fraction = min(max(fraction, 0.0), 1.0)
+        px, py = ax + fraction * dx, ay + fraction * dy
+        distance = (px - x) ** 2 + (py - y) ** 2
+        if nearestDistance is None or distance < nearestDistance:
+            nearest, nearestDistance = (px, py), distance
+    return nearest
+
+
+def dividerEnd(xs, ys, segmentNrs, testX1, testY1, testX2, testY2):
+    """
+    End of a divider on an edge: the test point (testX1, testY1) if the test line
+    crosses the edge, else the point of the edge nearest to it
+    """
+
+    for segmentNr in segmentNrs:
+        if (
+            segmentIntersection(
+                testX1,
+                testY1,
+                testX2,
+                testY2,
+                xs[segmentNr],
+                ys[segmentNr],
+                xs[segmentNr + 1],
+                ys[segmentNr + 1],
+            )
+            is not None
+        ):
+            return testX1, testY1
+    return nearestPointOnSegments(xs, ys, segmentNrs, testX1, testY1)
+
+
+def extendSegment(x1, y1, x2, y2, distance):
+    """Extends the segment at both ends by distance, as QgsGeometry.extendLine"""
+
+    length = math.hypot(x2 - x1, y2 - y1)
+    if length == 0.0:
+        return x1, y1, x2, y2
+    dx = (x2 - x1) / length * distance
+    dy = (y2 - y1) / length * distance
+    return x1 - dx, y1 - dy, x2 + dx, y2 + dy
+
+
+def edgeCrossing(xs, ys, segmentNrs, x1, y1, x2, y2):
+    """
+    Where the (infinite) line through the divider (x1, y1) - (x2, y2) crosses the edge:
+    ((segmentNr, fraction), x, y), the crossing nearest the divider, or None
+    """
+
+    ux, uy = x2 - x1, y2 - y1
+    best = None
+    bestDistance = None
+    for segmentNr in segmentNrs:
+        ax, ay = xs[segmentNr], ys[segmentNr]
+        sx, sy = xs[segmentNr + 1] - ax, ys[segmentNr + 1] - ay
+        denom = ux * sy - uy * sx
+        if denom == 0.0:
+            continue
+        # along the divider (t) and along the segment (fraction)
+        t = ((ax - x1) * sy - (ay - y1) * sx) / denom
+        fraction = ((ax - x1) * uy - (ay - y1) * ux) / denom
+        if fraction < -1e-9 or fraction > 1.0 + 1e-9:
+            continue
+        fraction = min(max(fraction, 0.0), 1.0)
+        distance = abs(t - 0.5)  # from the middle of the divider
+        if bestDistance is None or distance < bestDistance:
+            best = (
+                normalisedPosition(segmentNr, fraction),
+                ax + fraction * sx,
+                ay + fraction * sy,
+            )
+            bestDistance = distance
+    return best
+
+
+def normalisedPosition(segmentNr, fraction):
+    # the end of a segment is the start of the next one
+    if fraction >= 1.0:
+        return segmentNr + 1, 0.0
+    return segmentNr, fraction
+
+
+def bayRings(parallelXs, parallelYs, outsideXs, outsideYs, crossings):
+    """
+    Rings (lists of (x, y)) of the bay spaces between the parallel line and the outside
+    line, cut at crossings - a list of (parallelCrossing, outsideCrossing) as given by
+    edgeCrossing, in order along the edges. Returns None if the crossings are not in
+    order along both edges.
+    """
+
+    nrParallel = len(parallelXs)
+    nrOutside = len(outsideXs)
+
+    # the ends of the bay are cuts too
+    firstCut = (
+        ((0, 0.0), parallelXs[0], parallelYs[0]),
+        ((0, 0.0), outsideXs[0], outsideYs[0]),
+    )
+    lastCut = (
+        ((nrParallel - 1, 0.0), parallelXs[-1], parallelYs[-1]),
+        ((nrOutside - 1, 0.0), outsideXs[-1], outsideYs[-1]),
+    )
+    cuts = [firstCut] + list(crossings) + [lastCut]
+
+    rings = []
+    for (parallelA, outsideA), (parallelB, outsideB) in zip(cuts[:-1], cuts[1:]):
+        if parallelB[0] <= parallelA[0] or outsideB[0] <= outsideA[0]:
+            return None
+
+        ring = [(parallelA[1], parallelA[2])]
+        ring.extend(
+            (parallelXs[vertexNr], parallelYs[vertexNr])
+            for vertexNr in range(parallelA[0][0] + 1, nrParallel)
+            if (vertexNr, 0.0) < parallelB[0]
+        )
+        ring.append((parallelB[1], parallelB[2]))
+        ring.append((outsideB[1], outsideB[2]))
+        ring.extend(
+            (outsideXs[vertexNr], outsideYs[vertexNr])
+            for vertexNr in reversed(range(outsideA[0][0] + 1, nrOutside))
+            if (vertexNr, 0.0) < outsideB[0]
+        )
+        ring.append((outsideA[1], outsideA[2]))
+        ring.append(ring[0])
+        rings.append(ring)
+
+    return rings
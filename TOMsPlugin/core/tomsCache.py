@@ -0,0 +1,176 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import os
+import threading
+from collections import OrderedDict
+
+from qgis.core import NULL, Qgis
+
+from .tomsMessageLog import TOMsMessageLog
+
+
+class TOMsCache:
+    """
+    Base class of the caches used by the expression functions: hit/miss statistics and
+    an environment variable (DISABLE_VARIABLE) to disable the cache for debugging.
+    """
+
+    DISABLE_VARIABLE = None
+
+    def __init__(self):
+        self.enabled = (
+            self.DISABLE_VARIABLE is None
+            or os.environ.get(self.DISABLE_VARIABLE) is None
+        )
+        self.resetStatistics()
+
+    def resetStatistics(self):
+        # (approximate when rendering in parallel)
+        self.hits = 0
+        self.misses = 0
+
+    def statistics(self):
+        requests = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / requests if requests else 0.0,
+        }
+
+    def logStatistics(self):
+        TOMsMessageLog.logMessage(
+            "{} statistics: {}".format(type(self).__name__, self.statistics()),
+            level=Qgis.Info,
+        )
+
+
+class TOMsLruCache(TOMsCache):
+    """
+    Bounded LRU cache, shared by the render threads.
+
+    The size is DEFAULT_MAX_SIZE, or the environment variable SIZE_VARIABLE if set.
+    Subclasses build the keys. With KEYED_ON_GEOMETRY_ID, the first element of each key
+    is the GeometryID of a feature, and the entries of an edited feature can be removed
+    with invalidate.
+    """
+
+    DEFAULT_MAX_SIZE = 10000
+    SIZE_VARIABLE = None
+    KEYED_ON_GEOMETRY_ID = False
+
+    def __init__(self):
+        TOMsCache.__init__(self)
+
+        self.maxSize = self.DEFAULT_MAX_SIZE
+        if self.SIZE_VARIABLE is not None:
+            try:
+                self.maxSize = int(
+                    os.environ.get(self.SIZE_VARIABLE, self.DEFAULT_MAX_SIZE)
+                )
+            except ValueError:
+                pass
+
+        # expression functions are evaluated from the render threads
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()
+        self.keysByGeometryID = {}
+
+    def resetStatistics(self):
+        TOMsCache.resetStatistics(self)
+        self.evictions = 0
+        self.invalidations = 0
+
+    def setEnabled(self, value):
+        TOMsMessageLog.logMessage(
+            "In {}.setEnabled: {}".format(type(self).__name__, value), level=Qgis.Info
+        )
+        self.enabled = bool(value)
+        if not self.enabled:
+            self.clear()
+
+    def setMaxSize(self, value):
+        with self.lock:
+            self.maxSize = max(int(value), 0)
+            self.evict()
+
+    def get(self, key, isValid=None):
+        """
+        Returns the value stored under key (and marks it as recently used), or None if
+        there is none or isValid(value) is False
+        """
+
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None or (isValid is not None and not isValid(value)):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if self.KEYED_ON_GEOMETRY_ID:
+                self.keysByGeometryID.setdefault(key[0], set()).add(key)
+            self.evict()
+
+    def evict(self):
+        while len(self.entries) > self.maxSize:
+            key, _ = self.entries.popitem(last=False)
+            keys = self.keysByGeometryID.get(key[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keysByGeometryID[key[0]]
+            self.evictions += 1
+
+    def invalidate(self, geometryID):
+        """Removes all the entries for the given GeometryID"""
+
+        if geometryID == NULL:
+            return
+
+        with self.lock:
+            keys = self.keysByGeometryID.pop(str(geometryID), set())
+            for key in keys:
+                self.entries.pop(key, None)
+            self.invalidations += len(keys)
+
+        if keys:
+            TOMsMessageLog.logMessage(
+                "In {}.invalidate: {} ({} entries)".format(
+                    type(self).__name__, geometryID, len(keys)
+                ),
+                level=TOMsMessageLog.DEBUG,
+            )
+
+    def clear(self):
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.keysByGeometryID.clear()
+
+    def statistics(self):
+        with self.lock:
+            statistics = TOMsCache.statistics(self)
+            statistics.update(
+                {
+                    "size": len(self.entries),
+                    "maxSize": self.maxSize,
+                    "evictions": self.evictions,
+                    "invalidations": self.invalidations,
+                }
+            )
+            return statistics
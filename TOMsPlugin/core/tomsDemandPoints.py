@@ -0,0 +1,257 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import math
+import random
+import zlib
+
+from qgis.core import (
+    NULL,
+    Qgis,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProject,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from ..constants import singleton
+from .tomsCache import TOMsLruCache
+from .tomsGeometryCache import TOMsGeometryCache
+from .tomsGeometryElement import ElementGeometryFactory
+from .tomsMessageLog import TOMsMessageLog
+from .tomsSettings import TOMsSettingsManager
+
+
+def demandSeed(geometryID):
+    """Seed for the bays of a restriction - the same whatever the order of rendering"""
+    return zlib.crc32(str(geometryID).encode("utf-8"))
+
+
+def selectEmptyBays(geometryID, capacity, nrSpaces, geomShapeID):
+    """Returns the numbers of the bays (parts of the display geometry) without demand"""
+
+    rng = random.Random(demandSeed(geometryID))
+    emptyBays = rng.sample(range(capacity), k=nrSpaces)
+
+    # deal with split geometries - half on/half off
+    if geomShapeID == 22:
+        emptyBays.extend(range(capacity, capacity * 2))
+
+    return emptyBays
+
+
+def calculateDemandPoints(feature):
+    """Returns the multipoint with the centre of each occupied bay, or None"""
+
+    demand = math.ceil(float(feature.attribute("Demand")))
+    if demand == 0:
+        return None
+
+    capacity = int(feature.attribute("NrBays"))
+    nrSpaces = max(capacity - demand, 0)
+
+    TOMsMessageLog.logMessage(
+        "calculateDemandPoints: capacity: {}; nrSpaces: {}; demand: {}".format(
+            capacity, nrSpaces, demand
+        ),
+        level=TOMsMessageLog.DEBUG,
+    )
+
+    geomShowingSpaces = ElementGeometryFactory.getElementGeometry(feature)
+    if geomShowingSpaces is None:
+        return None
+
+    emptyBays = set(
+        selectEmptyBays(
+            feature.attribute("GeometryID"),
+            capacity,
+            nrSpaces,
+            feature.attribute("GeomShapeID"),
+        )
+    )
+
+    centroids = [
+        QgsPointXY(polygonGeom.centroid())
+        for counter, polygonGeom in enumerate(geomShowingSpaces.parts())
+        if counter not in emptyBays
+    ]
+
+    return QgsGeometry.fromMultiPointXY(centroids)
+
+
+@singleton
+class TOMsDemandPointCache(TOMsLruCache):
+    """
+    Demand points (one point for each occupied bay) for the restrictions of a survey
+    layer.
+
+    Points are kept for each GeometryID together with the inputs they were computed
+    from (Demand, NrBays, the other shape attributes, the kerb geometry and the
+    settings), so only the restrictions whose inputs have changed are computed again.
+    Restrictions without a GeometryID are not cached.
+
+    The points can be computed for a whole survey layer in one pass (updateLayer) and
+    written to a memory point layer (demandLayer); the generateDemandPoints expression
+    reads from the same cache. The point layers are dropped (and removed from the
+    project) with their survey layer, and when the project is cleared.
+
+    The cache holds DEFAULT_MAX_SIZE restrictions, or the environment variable
+    TOMs_DEMAND_CACHE_SIZE, and can be disabled for debugging by setting the
+    environment variable TOMs_DISABLE_DEMAND_CACHE.
+    """
+
+    DISABLE_VARIABLE = "TOMs_DISABLE_DEMAND_CACHE"
+    SIZE_VARIABLE = "TOMs_DEMAND_CACHE_SIZE"
+    DEFAULT_MAX_SIZE = 20000
+    KEYED_ON_GEOMETRY_ID = True
+
+    INPUT_ATTRIBUTES = ["Demand"] + TOMsGeometryCache.FINGERPRINT_ATTRIBUTES
+
+    def __init__(self):
+        TOMsLruCache.__init__(self)
+
+        self.demandLayers = {}  # {surveyLayerID: (demandLayerID, demandLayer)}
+
+        QgsProject.instance().layersRemoved.connect(self.removeLayers)
+        QgsProject.instance().cleared.connect(self.clear)
+        QgsProject.instance().cleared.connect(self.demandLayers.clear)
+
+    @staticmethod
+    def inputsKey(feature):
+        values = []
+        for attributeName in TOMsDemandPointCache.INPUT_ATTRIBUTES:
+            try:
+                value = feature.attribute(attributeName)
+            except KeyError:
+                value = None
+            values.append(None if value == NULL else str(value))
+
+        geom = feature.geometry()
+        return (
+            tuple(values),
+            bytes(geom.asWkb()) if geom else b"",
+            TOMsSettingsManager().settings(),
+        )
+
+    def getDemandPoints(self, feature):
+        """Returns the demand points for feature, computing them only if needed"""
+
+        demandPoints, _ = self.lookUpDemandPoints(feature)
+        return demandPoints
+
+    def lookUpDemandPoints(self, feature):
+        """Returns (demand points, whether they have been computed) for feature"""
+
+        geometryID = feature.attribute("GeometryID")
+        if not self.enabled or geometryID is None or geometryID == NULL:
+            return calculateDemandPoints(feature), True
+
+        key = (str(geometryID),)
+        inputsKey = self.inputsKey(feature)
+
+        entry = self.get(key, lambda entry: entry[0] == inputsKey)
+        if entry is not None:
+            return entry[1], False
+
+        demandPoints = calculateDemandPoints(feature)
+        self.put(key, (inputsKey, demandPoints))
+
+        return demandPoints, True
+
+    def updateLayer(self, surveyLayer):
+        """
+        Brings the demand points of all the restrictions of surveyLayer up to date, in
+        one pass. Returns a list of (GeometryID, demand points).
+        """
+
+        nrComputed = 0
+        demandPoints = []
+
+        for feature in surveyLayer.getFeatures():
+            geometryID = feature.attribute("GeometryID")
+            try:
+                points, computed = self.lookUpDemandPoints(feature)
+            except Exception as e:
+                TOMsMessageLog.logMessage(
+                    "In TOMsDemandPointCache.updateLayer: error for {}: {}".format(
+                        geometryID, e
+                    ),
+                    level=Qgis.Warning,
+                )
+                continue
+            if computed:
+                nrComputed = nrComputed + 1
+            demandPoints.append((geometryID, points))
+
+        TOMsMessageLog.logMessage(
+            "In TOMsDemandPointCache.updateLayer: {}. {} of {} computed".format(
+                surveyLayer.name(), nrComputed, len(demandPoints)
+            ),
+            level=Qgis.Info,
+        )
+
+        return demandPoints
+
+    def demandLayer(self, surveyLayer):
+        """
+        Returns a memory layer with the demand points of surveyLayer (a point for each
+        occupied bay, with its GeometryID), after bringing the cache up to date. The
+        same layer is returned (and refilled) on each call for a survey layer.
+        """
+
+        demandPoints = self.updateLayer(surveyLayer)
+
+        _, layer = self.demandLayers.get(surveyLayer.id(), (None, None))
+        if layer is None:
+            layer = QgsVectorLayer(
+                "Point?crs={}".format(surveyLayer.crs().authid()),
+                "{}_DemandPoints".format(surveyLayer.name()),
+                "memory",
+            )
+            layer.dataProvider().addAttributes(
+                [QgsField("GeometryID", QVariant.String)]
+            )
+            layer.updateFields()
+            self.demandLayers[surveyLayer.id()] = (layer.id(), layer)
+
+        features = []
+        for geometryID, points in demandPoints:
+            if points is None:
+                continue
+            for point in points.asMultiPoint():
+                feature = QgsFeature(layer.fields())
+                feature.setGeometry(QgsGeometry.fromPointXY(point))
+                feature.setAttributes([geometryID])
+                features.append(feature)
+
+        provider = layer.dataProvider()
+        provider.truncate()
+        provider.addFeatures(features)
+        layer.updateExtents()
+        layer.triggerRepaint()
+
+        return layer
+
+    def removeLayers(self, layerIDs):
+        """Drops the point layers that were removed, or whose survey layer was"""
+
+        project = QgsProject.instance()
+        for surveyLayerID, (demandLayerID, _) in list(self.demandLayers.items()):
+            if demandLayerID in layerIDs:
+                # deleted by the project
+                del self.demandLayers[surveyLayerID]
+            elif surveyLayerID in layerIDs:
+                del self.demandLayers[surveyLayerID]
+                if project.mapLayer(demandLayerID) is not None:
+                    project.removeMapLayer(demandLayerID)
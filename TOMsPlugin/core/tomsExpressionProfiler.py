@@ -0,0 +1,300 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import csv
+import datetime
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from qgis.core import Qgis
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+
+from ..constants import singleton
+from .tomsGeometryCache import TOMsGeometryCache
+from .tomsLabelCache import TOMsLabelCache
+from .tomsMessageLog import TOMsMessageLog
+from .tomsSignCache import TOMsSignCache
+
+# the cache used by each expression function, for the hit rates of the report
+CACHES_BY_FUNCTION = {
+    "generateDisplayGeometry": ("TOMsGeometryCache", TOMsGeometryCache),
+    "generateCrossoverGeometry": ("TOMsGeometryCache", TOMsGeometryCache),
+    "generateZigZag": ("TOMsGeometryCache", TOMsGeometryCache),
+    "getLabelLeaders": ("TOMsLabelCache", TOMsLabelCache),
+    "getBayLabelLeader": ("TOMsLabelCache", TOMsLabelCache),
+    "getWaitingRestrictionLabelText": ("TOMsLabelCache", TOMsLabelCache),
+    "getLoadingRestrictionLabelText": ("TOMsLabelCache", TOMsLabelCache),
+    "getBayTimePeriodLabelText": ("TOMsLabelCache", TOMsLabelCache),
+    "getBayMaxStayLabelText": ("TOMsLabelCache", TOMsLabelCache),
+    "getBayNoReturnLabelText": ("TOMsLabelCache", TOMsLabelCache),
+    "getBayLabelText": ("TOMsLabelCache", TOMsLabelCache),
+    "prepareSignLine": ("TOMsSignCache", TOMsSignCache),
+    "prepareSignIconLocation": ("TOMsSignCache", TOMsSignCache),
+    "prepareSignIcon": ("TOMsSignCache", TOMsSignCache),
+    "prepareSignOrientation": ("TOMsSignCache", TOMsSignCache),
+}
+
+REPORT_FIELDS = [
+    "function",
+    "calls",
+    "totalMs",
+    "meanMs",
+    "p95Ms",
+    "maxMs",
+    "cache",
+    "cacheHitRate",
+]
+
+
+def percentile(values, fraction):
+    """Returns the value below which fraction of values lie (nearest rank)"""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(math.ceil(fraction * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+class TOMsFunctionTimings:
+    """Timings of one expression function"""
+
+    def __init__(self, maxSamples):
+        self.calls = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        # the most recent durations, for the percentiles
+        self.samples = deque(maxlen=maxSamples)
+
+    def add(self, duration):
+        self.calls += 1
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+        self.samples.append(duration)
+
+
+@singleton
+class TOMsExpressionProfiler(QObject):
+    """
+    Opt-in timings of the TOMs expression functions: calls, total, mean, p95 and
+    maximum time for each function, with the hit rate of the cache it uses.
+
+    When the profiler is enabled, the Python function of each registered
+    QgsExpressionFunction is replaced by a timing wrapper; when it is disabled, the
+    original functions are put back, so there is no cost at all when profiling is off.
+
+    The report can be written to CSV or JSON (dump). If a dump directory is set, a
+    report is written at the end of each canvas render and atlas export (endRender).
+    Profiling can be enabled at start up by setting the environment variable
+    TOMs_PROFILE_EXPRESSIONS, and the dump directory with TOMs_PROFILE_DIR.
+    """
+
+    MAX_SAMPLES = 100000
+
+    profileChanged = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.enabled = False
+        self.dumpDirectory = os.environ.get("TOMs_PROFILE_DIR")
+
+        # expression functions are evaluated from the render threads
+        self.lock = threading.Lock()
+        self.functions = []
+        self.originalFunctions = {}
+        self.timings = {}
+        self.cacheBaselines = {}
+
+    def install(self, functions):
+        """Sets the expression functions to profile (see TOMsExpressions.functions)"""
+
+        wasEnabled = self.enabled
+        self.setEnabled(False)
+        self.functions = [func for func in functions if hasattr(func, "function")]
+
+        if len(self.functions) != len(functions):
+            TOMsMessageLog.logMessage(
+                "In TOMsExpressionProfiler.install: {} functions not profiled".format(
+                    len(functions) - len(self.functions)
+                ),
+                level=Qgis.Warning,
+            )
+
+        self.setEnabled(
+            wasEnabled or os.environ.get("TOMs_PROFILE_EXPRESSIONS") is not None
+        )
+
+    def uninstall(self):
+        self.setEnabled(False)
+        self.functions = []
+
+    def setEnabled(self, value):
+        value = bool(value)
+        if value == self.enabled:
+            return
+
+        TOMsMessageLog.logMessage(
+            "In TOMsExpressionProfiler.setEnabled: {}".format(value), level=Qgis.Info
+        )
+
+        if value:
+            self.reset()
+            for func in self.functions:
+                self.originalFunctions[func.name()] = func.function
+                func.function = self.timedFunction(func.name(), func.function)
+        else:
+            for func in self.functions:
+                original = self.originalFunctions.pop(func.name(), None)
+                if original is not None:
+                    func.function = original
+
+        self.enabled = value
+        self.profileChanged.emit()
+
+    def timedFunction(self, name, function):
+        """Returns function, recording the time of each call under name"""
+
+        record = self.record
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        # qgsfunction inspects the arguments of the function (feature, parent, context)
+        timed.__signature__ = inspect.signature(function)
+        timed.__name__ = function.__name__
+        timed.__doc__ = function.__doc__
+        return timed
+
+    def record(self, name, duration):
+        with self.lock:
+            timings = self.timings.get(name)
+            if timings is None:
+                timings = self.timings[name] = TOMsFunctionTimings(self.MAX_SAMPLES)
+            timings.add(duration)
+
+    def reset(self):
+        with self.lock:
+            self.timings = {}
+
+        # cache hit rates are reported from here
+        self.cacheBaselines = {}
+        for cacheName, cacheClass in set(CACHES_BY_FUNCTION.values()):
+            statistics = cacheClass().statistics()
+            self.cacheBaselines[cacheName] = (statistics["hits"], statistics["misses"])
+
+        self.profileChanged.emit()
+
+    def cacheHitRate(self, cacheName, cacheClass):
+        statistics = cacheClass().statistics()
+        baseHits, baseMisses = self.cacheBaselines.get(cacheName, (0, 0))
+        if statistics["hits"] < baseHits or statistics["misses"] < baseMisses:
+            # the statistics of the cache have been reset since
+            baseHits, baseMisses = 0, 0
+        hits = statistics["hits"] - baseHits
+        requests = hits + statistics["misses"] - baseMisses
+        return hits / requests if requests > 0 else None
+
+    def report(self):
+        """Returns one dictionary (see REPORT_FIELDS) per function, slowest first"""
+
+        with self.lock:
+            timings = [
+                (name, entry.calls, entry.total, entry.maximum, list(entry.samples))
+                for name, entry in self.timings.items()
+            ]
+
+        rows = []
+        for name, calls, total, maximum, samples in timings:
+            cacheName, hitRate = None, None
+            if name in CACHES_BY_FUNCTION:
+                cacheName, cacheClass = CACHES_BY_FUNCTION[name]
+                hitRate = self.cacheHitRate(cacheName, cacheClass)
+
+            rows.append(
+                {
+                    "function": name,
+                    "calls": calls,
+                    "totalMs": total * 1000.0,
+                    "meanMs": total * 1000.0 / calls if calls else 0.0,
+                    "p95Ms": percentile(samples, 0.95) * 1000.0,
+                    "maxMs": maximum * 1000.0,
+                    "cache": cacheName,
+                    "cacheHitRate": hitRate,
+                }
+            )
+
+        rows.sort(key=lambda row: row["totalMs"], reverse=True)
+        return rows
+
+    def dump(self, fileName):
+        """Writes the report to fileName, as JSON if it ends with .json, else as CSV"""
+
+        rows = self.report()
+
+        if fileName.lower().endswith(".json"):
+            with open(fileName, "w", encoding="utf-8") as dumpFile:
+                json.dump(
+                    {
+                        "created": datetime.datetime.now().isoformat(),
+                        "functions": rows,
+                    },
+                    dumpFile,
+                    indent=2,
+                )
+        else:
+            with open(fileName, "w", encoding="utf-8", newline="") as dumpFile:
+                writer = csv.DictWriter(dumpFile, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+
+        TOMsMessageLog.logMessage(
+            "In TOMsExpressionProfiler.dump: {}".format(fileName), level=Qgis.Info
+        )
+
+    def endRender(self, label="canvas"):
+        """Called at the end of a render or atlas export. Returns the files written."""
+
+        if not self.enabled:
+            return []
+
+        self.profileChanged.emit()
+
+        if not self.dumpDirectory:
+            return []
+
+        baseName = os.path.join(
+            self.dumpDirectory,
+            "expressionProfile_{}_{}".format(
+                label, datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            ),
+        )
+        fileNames = [baseName + ".csv", baseName + ".json"]
+        try:
+            for fileName in fileNames:
+                self.dump(fileName)
+        except OSError as e:
+            TOMsMessageLog.logMessage(
+                "In TOMsExpressionProfiler.endRender: error {}".format(e),
+                level=Qgis.Warning,
+            )
+            return []
+
+        return fileNames
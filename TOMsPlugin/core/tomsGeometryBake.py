@@ -0,0 +1,260 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+"""
+Offline bake of the display geometries of restriction layers.
+
+The display geometries (bays, lines, zig-zags, ...) generated by ElementGeometryFactory
+are written with the GeometryID, the source layer and a fingerprint of their inputs to a
+side table - a GeoPackage layer or any writable layer (e.g., a PostGIS table) - which
+QGIS Server or the print layouts can then use (joined on GeometryID) rather than
+generating the geometries again. A bake only generates the rows whose fingerprint has
+changed, and removes the rows of restrictions which no longer exist.
+
+From the command line:
+
+    python -m TOMsPlugin.core.tomsGeometryBake project.qgs out.gpkg --layers Bays Lines
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+from qgis.core import (
+    Qgis,
+    QgsFeature,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsProject,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+    QgsWkbTypes,
+)
+from qgis.PyQt.QtCore import QDateTime, QVariant
+
+from ..constants import RestrictionGeometryTypes
+from .tomsGeometryCache import TOMsGeometryCache
+from .tomsGeometryElement import ElementGeometryFactory
+from .tomsMessageLog import TOMsMessageLog
+from .tomsSettings import TOMsSettingsManager
+
+BAKE_LAYER_NAME = "DisplayGeometries"
+DEFAULT_LAYERS = ["Bays", "Lines"]
+
+
+def bakeFields():
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("SourceLayer", QVariant.String))
+    fields.append(QgsField("GeomShapeID", QVariant.Int))
+    fields.append(QgsField("Fingerprint", QVariant.String))
+    fields.append(QgsField("BakeDate", QVariant.DateTime))
+    return fields
+
+
+def bakeFingerprint(feature, restGeomType):
+    """
+    Persistent version of TOMsGeometryCache.fingerprint: a digest of the kerb geometry,
+    the shape attributes and TOMsGeometrySettings
+    """
+
+    geometryID, shapeValue, geomWkb, attributes, settings = (
+        TOMsGeometryCache.fingerprint(feature, restGeomType)
+    )
+
+    digest = hashlib.sha1()
+    digest.update(repr((geometryID, shapeValue, attributes, settings)).encode("utf-8"))
+    digest.update(geomWkb)
+    return digest.hexdigest()
+
+
+def openBakeLayer(fileName, crs, layerName=BAKE_LAYER_NAME):
+    """Returns the bake layer of a GeoPackage, creating the file or layer if needed"""
+
+    uri = "{}|layername={}".format(fileName, layerName)
+    if os.path.exists(fileName):
+        outputLayer = QgsVectorLayer(uri, layerName, "ogr")
+        if outputLayer.isValid():
+            return outputLayer
+
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = "GPKG"
+    options.layerName = layerName
+    options.actionOnExistingFile = (
+        QgsVectorFileWriter.CreateOrOverwriteLayer
+        if os.path.exists(fileName)
+        else QgsVectorFileWriter.CreateOrOverwriteFile
+    )
+
+    writer = QgsVectorFileWriter.create(
+        fileName,
+        bakeFields(),
+        QgsWkbTypes.Unknown,  # lines and polygons
+        crs,
+        QgsProject.instance().transformContext(),
+        options,
+    )
+    if writer.hasError() != QgsVectorFileWriter.NoError:
+        raise OSError(
+            "Unable to create {}: {}".format(fileName, writer.errorMessage())
+        )
+    del writer  # closes the file
+
+    return QgsVectorLayer(uri, layerName, "ogr")
+
+
+def bakeLayer(sourceLayer, outputLayer):
+    """
+    Bakes the display geometries of sourceLayer into outputLayer (see bakeFields). Only
+    the restrictions whose fingerprint has changed are generated. Returns statistics.
+    """
+
+    fields = outputLayer.fields()
+    idxFingerprint = fields.indexFromName("Fingerprint")
+    idxGeomShapeID = fields.indexFromName("GeomShapeID")
+    idxBakeDate = fields.indexFromName("BakeDate")
+    sourceName = sourceLayer.name()
+
+    # rows already baked for this layer
+    bakedRows = {}
+    for row in outputLayer.getFeatures():
+        if row["SourceLayer"] == sourceName:
+            bakedRows[row["GeometryID"]] = (row.id(), row["Fingerprint"])
+
+    statistics = {"features": 0, "generated": 0, "unchanged": 0, "failed": 0}
+    bakeDate = QDateTime.currentDateTime()
+    newRows = []
+    changedAttributes = {}
+    changedGeometries = {}
+    geometryIDs = set()
+
+    for feature in sourceLayer.getFeatures():
+        statistics["features"] += 1
+        geometryID = feature["GeometryID"]
+        geometryIDs.add(geometryID)
+
+        try:
+            restGeomType = RestrictionGeometryTypes(feature["GeomShapeID"])
+            fingerprint = bakeFingerprint(feature, restGeomType)
+
+            fid, bakedFingerprint = bakedRows.get(geometryID, (None, None))
+            if bakedFingerprint == fingerprint:
+                statistics["unchanged"] += 1
+                continue
+
+            displayGeometry = ElementGeometryFactory.generateElementGeometry(
+                feature, restGeomType
+            )
+        except Exception as e:
+            TOMsMessageLog.logMessage(
+                "In bakeLayer: {} {}: {}".format(sourceName, geometryID, e),
+                level=Qgis.Warning,
+            )
+            statistics["failed"] += 1
+            continue
+
+        statistics["generated"] += 1
+
+        if fid is None:
+            newRow = QgsFeature(fields)
+            newRow.setAttributes(
+                [geometryID, sourceName, restGeomType.value, fingerprint, bakeDate]
+            )
+            if displayGeometry is not None:
+                newRow.setGeometry(displayGeometry)
+            newRows.append(newRow)
+        else:
+            changedAttributes[fid] = {
+                idxGeomShapeID: restGeomType.value,
+                idxFingerprint: fingerprint,
+                idxBakeDate: bakeDate,
+            }
+            changedGeometries[fid] = (
+                displayGeometry if displayGeometry is not None else QgsGeometry()
+            )
+
+    deletedFids = [
+        fid
+        for geometryID, (fid, _) in bakedRows.items()
+        if geometryID not in geometryIDs
+    ]
+    statistics["deleted"] = len(deletedFids)
+
+    provider = outputLayer.dataProvider()
+    if changedAttributes:
+        provider.changeAttributeValues(changedAttributes)
+        provider.changeGeometryValues(changedGeometries)
+    if newRows:
+        provider.addFeatures(newRows)
+    if deletedFids:
+        provider.deleteFeatures(deletedFids)
+
+    TOMsMessageLog.logMessage(
+        "In bakeLayer: {}: {}".format(sourceName, statistics), level=Qgis.Info
+    )
+
+    return statistics
+
+
+def bakeProjectLayers(fileName, layerNames=None):
+    """Bakes the restriction layers of the current project into a GeoPackage"""
+
+    project = QgsProject.instance()
+    TOMsSettingsManager().refresh()
+
+    results = {}
+    bakeOutput = None
+    for layerName in layerNames or DEFAULT_LAYERS:
+        layers = project.mapLayersByName(layerName)
+        if not layers:
+            TOMsMessageLog.logMessage(
+                "In bakeProjectLayers: {} not found".format(layerName),
+                level=Qgis.Warning,
+            )
+            continue
+        if bakeOutput is None:
+            bakeOutput = openBakeLayer(fileName, layers[0].crs())
+        results[layerName] = bakeLayer(layers[0], bakeOutput)
+
+    return results
+
+
+def main(argv=None):
+    from qgis.core import QgsApplication  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(
+        description="Bake the TOMs display geometries into a GeoPackage"
+    )
+    parser.add_argument("project", help="QGIS project with the restriction layers")
+    parser.add_argument("output", help="GeoPackage to create or update")
+    parser.add_argument("--layers", nargs="+", default=DEFAULT_LAYERS)
+    args = parser.parse_args(argv)
+
+    app = QgsApplication([], False)
+    app.initQgis()
+    try:
+        if not QgsProject.instance().read(args.project):
+            print("Unable to read {}".format(args.project), file=sys.stderr)
+            return 1
+        for layerName, statistics in bakeProjectLayers(
+            args.output, args.layers
+        ).items():
+            print("{}: {}".format(layerName, statistics))
+    finally:
+        app.exitQgis()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
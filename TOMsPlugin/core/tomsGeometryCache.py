@@ -0,0 +1,97 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import NULL, QgsGeometry
+
+from ..constants import singleton
+from .tomsCache import TOMsLruCache
+from .tomsSettings import TOMsSettingsManager
+
+
+@singleton
+class TOMsGeometryCache(TOMsLruCache):
+    """
+    Bounded LRU cache for the display geometries generated by ElementGeometryFactory.
+
+    Entries are keyed on a fingerprint of everything the generators read (kerb geometry,
+    shape attributes and TOMsGeometrySettings), so a changed feature simply misses. Features
+    edited through TOMsTransaction are also removed explicitly (see invalidate).
+
+    The cache can be disabled for debugging by setting the environment variable
+    TOMs_DISABLE_GEOMETRY_CACHE, or with setEnabled(False). Its size can be set with
+    TOMs_GEOMETRY_CACHE_SIZE.
+    """
+
+    DISABLE_VARIABLE = "TOMs_DISABLE_GEOMETRY_CACHE"
+    SIZE_VARIABLE = "TOMs_GEOMETRY_CACHE_SIZE"
+    DEFAULT_MAX_SIZE = 100000
+    KEYED_ON_GEOMETRY_ID = True
+
+    # feature attributes read by TOMsGeometryElement
+    FINGERPRINT_ATTRIBUTES = [
+        "GeomShapeID",
+        "AzimuthToRoadCentreLine",
+        "NrBays",
+        "BayOrientation",
+        "BayWidth",
+    ]
+
+    @staticmethod
+    def attributeValue(feature, attributeName):
+        try:
+            value = feature.attribute(attributeName)
+        except KeyError:
+            return None
+        if value == NULL:
+            return None
+        return str(value)
+
+    @staticmethod
+    def fingerprint(feature, restGeomType):
+        """Returns the key used to store the display geometry of feature"""
+
+        geometryID = TOMsGeometryCache.attributeValue(feature, "GeometryID")
+        geom = feature.geometry()
+        geomWkb = bytes(geom.asWkb()) if geom else b""
+
+        return (
+            geometryID,
+            restGeomType.value,
+            geomWkb,
+            tuple(
+                TOMsGeometryCache.attributeValue(feature, attributeName)
+                for attributeName in TOMsGeometryCache.FINGERPRINT_ATTRIBUTES
+            ),
+            TOMsSettingsManager().settings(),
+        )
+
+    def getElementGeometry(self, feature, restGeomType, generator, simplified=False):
+        """
+        Returns the display geometry for feature, calling generator() only if it is
+        not already in the cache. The simplified variants (for small scales) are held
+        separately from the full ones.
+        """
+
+        if not self.enabled or self.maxSize == 0:
+            return generator()
+
+        key = self.fingerprint(feature, restGeomType) + (simplified,)
+
+        cachedGeom = self.get(key)
+        if cachedGeom is not None:
+            return QgsGeometry(cachedGeom)
+
+        res = generator()
+        if res is not None:
+            self.put(key, QgsGeometry(res))
+
+        return res
+
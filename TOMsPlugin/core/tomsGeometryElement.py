@@ -15,6 +15,7 @@ from qgis.core import (
     NULL,
     Qgis,
     QgsGeometry,
+    QgsLineString,
     QgsPointXY,
     QgsWkbTypes,
 )
@@ -22,12 +23,27 @@ from qgis.PyQt.QtCore import QObject
 
 from ..constants import RestrictionGeometryTypes
 from ..generateGeometryUtils import GenerateGeometryUtils
-from ..restrictionTypeUtilsClass import TOMsConfigFile, TOMsParams
+from .tomsBayDividers import (
+    bayRings,
+    dividerEnd,
+    edgeCrossing,
+    edgeSegments,
+    extendSegment,
+)
+from .tomsGeometryCache import TOMsGeometryCache
+from .tomsLineWalker import TOMsLineWalker
 from .tomsMessageLog import TOMsMessageLog
+from .tomsOffsetCurve import OffsetCurveGenerator, ShapeEngine
+from .tomsSelfIntersections import resolveSelfIntersections
+from .tomsSettings import TOMsSettingsManager
 
 
 class TOMsGeometryElement(QObject):
-    def __init__(self, currFeature):
+
+    # engine used by getShape (see tomsOffsetCurve)
+    shapeEngine = ShapeEngine.default()
+
+    def __init__(self, currFeature, simplified=False):
         super().__init__()
 
         TOMsMessageLog.logMessage(
@@ -35,17 +51,16 @@ class TOMsGeometryElement(QObject):
             level=TOMsMessageLog.DEBUG,
         )
 
-        params = TOMsParams()
-        params.getParams()
+        self.settings = TOMsSettingsManager().settings()
 
-        self.configFileObject = TOMsConfigFile()
-        self.configFileObject.initialiseTOMsConfigFile()
         self.currFeature = currFeature
-        self.bayWidth = float(params.setParam("BayWidth"))
-        self.bayLength = float(params.setParam("BayLength"))
-        self.bayOffsetFromKerb = float(params.setParam("BayOffsetFromKerb"))
-        self.lineOffsetFromKerb = float(params.setParam("LineOffsetFromKerb"))
-        self.crossoverShapeWidth = float(params.setParam("CrossoverShapeWidth"))
+        # simplified variant, for small scales (see ElementGeometryFactory.isSimplified)
+        self.simplified = simplified
+        self.bayWidth = self.settings.bayWidth
+        self.bayLength = self.settings.bayLength
+        self.bayOffsetFromKerb = self.settings.bayOffsetFromKerb
+        self.lineOffsetFromKerb = self.settings.lineOffsetFromKerb
+        self.crossoverShapeWidth = self.settings.crossoverShapeWidth
 
         self.currRestGeomType = currFeature.attribute("GeomShapeID")
 
@@ -68,7 +83,7 @@ class TOMsGeometryElement(QObject):
 
             # TODO: Include configuration item - ShowBayDivisions
 
-            if not self.getShowBayDivisions():
+            if self.simplified or not self.getShowBayDivisions():
                 self.nrBays = -1
             else:
                 try:
@@ -121,12 +136,7 @@ class TOMsGeometryElement(QObject):
         """This is the final shape - uses functions below. It really is abstract"""
 
     def getShowBayDivisions(self):
-        value = self.configFileObject.getTOMsConfigElement(
-            "TOMsLayers", "ShowBayDivisions"
-        )
-        if value == "True":
-            return True
-        return False
+        return self.settings.showBayDivisions
 
     def generatePolygon(self, listGeometryPairs):
         # ... and combine the two paired geometries. NB: May be more than one pair
@@ -140,14 +150,17 @@ class TOMsGeometryElement(QObject):
 
         for (shape, line) in listGeometryPairs:
 
-            TOMsMessageLog.logMessage(
-                "In generatePolygon:  shape ********: " + shape.asWkt(),
-                level=TOMsMessageLog.DEBUG,
-            )
-            TOMsMessageLog.logMessage(
-                "In generatePolygon:  line ********: " + line.asWkt(),
-                level=TOMsMessageLog.DEBUG,
-            )
+            if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+                TOMsMessageLog.logMessage(
+                    "In generatePolygon:  shape ********: %s",
+                    shape.asWkt(),
+                    level=TOMsMessageLog.DEBUG,
+                )
+                TOMsMessageLog.logMessage(
+                    "In generatePolygon:  line ********: %s",
+                    line.asWkt(),
+                    level=TOMsMessageLog.DEBUG,
+                )
 
             newGeometry = shape.combine(line)
             TOMsMessageLog.logMessage(
@@ -182,14 +195,13 @@ class TOMsGeometryElement(QObject):
             level=TOMsMessageLog.DEBUG,
         )
 
-        outputGeometry = listGeometries[0]
+        if len(listGeometries) == 1:
+            outputGeometry = QgsGeometry(listGeometries[0])
+        else:
+            # one union of all the lines, rather than one per geometry
+            outputGeometry = QgsGeometry.unaryUnion(listGeometries)
         outputGeometry.convertToMultiType()
 
-        for i in range(1, len(listGeometries)):
-
-            listGeometries[i].convertToMultiType()
-            outputGeometry = outputGeometry.combine(listGeometries[i])
-
         return outputGeometry
 
     def getLine(self, azimuthToCentreLine=None):
@@ -238,6 +250,45 @@ class TOMsGeometryElement(QObject):
         if len(line) == 0:
             return 0
 
+        if self.shapeEngine == ShapeEngine.NUMPY and len(line) > 1:
+            newLine, parallelLine = OffsetCurveGenerator.generateShapeLines(
+                line, restGeomType, orientation, azimuthToCentreLine, shpExtent, offset
+            )
+        else:
+            ptsList, parallelPtsList = self.getShapePoints(
+                line, shpExtent, azimuthToCentreLine, offset
+            )
+            newLine = QgsGeometry.fromPolylineXY(ptsList)
+            parallelLine = QgsGeometry.fromPolylineXY(parallelPtsList)
+
+        if not newLine.isSimple():
+            # https://gis.stackexchange.com/questions/353194/how-to-find-the-line-is-self-intersected-or-not-in-python-using-qgis
+            TOMsMessageLog.logMessage(
+                "In TOMsGeometryElement.getShape: newLine is self-intersecting for {}. Resolving ... ".format(
+                    self.currFeature.attribute("GeometryID")
+                ),
+                level=Qgis.Warning,
+            )
+            newLine = self.resolveSelfIntersections(newLine.asPolyline())
+
+        if not parallelLine.isSimple():
+            # https://gis.stackexchange.com/questions/353194/how-to-find-the-line-is-self-intersected-or-not-in-python-using-qgis
+            TOMsMessageLog.logMessage(
+                "In TOMsGeometryElement.getShape: parallelLine is self-intersecting for {}. Resolving ... ".format(
+                    self.currFeature.attribute("GeometryID")
+                ),
+                level=Qgis.Warning,
+            )
+            parallelLine = self.resolveSelfIntersections(parallelLine.asPolyline())
+
+        return newLine, parallelLine
+
+    def getShapePoints(self, line, shpExtent, azimuthToCentreLine, offset):
+        """Python engine for getShape - returns the shape and parallel points lists"""
+
+        restGeomType = self.currRestGeomType
+        orientation = self.currBayOrientation
+
         # Now have a valid set of points
 
         ptsList = []
@@ -352,29 +403,7 @@ class TOMsGeometryElement(QObject):
             )
         )
 
-        newLine = QgsGeometry.fromPolylineXY(ptsList)
-        if not newLine.isSimple():
-            # https://gis.stackexchange.com/questions/353194/how-to-find-the-line-is-self-intersected-or-not-in-python-using-qgis
-            TOMsMessageLog.logMessage(
-                "In TOMsGeometryElement.getShape: newLine is self-intersecting for {}. Resolving ... ".format(
-                    self.currFeature.attribute("GeometryID")
-                ),
-                level=Qgis.Warning,
-            )
-            newLine = self.resolveSelfIntersections(ptsList)
-
-        parallelLine = QgsGeometry.fromPolylineXY(parallelPtsList)
-        if not parallelLine.isSimple():
-            # https://gis.stackexchange.com/questions/353194/how-to-find-the-line-is-self-intersected-or-not-in-python-using-qgis
-            TOMsMessageLog.logMessage(
-                "In TOMsGeometryElement.getShape: parallelLine is self-intersecting for {}. Resolving ... ".format(
-                    self.currFeature.attribute("GeometryID")
-                ),
-                level=Qgis.Warning,
-            )
-            parallelLine = self.resolveSelfIntersections(parallelPtsList)
-
-        return newLine, parallelLine
+        return ptsList, parallelPtsList
 
     def isFloat(self, value):
         try:
@@ -391,85 +420,17 @@ class TOMsGeometryElement(QObject):
             add last intersection point to list and ignore all points from startVertex to here.
             new line is intersection point to end vertex of intersected line
         """
-        nrPts = len(ptsList)
-        # print("Nr pts: {}".format(nrPts))
         TOMsMessageLog.logMessage(
-            "In TOMsGeometryElement.resolveSelfIntersections: Nr pts: {}".format(nrPts),
+            "In TOMsGeometryElement.resolveSelfIntersections: Nr pts: %s",
+            len(ptsList),
             level=TOMsMessageLog.DEBUG,
         )
-        currStartVertexNr = 0
-        currLineStartVertex = ptsList[0]
-        newPtsList = []
 
-        newPtsList.append(QgsPointXY(currLineStartVertex))
-
-        while True:
-            currLine = QgsGeometry.fromPolylineXY(
-                [currLineStartVertex, ptsList[currStartVertexNr + 1]]
-            )
-            intersectLineStartVertexNr = -1
-
-            # print("Starting {} ... ".format(currStartVertexNr))
-            TOMsMessageLog.logMessage(
-                "In TOMsGeometryElement.resolveSelfIntersections: Starting {} ... ".format(
-                    currStartVertexNr
-                ),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            for testVertexNr in range(currStartVertexNr + 1, nrPts - 1):
-                #  print("StartPt {}: EndPt: {}".format(testVertexNr, testVertexNr + 1))
-                testLine = QgsGeometry.fromPolylineXY(
-                    [ptsList[testVertexNr], ptsList[testVertexNr + 1]]
-                )
-                intersectPt = currLine.intersection(testLine)
-                if intersectPt:
-                    # TODO: deal with situation where intersection is a line, i.e., colinear ...
-                    if intersectPt.type() == QgsWkbTypes.PointGeometry:
-                        intersectLineStartVertexNr = testVertexNr
-                        nextPt = intersectPt
-
-            # print("Finished line intersection check: {} ... ".format(intersectLineStartVertexNr))
-            TOMsMessageLog.logMessage(
-                "In TOMsGeometryElement.resolveSelfIntersections: Finished line intersection check: {} ... ".format(
-                    intersectLineStartVertexNr
-                ),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            if intersectLineStartVertexNr > 0:
-                # intersect was found
-                newPt = nextPt.asPoint()
-                newPtsList.append(newPt)
-                currLineStartVertex = newPt
-                currStartVertexNr = intersectLineStartVertexNr
-            else:
-                newPtsList.append(ptsList[currStartVertexNr + 1])
-                currStartVertexNr = currStartVertexNr + 1
-                currLineStartVertex = ptsList[currStartVertexNr]
-
-            # print("Added {} ...".format(currStartVertexNr))
-            TOMsMessageLog.logMessage(
-                "In TOMsGeometryElement.resolveSelfIntersections: Added {} ...".format(
-                    currStartVertexNr
-                ),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            if (
-                currStartVertexNr == nrPts - 1
-            ):  # check to see if the end point of the test line is the end of the line ...
-                break
-
-        # print("Finished checking ...")
-        TOMsMessageLog.logMessage(
-            "In TOMsGeometryElement.resolveSelfIntersections: Finished checking ...",
-            level=TOMsMessageLog.DEBUG,
+        newXs, newYs = resolveSelfIntersections(
+            [pt.x() for pt in ptsList], [pt.y() for pt in ptsList]
         )
 
-        newGeom = QgsGeometry.fromPolylineXY(newPtsList)
-
-        return newGeom
+        return QgsGeometry(QgsLineString(newXs, newYs))
 
     def getZigZag(self, wavelength=None, shpExtent=None):
 
@@ -493,20 +454,17 @@ class TOMsGeometryElement(QObject):
         if nrSegments == 0:
             nrSegments = 1
             TOMsMessageLog.logMessage(
-                "In getZigZag. NrSegments is 0 for geometry {}".format(
-                    self.currFeature.attribute("GeometryID")
-                ),
+                "In getZigZag. NrSegments is 0 for geometry %s",
+                self.currFeature.attribute("GeometryID"),
                 level=TOMsMessageLog.DEBUG,
             )
         interval = int(length / float(nrSegments) * 10000) / 10000
 
         TOMsMessageLog.logMessage(
-            "In getZigZag. LengthLine: "
-            + str(length)
-            + " NrSegments = "
-            + str(nrSegments)
-            + "; interval: "
-            + str(interval),
+            "In getZigZag. LengthLine: %s NrSegments = %s; interval: %s",
+            length,
+            nrSegments,
+            interval,
             level=TOMsMessageLog.DEBUG,
         )
 
@@ -532,6 +490,9 @@ class TOMsGeometryElement(QObject):
             )
         )
 
+        # walk along the line once, rather than interpolating from the start each time
+        walker = TOMsLineWalker(self.currFeature.geometry())
+
         distanceAlongLine = 0.0
         countSegments = 0
         while countSegments < (nrSegments):
@@ -540,47 +501,25 @@ class TOMsGeometryElement(QObject):
 
             distanceAlongLine = distanceAlongLine + interval / 2
 
-            interpolatedPointC = (
-                self.currFeature.geometry().interpolate(distanceAlongLine).asPoint()
-            )
-
-            TOMsMessageLog.logMessage(
-                "In getZigZag. PtC = "
-                + str(interpolatedPointC.x())
-                + ": "
-                + str(interpolatedPointC.y())
-                + "; distanceAlongLine = "
-                + str(distanceAlongLine),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            TOMsMessageLog.logMessage(
-                "In getZigZag. newC x = "
-                + str(interpolatedPointC.x() + (float(offset) * cosa))
-                + "; y = "
-                + str(interpolatedPointC.y() + (float(offset) * cosb)),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            ptsList.append(
-                QgsPointXY(
-                    interpolatedPointC.x() + (float(offset) * cosa),
-                    interpolatedPointC.y() + (float(offset) * cosb),
+            interpolatedPointC = walker.pointAt(distanceAlongLine)
+            if interpolatedPointC is not None:
+                ptsList.append(
+                    QgsPointXY(
+                        interpolatedPointC.x() + (float(offset) * cosa),
+                        interpolatedPointC.y() + (float(offset) * cosb),
+                    )
                 )
-            )
 
             distanceAlongLine = distanceAlongLine + interval / 2
 
-            interpolatedPointD = (
-                self.currFeature.geometry().interpolate(distanceAlongLine).asPoint()
-            )
-
-            ptsList.append(
-                QgsPointXY(
-                    interpolatedPointD.x() + (float(shpExtent) * cosa),
-                    interpolatedPointD.y() + (float(shpExtent) * cosb),
+            interpolatedPointD = walker.pointAt(distanceAlongLine)
+            if interpolatedPointD is not None:
+                ptsList.append(
+                    QgsPointXY(
+                        interpolatedPointD.x() + (float(shpExtent) * cosa),
+                        interpolatedPointD.y() + (float(shpExtent) * cosb),
+                    )
                 )
-            )
 
         # deal with last point
         ptsList.append(
@@ -594,7 +533,7 @@ class TOMsGeometryElement(QObject):
 
         return newLine
 
-    def getBayDividers(
+    def getBayDividerPoints(
         self,
         bayShapeGeom,
         parallelShapeGeom,
@@ -602,13 +541,14 @@ class TOMsGeometryElement(QObject):
         azimuthToCentreLine=None,
         offset=None,
     ):
-
-        # returns list of bay dividing lines
+        """
+        Returns a list of ((startX, startY), (endX, endY), kerbSegmentNr) - one for each
+        bay divider - in a single walk along the kerb (see tomsBayDividers)
+        """
 
         TOMsMessageLog.logMessage(
-            "In getBayDividers. geometry {}".format(
-                self.currFeature.attribute("GeometryID")
-            ),
+            "In getBayDividerPoints. geometry %s",
+            self.currFeature.attribute("GeometryID"),
             level=TOMsMessageLog.DEBUG,
         )
 
@@ -619,44 +559,31 @@ class TOMsGeometryElement(QObject):
         if azimuthToCentreLine is None:
             azimuthToCentreLine = self.currAzimuthToCentreLine
 
-        TOMsMessageLog.logMessage(
-            "In getBayDividers. AzimuthToCentreLine {}".format(azimuthToCentreLine),
-            level=TOMsMessageLog.DEBUG,
-        )
-
-        # slightly extend the length of the dividers to deal with any rounding errors in the split process
-        # shpExtent = shpExtent + 0.0001
-        # offset = offset - 0.0001
-
-        # get the bay shape "outside line"
+        # the two edges of the shape: the parallel line and the bay shape "outside line"
+        line = parallelShapeGeom.asPolyline()
+        if len(line) < 2:
+            return None
         bayShapeLine = bayShapeGeom.asPolyline()
         outsideBayShapeLine = bayShapeLine[1 : len(bayShapeLine) - 1]
-        outsideBayShapeLineGeom = QgsGeometry.fromPolylineXY(outsideBayShapeLine)
+        if len(outsideBayShapeLine) < 2:
+            return None
 
-        TOMsMessageLog.logMessage(
-            "In getBayDividers. outsideBayShapeLineGeom {}".format(
-                outsideBayShapeLineGeom.asWkt()
-            ),
-            level=TOMsMessageLog.DEBUG,
-        )
+        parallelXs = [pt.x() for pt in line]
+        parallelYs = [pt.y() for pt in line]
+        outsideXs = [pt.x() for pt in outsideBayShapeLine]
+        outsideYs = [pt.y() for pt in outsideBayShapeLine]
 
         restGeomType = self.currRestGeomType
         orientation = self.currBayOrientation
 
-        newLines = []
         currGeom = self.currFeature.geometry()
-
-        # line = generateGeometryUtils.getLineForAz(self.currFeature)
-        line = parallelShapeGeom.asPolyline()
-
-        if len(line) == 0:
-            return None
+        kerbLine = GenerateGeometryUtils.getLineForAz(self.currFeature)
+        nrKerbVertices = len(kerbLine) if not currGeom.isMultipart() else -1
 
         # get Az and calc turn to CL
 
         azimuth = GenerateGeometryUtils.checkDegrees(line[0].azimuth(line[1]))
         turn = GenerateGeometryUtils.turnToCL(azimuth, azimuthToCentreLine)
-        # newAz = generateGeometryUtils.checkDegrees(Az + Turn)
 
         if restGeomType in [5, 25, 9, 29]:  # echelon
             if not self.isFloat(orientation):
@@ -669,15 +596,16 @@ class TOMsGeometryElement(QObject):
         interval = int(length / float(nrSegments) * 10000) / 10000
 
         TOMsMessageLog.logMessage(
-            "In getBayDividers. LengthLine: "
-            + str(length)
-            + " NrSegments = "
-            + str(nrSegments)
-            + "; interval: "
-            + str(interval),
+            "In getBayDividerPoints. LengthLine: %s NrSegments = %s; interval: %s",
+            length,
+            nrSegments,
+            interval,
             level=TOMsMessageLog.DEBUG,
         )
 
+        walker = TOMsLineWalker(currGeom)
+        dividerPoints = []
+
         distanceAlongLine = 0.0
         countSegments = 0
         while countSegments < (nrSegments - 1):
@@ -686,22 +614,13 @@ class TOMsGeometryElement(QObject):
 
             distanceAlongLine = distanceAlongLine + interval
 
-            interpolatedPointC = currGeom.interpolate(distanceAlongLine).asPoint()
-
-            # now need to find the two vertices around this point and determine the azimuth ...
-
-            (
-                _,
-                closestPt,
-                vertexNrAfterPt,
-                _,
-            ) = currGeom.closestSegmentWithContext(interpolatedPointC)
+            closestPt = walker.pointAt(distanceAlongLine)
+            if closestPt is None:
+                break
 
-            azimuth = GenerateGeometryUtils.checkDegrees(
-                QgsPointXY(currGeom.vertexAt(vertexNrAfterPt - 1)).azimuth(
-                    QgsPointXY(currGeom.vertexAt(vertexNrAfterPt))
-                )
-            )
+            # the azimuth of the kerb segment with the point
+            kerbSegmentNr = walker.currSegment
+            azimuth = GenerateGeometryUtils.checkDegrees(walker.segmentAzimuth())
             newAz = GenerateGeometryUtils.checkDegrees(azimuth + turn)
 
             if restGeomType in [5, 25, 9, 29]:  # echelon
@@ -709,92 +628,59 @@ class TOMsGeometryElement(QObject):
                 diffEchelonAz = GenerateGeometryUtils.checkDegrees(diffEchelonAz1)
                 newAz = GenerateGeometryUtils.checkDegrees(newAz + diffEchelonAz)
 
-            TOMsMessageLog.logMessage(
-                "In getBayDividers. newAz: {}".format(newAz), level=TOMsMessageLog.DEBUG
-            )
-
             cosa, cosb = GenerateGeometryUtils.cosdirAzim(newAz)
 
-            TOMsMessageLog.logMessage(
-                "In getBayDividers. PtC = "
-                + str(interpolatedPointC.x())
-                + ": "
-                + str(interpolatedPointC.y())
-                + "; distanceAlongLine = "
-                + str(distanceAlongLine),
-                level=TOMsMessageLog.DEBUG,
+            testStartX = closestPt.x() + (float(offset) * cosa)
+            testStartY = closestPt.y() + (float(offset) * cosb)
+            testEndX = closestPt.x() + (float(shpExtent) * cosa)
+            testEndY = closestPt.y() + (float(shpExtent) * cosb)
+
+            # check for intersection ... on the segments of the edges next to the point
+            startPoint = dividerEnd(
+                parallelXs,
+                parallelYs,
+                edgeSegments(len(parallelXs), nrKerbVertices, kerbSegmentNr),
+                testStartX,
+                testStartY,
+                testEndX,
+                testEndY,
             )
-            TOMsMessageLog.logMessage(
-                "In getBayDividers. newC x = "
-                + str(interpolatedPointC.x() + (float(offset) * cosa))
-                + "; y = "
-                + str(interpolatedPointC.y() + (float(offset) * cosb)),
-                level=TOMsMessageLog.DEBUG,
+            endPoint = dividerEnd(
+                outsideXs,
+                outsideYs,
+                edgeSegments(len(outsideXs), nrKerbVertices, kerbSegmentNr),
+                testEndX,
+                testEndY,
+                testStartX,
+                testStartY,
             )
 
-            # ptsList.append(
-            #    QgsPointXY(closestPt.x() + (float(offset) * cosa), closestPt.y() + (float(offset) * cosb)))
-            testStartPoint = QgsPointXY(
-                closestPt.x() + (float(offset) * cosa),
-                closestPt.y() + (float(offset) * cosb),
-            )
+            dividerPoints.append((startPoint, endPoint, kerbSegmentNr))
 
-            testEndPoint = QgsPointXY(
-                closestPt.x() + (float(shpExtent) * cosa),
-                closestPt.y() + (float(shpExtent) * cosb),
-            )
+        return dividerPoints
 
-            TOMsMessageLog.logMessage(
-                "In getBayDividers. testPt x = {}; y = {}".format(
-                    testEndPoint.x(), testEndPoint.y()
-                ),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            testLineGeom = QgsGeometry.fromPolylineXY([testStartPoint, testEndPoint])
-
-            # check for intersection ... on bayOutsideLines
+    def getBayDividers(
+        self,
+        bayShapeGeom,
+        parallelShapeGeom,
+        shpExtent=None,
+        azimuthToCentreLine=None,
+        offset=None,
+    ):
 
-            if parallelShapeGeom.intersects(testLineGeom):
-                startPoint = testStartPoint
-                TOMsMessageLog.logMessage(
-                    "In getBayDividers. testLine intersects startPoint ...",
-                    level=TOMsMessageLog.DEBUG,
-                )
-            else:
-                # get point on bay shape from testPoint
-                startPoint = parallelShapeGeom.nearestPoint(
-                    QgsGeometry.fromPointXY(testStartPoint)
-                ).asPoint()
-                TOMsMessageLog.logMessage(
-                    "In getBayDividers. *** new startPt x = {}; y = {}".format(
-                        startPoint.x(), startPoint.y()
-                    ),
-                    level=TOMsMessageLog.DEBUG,
-                )
+        # returns list of bay dividing lines
 
-            if outsideBayShapeLineGeom.intersects(testLineGeom):
-                endPoint = testEndPoint
-                TOMsMessageLog.logMessage(
-                    "In getBayDividers. testLine intersects endPoint ...",
-                    level=TOMsMessageLog.DEBUG,
-                )
-            else:
-                # get point on bay shape from testPoint
-                endPoint = outsideBayShapeLineGeom.nearestPoint(
-                    QgsGeometry.fromPointXY(testEndPoint)
-                ).asPoint()
-                TOMsMessageLog.logMessage(
-                    "In getBayDividers. *** new endPt x = {}; y = {}".format(
-                        endPoint.x(), endPoint.y()
-                    ),
-                    level=TOMsMessageLog.DEBUG,
-                )
+        dividerPoints = self.getBayDividerPoints(
+            bayShapeGeom, parallelShapeGeom, shpExtent, azimuthToCentreLine, offset
+        )
+        if dividerPoints is None:
+            return None
 
-            newLine = QgsGeometry.fromPolylineXY([startPoint, endPoint]).extendLine(
-                0.0001, 0.0001
-            )
-            newLines.append(newLine)
+        # slightly extend the dividers to deal with any rounding errors in the split
+        newLines = []
+        for (startX, startY), (endX, endY), _ in dividerPoints:
+            x1, y1, x2, y2 = extendSegment(startX, startY, endX, endY, 0.0001)
+            newLines.append(QgsGeometry(QgsLineString([x1, x2], [y1, y2])))
 
         return newLines
 
@@ -833,77 +719,133 @@ class TOMsGeometryElement(QObject):
     ):
 
         TOMsMessageLog.logMessage(
-            "In factory. addBayPolygonDividers ... shpExtent: {}; Az: {} ".format(
-                shpExtent, azimuthToCentreLine
-            ),
+            "In factory. addBayPolygonDividers ... shpExtent: %s; Az: %s ",
+            shpExtent,
+            azimuthToCentreLine,
             level=TOMsMessageLog.DEBUG,
         )
 
-        # split output polygon(s) to show bay dividers
-        bayDividers = self.getBayDividers(
+        dividerPoints = self.getBayDividerPoints(
             bayShapeGeom=bayShapeGeom,
             parallelShapeGeom=parallelShapeGeom,
             shpExtent=shpExtent,
             azimuthToCentreLine=azimuthToCentreLine,
             offset=offset,
         )
-        if bayDividers is not None:
-            # prepare geometries list
-            outputGeometries = [outputGeometry]
+        if dividerPoints is None:
+            return outputGeometry
 
-            TOMsMessageLog.logMessage(
-                "In factory. addBayPolygonDividers ... nr dividers: {}".format(
-                    len(bayDividers)
-                ),
-                level=TOMsMessageLog.DEBUG,
+        TOMsMessageLog.logMessage(
+            "In factory. addBayPolygonDividers ... nr dividers: %s",
+            len(dividerPoints),
+            level=TOMsMessageLog.DEBUG,
+        )
+        if not dividerPoints:
+            return outputGeometry
+
+        # cut the edges of the shape where each divider crosses them ...
+        line = parallelShapeGeom.asPolyline()
+        bayShapeLine = bayShapeGeom.asPolyline()
+        outsideBayShapeLine = bayShapeLine[1 : len(bayShapeLine) - 1]
+        parallelXs = [pt.x() for pt in line]
+        parallelYs = [pt.y() for pt in line]
+        outsideXs = [pt.x() for pt in outsideBayShapeLine]
+        outsideYs = [pt.y() for pt in outsideBayShapeLine]
+
+        nrKerbVertices = -1
+        if not self.currFeature.geometry().isMultipart():
+            nrKerbVertices = len(GenerateGeometryUtils.getLineForAz(self.currFeature))
+
+        crossings = []
+        for (startX, startY), (endX, endY), kerbSegmentNr in dividerPoints:
+            parallelCrossing = edgeCrossing(
+                parallelXs,
+                parallelYs,
+                edgeSegments(len(parallelXs), nrKerbVertices, kerbSegmentNr),
+                startX,
+                startY,
+                endX,
+                endY,
             )
-            for divider in bayDividers:
-                # divGeometry = QgsGeometry()
-                # res = divGeometry.addPointsXY(divider.asPolyline(), QgsWkbTypes.LineGeometry)
-                TOMsMessageLog.logMessage(
-                    "In factory. divider : {}".format(divider.asWkt()),
-                    level=TOMsMessageLog.DEBUG,
-                )
+            outsideCrossing = edgeCrossing(
+                outsideXs,
+                outsideYs,
+                edgeSegments(len(outsideXs), nrKerbVertices, kerbSegmentNr),
+                startX,
+                startY,
+                endX,
+                endY,
+            )
+            if parallelCrossing is None or outsideCrossing is None:
+                crossings = None
+                break
+            crossings.append((parallelCrossing, outsideCrossing))
 
-                newGeomsList = []
-                for outGeom in outputGeometries:
-                    (
-                        _,
-                        extraGeometriesList,
-                        _,
-                    ) = outGeom.splitGeometry(divider.asPolyline(), True)
-                    newGeomsList.append(outGeom)
-                    for geom in extraGeometriesList:
-                        newGeomsList.append(geom)
-                outputGeometries = newGeomsList
-                TOMsMessageLog.logMessage(
-                    "In factory. addBayPolygonDividers ... nr outputGeometries: {}".format(
-                        len(outputGeometries)
-                    ),
-                    level=TOMsMessageLog.DEBUG,
-                )
+        # ... and build all the bay spaces in one go
+        rings = None
+        if crossings is not None:
+            rings = bayRings(parallelXs, parallelYs, outsideXs, outsideYs, crossings)
 
-            # now combine all the output polygons
-            newGeom = QgsGeometry()
-            newGeom = outputGeometries[0]
-            for i in range(1, len(outputGeometries)):
-                newGeom.addPartGeometry(outputGeometries[i])
+        if rings is None:
+            # the dividers do not cut the edges in order - split the polygon instead
+            TOMsMessageLog.logMessage(
+                "In factory. addBayPolygonDividers ... splitting %s",
+                self.currFeature.attribute("GeometryID"),
+                level=TOMsMessageLog.DEBUG,
+            )
+            return self.splitBayPolygon(
+                outputGeometry,
+                self.getBayDividers(
+                    bayShapeGeom,
+                    parallelShapeGeom,
+                    shpExtent,
+                    azimuthToCentreLine,
+                    offset,
+                ),
+            )
 
-            outputGeometry = newGeom
+        outputGeometry = QgsGeometry.fromMultiPolygonXY(
+            [[[QgsPointXY(x, y) for x, y in ring]] for ring in rings]
+        )
 
+        if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
             TOMsMessageLog.logMessage(
-                "In addPolygonDividers ... split geom: {}".format(
-                    outputGeometry.asWkt()
-                ),
+                "In addPolygonDividers ... split geom: %s",
+                outputGeometry.asWkt(),
                 level=TOMsMessageLog.DEBUG,
             )
 
         return outputGeometry
 
+    def splitBayPolygon(self, outputGeometry, bayDividers):
+        # split output polygon(s) by each of the dividers
+
+        outputGeometries = [outputGeometry]
+
+        for divider in bayDividers:
+            newGeomsList = []
+            for outGeom in outputGeometries:
+                (
+                    _,
+                    extraGeometriesList,
+                    _,
+                ) = outGeom.splitGeometry(divider.asPolyline(), True)
+                newGeomsList.append(outGeom)
+                for geom in extraGeometriesList:
+                    newGeomsList.append(geom)
+            outputGeometries = newGeomsList
+
+        # now combine all the output polygons
+        newGeom = outputGeometries[0]
+        for i in range(1, len(outputGeometries)):
+            newGeom.addPartGeometry(outputGeometries[i])
+
+        return newGeom
+
 
 class GeneratedGeometryBayLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryBayLineType ... ", level=TOMsMessageLog.DEBUG
         )
@@ -918,8 +860,8 @@ class GeneratedGeometryBayLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryHalfOnHalfOffLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryHalfOnHalfOffLineType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -948,8 +890,8 @@ class GeneratedGeometryHalfOnHalfOffLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryOnPavementLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryOnPavementLineType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -973,8 +915,8 @@ class GeneratedGeometryOnPavementLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryPerpendicularLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryPerpendicularLineType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -992,8 +934,8 @@ class GeneratedGeometryPerpendicularLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryEchelonLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryEchelonLineType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1011,8 +953,8 @@ class GeneratedGeometryEchelonLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryPerpendicularOnPavementLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryPerpendicularOnPavementLineType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1036,8 +978,8 @@ class GeneratedGeometryPerpendicularOnPavementLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryOutlineShape(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryOutlineShape ... ", level=TOMsMessageLog.DEBUG
         )
@@ -1047,8 +989,8 @@ class GeneratedGeometryOutlineShape(TOMsGeometryElement):
 
 
 class GeneratedGeometryEchelonOnPavementLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryEchelonOnPavementLineType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1072,8 +1014,8 @@ class GeneratedGeometryEchelonOnPavementLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryLineType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryLineType ... ", level=TOMsMessageLog.DEBUG
         )
@@ -1084,22 +1026,27 @@ class GeneratedGeometryLineType(TOMsGeometryElement):
 
 
 class GeneratedGeometryZigZagType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryZigZagType ... ", level=TOMsMessageLog.DEBUG
         )
 
     def getElementGeometry(self):
 
+        if self.simplified:
+            # a straight offset line
+            outputGeometry, _ = self.getLine()
+            return outputGeometry
+
         outputGeometry = self.getZigZag()
 
         return outputGeometry
 
 
 class GeneratedGeometryBayPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryBayPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1117,20 +1064,20 @@ class GeneratedGeometryBayPolygonType(TOMsGeometryElement):
                 outputGeometry, outputGeometry1, parallelLine1
             )
 
-        TOMsMessageLog.logMessage(
-            "In factory. generatedGeometryBayPolygonType ... polygon(s): {}".format(
-                outputGeometry.asWkt()
-            ),
-            level=TOMsMessageLog.DEBUG,
-        )
+        if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+            TOMsMessageLog.logMessage(
+                "In factory. generatedGeometryBayPolygonType ... polygon(s): %s",
+                outputGeometry.asWkt(),
+                level=TOMsMessageLog.DEBUG,
+            )
 
         return outputGeometry
         # return self.generatePolygon([(outputGeometry1, parallelLine1)])
 
 
 class GeneratedGeometryHalfOnHalfOffPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryHalfOnHalfOffPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1173,8 +1120,8 @@ class GeneratedGeometryHalfOnHalfOffPolygonType(TOMsGeometryElement):
 
 
 class GeneratedGeometryOnPavementPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryOnPavementPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1203,8 +1150,8 @@ class GeneratedGeometryOnPavementPolygonType(TOMsGeometryElement):
 
 
 class GeneratedGeometryPerpendicularPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryPerpendicularPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1228,8 +1175,8 @@ class GeneratedGeometryPerpendicularPolygonType(TOMsGeometryElement):
 
 
 class GeneratedGeometryEchelonPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryEchelonPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1253,8 +1200,8 @@ class GeneratedGeometryEchelonPolygonType(TOMsGeometryElement):
 
 
 class GeneratedGeometryPerpendicularOnPavementPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryPerpendicularOnPavementPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1286,19 +1233,19 @@ class GeneratedGeometryPerpendicularOnPavementPolygonType(TOMsGeometryElement):
                 GenerateGeometryUtils.getReverseAzimuth(self.currAzimuthToCentreLine),
             )
 
-        TOMsMessageLog.logMessage(
-            "In factory. generatedGeometryPerpendicularOnPavementPolygonType ... polygon(s): {}".format(
-                outputGeometry.asWkt()
-            ),
-            level=TOMsMessageLog.DEBUG,
-        )
+        if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+            TOMsMessageLog.logMessage(
+                "In factory. generatedGeometryPerpendicularOnPavementPolygonType ... polygon(s): %s",
+                outputGeometry.asWkt(),
+                level=TOMsMessageLog.DEBUG,
+            )
 
         return outputGeometry
 
 
 class GeneratedGeometryOutlineBayPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryOutlineBayPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1310,8 +1257,8 @@ class GeneratedGeometryOutlineBayPolygonType(TOMsGeometryElement):
 
 
 class GeneratedGeometryEchelonOnPavementPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryEchelonOnPavementPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1342,8 +1289,8 @@ class GeneratedGeometryEchelonOnPavementPolygonType(TOMsGeometryElement):
 
 
 class GeneratedGeometryCrossoverPolygonType(TOMsGeometryElement):
-    def __init__(self, currFeature):
-        super().__init__(currFeature)
+    def __init__(self, currFeature, simplified=False):
+        super().__init__(currFeature, simplified)
         TOMsMessageLog.logMessage(
             "In factory. generatedGeometryCrossoverPolygonType ... ",
             level=TOMsMessageLog.DEBUG,
@@ -1360,7 +1307,27 @@ class GeneratedGeometryCrossoverPolygonType(TOMsGeometryElement):
 
 class ElementGeometryFactory:
     @staticmethod
-    def getElementGeometry(currFeature, restGeomType=None):
+    def isSimplified(restGeomType, scale):
+        """
+        True if the simplified variant of restGeomType is to be shown at scale (from
+        the project variable SimplifiedGeometryScale): bays without dividers and
+        zig-zags as a straight offset line. Other geometries have a single variant.
+        """
+
+        settings = TOMsSettingsManager().settings()
+        if not scale or not settings.simplifiedGeometryScale:
+            return False
+        if scale < settings.simplifiedGeometryScale:
+            return False
+
+        if restGeomType == RestrictionGeometryTypes.ZIG_ZAG:
+            return True
+        return settings.showBayDivisions and RestrictionGeometryTypes.isBay(
+            restGeomType
+        )
+
+    @staticmethod
+    def getElementGeometry(currFeature, restGeomType=None, scale=None):
         if restGeomType:
             currRestGeomType = restGeomType
         else:
@@ -1376,90 +1343,123 @@ class ElementGeometryFactory:
             level=TOMsMessageLog.DEBUG,
         )
 
+        simplified = ElementGeometryFactory.isSimplified(currRestGeomType, scale)
+
+        return TOMsGeometryCache().getElementGeometry(
+            currFeature,
+            currRestGeomType,
+            lambda: ElementGeometryFactory.generateElementGeometry(
+                currFeature, currRestGeomType, simplified
+            ),
+            simplified,
+        )
+
+    @staticmethod
+    def generateElementGeometry(currFeature, currRestGeomType, simplified=False):
+        """Generates the display geometry, without using the cache"""
+
         res = None
         if currRestGeomType == RestrictionGeometryTypes.PARALLEL_BAY:
-            res = GeneratedGeometryBayLineType(currFeature).getElementGeometry()
+            res = GeneratedGeometryBayLineType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.HALF_ON_HALF_OFF:
             res = GeneratedGeometryHalfOnHalfOffLineType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ON_PAVEMENT:
-            res = GeneratedGeometryOnPavementLineType(currFeature).getElementGeometry()
+            res = GeneratedGeometryOnPavementLineType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.PERPENDICULAR:
             res = GeneratedGeometryPerpendicularLineType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ECHELON:
-            res = GeneratedGeometryEchelonLineType(currFeature).getElementGeometry()
+            res = GeneratedGeometryEchelonLineType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.PERPENDICULAR_ON_PAVEMENT:
             res = GeneratedGeometryPerpendicularOnPavementLineType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.OTHER:
-            res = GeneratedGeometryOutlineShape(currFeature).getElementGeometry()
+            res = GeneratedGeometryOutlineShape(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.CENTRAL_PARKING:
-            res = GeneratedGeometryOutlineShape(currFeature).getElementGeometry()
+            res = GeneratedGeometryOutlineShape(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ECHELON_ON_PAVEMENT:
             res = GeneratedGeometryEchelonOnPavementLineType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.PARALLEL_LINE:
-            res = GeneratedGeometryLineType(currFeature).getElementGeometry()
+            res = GeneratedGeometryLineType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ZIG_ZAG:
-            res = GeneratedGeometryZigZagType(currFeature).getElementGeometry()
+            res = GeneratedGeometryZigZagType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.PARALLEL_BAY_POLYGON:
-            res = GeneratedGeometryBayPolygonType(currFeature).getElementGeometry()
+            res = GeneratedGeometryBayPolygonType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.HALF_ON_HALF_OFF_POLYGON:
             res = GeneratedGeometryHalfOnHalfOffPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ON_PAVEMENT_POLYGON:
             res = GeneratedGeometryOnPavementPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.PERPENDICULAR_POLYGON:
             res = GeneratedGeometryPerpendicularPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ECHELON_POLYGON:
-            res = GeneratedGeometryEchelonPolygonType(currFeature).getElementGeometry()
+            res = GeneratedGeometryEchelonPolygonType(
+                currFeature, simplified
+            ).getElementGeometry()
 
         if (
             currRestGeomType
             == RestrictionGeometryTypes.PERPENDICULAR_ON_PAVEMENT_POLYGON
         ):
             res = GeneratedGeometryPerpendicularOnPavementPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.OUTLINE_BAY_POLYGON:
             res = GeneratedGeometryOutlineBayPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.ECHELON_ON_PAVEMENT_POLYGON:
             res = GeneratedGeometryEchelonOnPavementPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if currRestGeomType == RestrictionGeometryTypes.CROSSOVER:
             res = GeneratedGeometryCrossoverPolygonType(
-                currFeature
+                currFeature, simplified
             ).getElementGeometry()
 
         if res is None:
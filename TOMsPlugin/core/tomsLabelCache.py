@@ -0,0 +1,89 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import NULL
+
+from ..constants import singleton
+from .tomsCache import TOMsLruCache
+
+
+@singleton
+class TOMsLabelCache(TOMsLruCache):
+    """
+    Memoises the label tuples of getBayRestrictionLabelText and
+    getWaitingLoadingRestrictionLabelText, and the geometries used for label leaders,
+    for the length of one render pass.
+
+    The bay label expressions (time period, max stay, no return, ...) each need the
+    same tuple for a feature, so it is only computed once. Label tuples are keyed on the
+    feature id and its attribute values, and label leader geometries on the feature
+    geometry, so renders that do not start a new pass (print layouts, atlas) never get
+    an out of date entry. All entries are dropped when a new render pass starts
+    (startRenderPass is connected to QgsMapCanvas.renderStarting).
+
+    The cache can be disabled for debugging by setting the environment variable
+    TOMs_DISABLE_LABEL_CACHE.
+    """
+
+    DISABLE_VARIABLE = "TOMs_DISABLE_LABEL_CACHE"
+    # an upper limit for renders not started from the canvas (print layouts, atlas)
+    DEFAULT_MAX_SIZE = 50000
+
+    def resetStatistics(self):
+        TOMsLruCache.resetStatistics(self)
+        self.renderPasses = 0
+
+    @staticmethod
+    def fingerprint(labelType, feature):
+        """Returns the key used to store the labels of labelType for feature"""
+        return (
+            labelType,
+            feature.id(),
+            tuple(
+                None if value == NULL else str(value) for value in feature.attributes()
+            ),
+        )
+
+    def getLabels(self, labelType, feature, generator):
+        """
+        Returns the label tuple for feature, calling generator() only if it has not
+        already been computed in this render pass
+        """
+
+        if not self.enabled:
+            return generator()
+
+        return self.getRenderValue(self.fingerprint(labelType, feature), generator)
+
+    def getRenderValue(self, key, generator):
+        """
+        Returns the value stored under key in this render pass, calling generator() if
+        there is none. The key must identify everything the value depends on.
+        """
+
+        if not self.enabled:
+            return generator()
+
+        value = self.get(key)
+        if value is None:
+            value = generator()
+            self.put(key, value)
+
+        return value
+
+    def startRenderPass(self):
+        self.renderPasses += 1
+        self.clear()
+
+    def statistics(self):
+        statistics = TOMsLruCache.statistics(self)
+        statistics["renderPasses"] = self.renderPasses
+        return statistics
@@ -0,0 +1,215 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import functools
+import threading
+
+from qgis.core import QgsProject
+from qgis.PyQt.QtCore import (
+    QCoreApplication,
+    QObject,
+    Qt,
+    QThread,
+    QTimer,
+    pyqtSignal,
+)
+
+from .tomsMessageLog import TOMsMessageLog
+from .tomsProjectLayers import TOMsProjectLayers
+
+
+def isMainThread():
+    app = QCoreApplication.instance()
+    return app is None or QThread.currentThread() == app.thread()
+
+
+class TOMsSnapshotRequests(QObject):
+    """Passes the requests for a snapshot from the render threads to the main thread"""
+
+    snapshotRequested = pyqtSignal(str)
+
+
+class TOMsLayerSnapshots:
+    """
+    Base class for the in-memory copies of layers used by the expression functions
+    (lookups, zones, road lines).
+
+    A snapshot is only built on the main thread: when the project is read, when one of
+    the LAYER_NAMES layers is added to the project, or on first use from the main
+    thread. It is never modified afterwards, so it can be read from the render threads.
+    A render thread asking for a snapshot that has not been built gets None, and the
+    snapshot is built on the main thread. When the layer changes, the snapshot is
+    marked as stale and a new one is built on the main thread; until then, the render
+    threads keep using the previous snapshot. A stale snapshot is rebuilt straight away
+    if it is requested from the main thread.
+
+    Must be created from the main thread. Subclasses implement buildSnapshot and set
+    LAYER_NAMES, and may change LAYER_SIGNALS.
+    """
+
+    LAYER_NAMES = []
+
+    LAYER_SIGNALS = [
+        "featureAdded",
+        "featureDeleted",
+        "geometryChanged",
+        "attributeValueChanged",
+        "afterCommitChanges",
+        "afterRollBack",
+        "dataChanged",
+    ]
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.snapshotsByLayerID = {}
+        self.staleLayerIDs = set()
+        self.requestedLayerIDs = set()
+        self.connectionsByLayerID = {}  # {layerID: (layer, invalidate)}
+
+        self.requests = TOMsSnapshotRequests()
+        self.requests.snapshotRequested.connect(
+            self.buildRequestedSnapshot, Qt.QueuedConnection
+        )
+
+        project = QgsProject.instance()
+        project.readProject.connect(self.preloadProjectLayers)
+        project.layersAdded.connect(self.onLayersAdded)
+        project.layersWillBeRemoved.connect(self.removeLayers)
+        project.cleared.connect(self.clear)
+
+    def buildSnapshot(self, layer):
+        raise NotImplementedError
+
+    def snapshot(self, layer):
+        """
+        Returns the current snapshot of layer, building it if needed - or None, from a
+        render thread, if it has not been built yet
+        """
+
+        layerID = layer.id()
+        currSnapshot = self.snapshotsByLayerID.get(layerID)
+        if not isMainThread():
+            if currSnapshot is None:
+                self.requestSnapshot(layerID)
+            return currSnapshot
+
+        if currSnapshot is None or layerID in self.staleLayerIDs:
+            currSnapshot = self.loadLayer(layer)
+        return currSnapshot
+
+    def requestSnapshot(self, layerID):
+        with self.lock:
+            if layerID in self.requestedLayerIDs:
+                return
+            self.requestedLayerIDs.add(layerID)
+
+        TOMsMessageLog.logMessage(
+            "In {}.requestSnapshot: {} (not preloaded)".format(
+                type(self).__name__, layerID
+            ),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+        self.requests.snapshotRequested.emit(layerID)
+
+    def buildRequestedSnapshot(self, layerID):
+        with self.lock:
+            self.requestedLayerIDs.discard(layerID)
+            if layerID in self.snapshotsByLayerID:
+                return
+
+        layer = QgsProject.instance().mapLayer(layerID)
+        if layer is not None:
+            self.loadLayer(layer)
+
+    def loadLayer(self, layer):
+        layerID = layer.id()
+        newSnapshot = self.buildSnapshot(layer)
+
+        with self.lock:
+            self.snapshotsByLayerID[layerID] = newSnapshot
+            self.staleLayerIDs.discard(layerID)
+            self.connectLayer(layer)
+
+        return newSnapshot
+
+    def preloadLayers(self, layers):
+        """Builds the snapshots of layers (from the main thread) before rendering"""
+        for layer in layers:
+            if layer is not None:
+                self.snapshot(layer)
+
+    def preloadProjectLayers(self, *args):
+        layers = TOMsProjectLayers()
+        self.preloadLayers([layers.layer(name) for name in self.LAYER_NAMES])
+
+    def onLayersAdded(self, layers):
+        self.preloadLayers(
+            [layer for layer in layers if layer.name() in self.LAYER_NAMES]
+        )
+
+    def connectLayer(self, layer):
+        if layer.id() in self.connectionsByLayerID:
+            return
+
+        invalidate = functools.partial(self.invalidateLayer, layer.id())
+        for signalName in self.LAYER_SIGNALS:
+            getattr(layer, signalName).connect(invalidate)
+        self.connectionsByLayerID[layer.id()] = (layer, invalidate)
+
+    def disconnectLayer(self, layerID):
+        layer, invalidate = self.connectionsByLayerID.pop(layerID, (None, None))
+        if layer is None:
+            return
+        for signalName in self.LAYER_SIGNALS:
+            getattr(layer, signalName).disconnect(invalidate)
+
+    def invalidateLayer(self, layerID, *args):
+        with self.lock:
+            if layerID not in self.snapshotsByLayerID or layerID in self.staleLayerIDs:
+                return
+            self.staleLayerIDs.add(layerID)
+
+        TOMsMessageLog.logMessage(
+            "In {}.invalidateLayer: {}".format(type(self).__name__, layerID),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+        # rebuild once the current batch of changes has been made
+        QTimer.singleShot(0, functools.partial(self.refreshLayer, layerID))
+
+    def refreshLayer(self, layerID):
+        if layerID not in self.staleLayerIDs:
+            return
+
+        layer = QgsProject.instance().mapLayer(layerID)
+        if layer is None:
+            # not (or no longer) a project layer - it will be read again on next use
+            with self.lock:
+                self.snapshotsByLayerID.pop(layerID, None)
+                self.staleLayerIDs.discard(layerID)
+            return
+
+        self.loadLayer(layer)
+
+    def removeLayers(self, layerIDs):
+        with self.lock:
+            for layerID in layerIDs:
+                self.snapshotsByLayerID.pop(layerID, None)
+                self.staleLayerIDs.discard(layerID)
+                self.disconnectLayer(layerID)
+
+    def clear(self):
+        # the layers that are still connected (i.e., not project layers) stay connected,
+        # so a layer used again is not connected twice
+        with self.lock:
+            self.snapshotsByLayerID.clear()
+            self.staleLayerIDs.clear()
@@ -0,0 +1,132 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import math
+import sys
+
+from qgis.core import QgsGeometry, QgsPointXY, QgsWkbTypes
+
+
+class TOMsLineWalker:
+    """
+    Interpolates points along a line, as QgsGeometry.interpolate, for a series of
+    distances.
+
+    The segment lengths are computed once and the walker keeps its position, so a
+    sequence of increasing distances is answered in a single pass along the line
+    (instead of walking from the start of the line for every point).
+    """
+
+    def __init__(self, geometry):
+        if geometry.type() == QgsWkbTypes.PolygonGeometry:
+            geometry = QgsGeometry(geometry.constGet().boundary())
+
+        self.isMultipart = geometry.isMultipart()
+        if geometry.type() != QgsWkbTypes.LineGeometry:
+            parts = []
+        elif self.isMultipart:
+            parts = geometry.asMultiPolyline()
+        else:
+            parts = [geometry.asPolyline()]
+
+        # for each part: vertex coordinates, segment lengths and length (summed in the
+        # same order as QgsLineString, so that results are identical)
+        self.parts = []
+        for line in parts:
+            xs = [pt.x() for pt in line]
+            ys = [pt.y() for pt in line]
+            segmentLengths = []
+            partLength = 0.0
+            for i in range(len(xs) - 1):
+                dx = xs[i + 1] - xs[i]
+                dy = ys[i + 1] - ys[i]
+                segmentLengths.append(math.sqrt(dx * dx + dy * dy))
+                partLength += segmentLengths[-1]
+            self.parts.append((xs, ys, segmentLengths, partLength))
+
+        self.currPart = 0
+        self.currSegment = 0
+        self.segmentStart = 0.0  # distance (within the part) to the current segment
+
+    @staticmethod
+    def isNear(value1, value2):
+        # as qgsDoubleNear
+        return abs(value1 - value2) <= 4 * sys.float_info.epsilon
+
+    def findPart(self, distance):
+        # as QgsGeometry.interpolate - returns the part and the distance within it
+        if not self.isMultipart:
+            return 0, distance
+
+        for partNr, part in enumerate(self.parts):
+            if part[3] >= distance:
+                return partNr, distance
+            distance -= part[3]
+
+        return None, None
+
+    def pointAt(self, distance):
+        """
+        Returns the QgsPointXY at distance along the line, or None if distance is beyond
+        the end of the line. Fastest when called with increasing distances.
+        """
+
+        if distance < 0 or not self.parts:
+            return None
+
+        partNr, partDistance = self.findPart(distance)
+        if partNr is None:
+            return None
+
+        # carry on from the previous point if possible
+        if partNr != self.currPart or partDistance < self.segmentStart:
+            self.currPart = partNr
+            self.currSegment = 0
+            self.segmentStart = 0.0
+
+        xs, ys, segmentLengths, _ = self.parts[partNr]
+
+        # find the segment (as QgsLineString.interpolatePoint)
+        while self.currSegment < len(segmentLengths):
+            segmentLength = segmentLengths[self.currSegment]
+            segmentEnd = self.segmentStart + segmentLength
+            if segmentEnd > partDistance or self.isNear(segmentEnd, partDistance):
+                distanceToPoint = min(partDistance - self.segmentStart, segmentLength)
+                x1 = xs[self.currSegment]
+                y1 = ys[self.currSegment]
+                if self.isNear(segmentLength, 0.0):
+                    return QgsPointXY(x1, y1)
+                dx = xs[self.currSegment + 1] - x1
+                dy = ys[self.currSegment + 1] - y1
+                scaleFactor = distanceToPoint / segmentLength
+                return QgsPointXY(x1 + dx * scaleFactor, y1 + dy * scaleFactor)
+            self.segmentStart = segmentEnd
+            self.currSegment += 1
+
+        # past the end - start from the beginning next time
+        self.currSegment = 0
+        self.segmentStart = 0.0
+        return None
+
+    def pointsAt(self, distances):
+        """Returns the points at each of distances (in increasing order)"""
+        return [self.pointAt(distance) for distance in distances]
+
+    def segmentAzimuth(self):
+        """Azimuth of the segment containing the last point returned by pointAt"""
+
+        xs, ys, segmentLengths, _ = self.parts[self.currPart]
+        if not segmentLengths:
+            return 0.0
+        segmentNr = min(self.currSegment, len(segmentLengths) - 1)
+        return QgsPointXY(xs[segmentNr], ys[segmentNr]).azimuth(
+            QgsPointXY(xs[segmentNr + 1], ys[segmentNr + 1])
+        )
@@ -0,0 +1,132 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import sys
+from types import MappingProxyType
+
+from qgis.core import NULL
+
+from ..constants import singleton
+from .tomsCache import TOMsCache
+from .tomsLayerSnapshots import TOMsLayerSnapshots
+from .tomsMessageLog import TOMsMessageLog
+
+
+@singleton
+class TOMsLookupCache(TOMsLayerSnapshots, TOMsCache):
+    """
+    In-memory copy of the lookup layers (TimePeriodsInUse_View, LengthOfTime,
+    AdditionalConditionTypes, SignTypes, ...) used for labels and sign icons.
+
+    Each layer is read once into a {Code: {fieldName: value}} dictionary. A layer is
+    read again after its edits are committed or when it is reloaded, e.g. after the
+    "InUse" materialized views have been refreshed and the map refreshed.
+
+    The cache can be disabled for debugging by setting the environment variable
+    TOMs_DISABLE_LOOKUP_CACHE.
+    """
+
+    LAYER_NAMES = [
+        "TimePeriodsInUse_View",
+        "LengthOfTime",
+        "AdditionalConditionTypes",
+        "SignTypes",
+    ]
+    LAYER_SIGNALS = ["afterCommitChanges", "dataChanged"]
+    DISABLE_VARIABLE = "TOMs_DISABLE_LOOKUP_CACHE"
+
+    def __init__(self):
+        TOMsLayerSnapshots.__init__(self)
+        TOMsCache.__init__(self)
+
+    def resetStatistics(self):
+        TOMsCache.resetStatistics(self)
+        self.loads = 0
+
+    @staticmethod
+    def codeKey(code):
+        if code is None or code == NULL or code == "":
+            return None
+        if isinstance(code, float) and code.is_integer():
+            code = int(code)
+        return str(code)
+
+    def getRow(self, lookupLayer, code):
+        """Returns the attributes ({fieldName: value}) of the row with the given Code"""
+
+        key = self.codeKey(code)
+        if key is None or lookupLayer is None:
+            return None
+
+        if not self.enabled:
+            return self.buildSnapshot(lookupLayer).get(key)
+
+        rows = self.snapshot(lookupLayer)
+        row = None if rows is None else rows.get(key)
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    def getValue(self, lookupLayer, code, fieldName):
+        row = self.getRow(lookupLayer, code)
+        if row is None:
+            return None
+        return row.get(fieldName)
+
+    def buildSnapshot(self, layer):
+        fieldNames = layer.fields().names()
+        rows = {}
+        for feature in layer.getFeatures():
+            key = TOMsLookupCache.codeKey(feature.attribute("Code"))
+            if key is not None:
+                row = dict(zip(fieldNames, feature.attributes()))
+                rows[key] = MappingProxyType(row)
+        return MappingProxyType(rows)
+
+    def loadLayer(self, layer):
+        rows = TOMsLayerSnapshots.loadLayer(self, layer)
+        self.loads += 1
+
+        TOMsMessageLog.logMessage(
+            "In TOMsLookupCache.loadLayer: {} ({} rows)".format(
+                layer.name(), len(rows)
+            ),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+        return rows
+
+    def memoryUsage(self):
+        """Approximate size (in bytes) of the cached rows"""
+
+        with self.lock:
+            size = sys.getsizeof(self.snapshotsByLayerID)
+            for rows in self.snapshotsByLayerID.values():
+                size += sys.getsizeof(rows)
+                for key, row in rows.items():
+                    size += sys.getsizeof(key) + sys.getsizeof(row)
+                    size += sum(sys.getsizeof(value) for value in row.values())
+            return size
+
+    def statistics(self):
+        with self.lock:
+            statistics = TOMsCache.statistics(self)
+            statistics.update(
+                {
+                    "layers": len(self.snapshotsByLayerID),
+                    "rows": sum(len(rows) for rows in self.snapshotsByLayerID.values()),
+                    "memoryBytes": self.memoryUsage(),
+                    "loads": self.loads,
+                }
+            )
+            return statistics
@@ -10,8 +10,12 @@
 # Oslandia 2022
 
 import datetime
+import gzip
 import logging
+import logging.handlers
 import os.path
+import queue
+import shutil
 from typing import Any
 
 from qgis.core import Qgis, QgsMessageLog
@@ -22,18 +26,111 @@ logging.basicConfig(
     level=logging.DEBUG,
 )
 tomsLogger = logging.getLogger("TOMs")
-tomsLogger.setLevel(logging.DEBUG)
+try:
+    tomsLogger.setLevel(os.environ.get("TOMs_LOGGING_LEVEL", "DEBUG").upper())
+except ValueError:
+    tomsLogger.setLevel(logging.DEBUG)
+
+# QGIS message levels (and logging.DEBUG) to python logging levels
+LOGGING_LEVELS = {
+    int(Qgis.Info): logging.INFO,
+    int(Qgis.Warning): logging.WARNING,
+    int(Qgis.Critical): logging.ERROR,
+}
+
+
+def logFileName(logFilePath: str, date: datetime.date) -> str:
+    return os.path.join(logFilePath, "qgis_" + date.strftime("%Y%m%d") + ".log")
+
+
+def gzipRotator(source: str, dest: str) -> None:
+    with open(source, "rb") as sourceFile, gzip.open(dest, "wb") as destFile:
+        shutil.copyfileobj(sourceFile, destFile)
+    os.remove(source)
+
+
+class TOMsLogFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    The daily TOMs log file (qgis_YYYYMMDD.log): a new file is started each day, and
+    the file of the day is rotated (qgis_YYYYMMDD.log.1, ...) when it reaches maxBytes.
+    Rotated files can be gzipped.
+    """
+
+    def __init__(
+        self,
+        logFilePath: str,
+        maxBytes: int = 0,
+        backupCount: int = 0,
+        compress: bool = False,
+    ) -> None:
+        self.logFilePath = logFilePath
+        self.currDate = datetime.date.today()
+        super().__init__(
+            logFileName(logFilePath, self.currDate),
+            maxBytes=maxBytes,
+            backupCount=backupCount,
+            delay=True,
+        )
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = gzipRotator
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if datetime.date.today() != self.currDate:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        today = datetime.date.today()
+        if today == self.currDate:
+            super().doRollover()
+            return
+
+        # a new day - on to the file of the day
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.currDate = today
+        self.baseFilename = os.path.abspath(logFileName(self.logFilePath, today))
 
 
 class TOMsMessageLog:
     """
     Wraps QGis and Python logging systems
+
+    Messages can take %-style arguments, which are only formatted if the message is
+    logged:
+
+        TOMsMessageLog.logMessage("In getShape: %s", geometryID, level=DEBUG)
+
+    Arguments that are expensive to build (e.g., WKT) should be guarded with
+    isEnabledFor. Debug messages can be switched off with the environment variable
+    TOMs_LOGGING_LEVEL (e.g., "INFO") or setLoggingLevel.
     """
 
     filename = ""
     currLoggingLevel = Qgis.Info
     DEBUG = logging.DEBUG
     tomsLogFileHandler = None
+    tomsLogQueueHandler = None
+    tomsLogQueueListener = None
+
+    # size rotation of the log file
+    DEFAULT_LOG_MAX_BYTES = 50 * 1024 * 1024
+    DEFAULT_LOG_BACKUP_COUNT = 10
+
+    @staticmethod
+    def isEnabledFor(qLevel: int) -> bool:
+        """True if a message with this level (Qgis level or DEBUG) will be logged"""
+        messageLevel = int(qLevel)
+        return tomsLogger.isEnabledFor(
+            LOGGING_LEVELS.get(messageLevel, logging.DEBUG)
+        ) or (logging.DEBUG > messageLevel >= TOMsMessageLog.currLoggingLevel)
+
+    @staticmethod
+    def setLoggingLevel(loggingLevel: int) -> None:
+        """Sets the python logging level, e.g. logging.INFO to drop debug messages"""
+        tomsLogger.setLevel(loggingLevel)
 
     @staticmethod
     def logMessage(msg: str, *args: Any, **kwargs: Any) -> None:
@@ -44,33 +141,32 @@ class TOMsMessageLog:
         messageLevel = int(qLevel)
 
         # >>>> python logging part
-        loggingLevel = logging.DEBUG
-        if messageLevel == Qgis.Info:
-            loggingLevel = logging.INFO
-        elif messageLevel == Qgis.Warning:
-            loggingLevel = logging.WARNING
-        elif messageLevel == Qgis.Critical:
-            loggingLevel = logging.ERROR
-
-        filename, lineNumber, funcName, _ = tomsLogger.findCaller()
-        logRec = logging.LogRecord(
-            tomsLogger.name,
-            loggingLevel,
-            filename,
-            lineNumber,
-            msg,
-            args,
-            None,
-            func=funcName,
-        )
-        tomsLogger.handle(logRec)
+        loggingLevel = LOGGING_LEVELS.get(messageLevel, logging.DEBUG)
+
+        # disable when messageLevel is DEBUG as QGIS does not handle it
+        toQgis = logging.DEBUG > messageLevel >= TOMsMessageLog.currLoggingLevel
+
+        # nothing else is done (no frame inspection, no formatting) if nobody listens
+        if tomsLogger.isEnabledFor(loggingLevel):
+            filename, lineNumber, funcName, _ = tomsLogger.findCaller(stacklevel=2)
+            logRec = logging.LogRecord(
+                tomsLogger.name,
+                loggingLevel,
+                filename,
+                lineNumber,
+                msg,
+                args,
+                None,
+                func=funcName,
+            )
+            tomsLogger.handle(logRec)
 
         # >>>>> QGIS logging part
-        if (
-            logging.DEBUG > messageLevel >= TOMsMessageLog.currLoggingLevel
-        ):  # disable when messageLevel is DEBUG as QGIS does not handle it
+        if toQgis:
             kwargs["level"] = messageLevel
-            QgsMessageLog.logMessage(msg, *args, **kwargs, tag="TOMs Panel")
+            QgsMessageLog.logMessage(
+                msg % args if args else msg, **kwargs, tag="TOMs Panel"
+            )
 
     @classmethod
     def setLogFile(cls) -> None:
@@ -86,17 +182,58 @@ class TOMsMessageLog:
             "LogFilePath: " + str(logFilePath), tag="TOMs Panel", level=Qgis.Info
         )
 
-        logfile = "qgis_" + datetime.date.today().strftime("%Y%m%d") + ".log"
-        TOMsMessageLog.filename = os.path.join(logFilePath, logfile)
+        TOMsMessageLog.closeLogFile()
 
-        if TOMsMessageLog.tomsLogFileHandler:
-            tomsLogger.removeHandler(TOMsMessageLog.tomsLogFileHandler)
+        try:
+            maxBytes = int(
+                os.environ.get("TOMs_LOG_MAX_BYTES", cls.DEFAULT_LOG_MAX_BYTES)
+            )
+            backupCount = int(
+                os.environ.get("TOMs_LOG_BACKUP_COUNT", cls.DEFAULT_LOG_BACKUP_COUNT)
+            )
+        except ValueError:
+            maxBytes = cls.DEFAULT_LOG_MAX_BYTES
+            backupCount = cls.DEFAULT_LOG_BACKUP_COUNT
+
+        TOMsMessageLog.tomsLogFileHandler = TOMsLogFileHandler(
+            logFilePath,
+            maxBytes=maxBytes,
+            backupCount=backupCount,
+            compress=os.environ.get("TOMs_LOG_COMPRESS") is not None,
+        )
+        TOMsMessageLog.filename = TOMsMessageLog.tomsLogFileHandler.baseFilename
 
-        TOMsMessageLog.tomsLogFileHandler = logging.FileHandler(TOMsMessageLog.filename)
-        tomsLogger.addHandler(TOMsMessageLog.tomsLogFileHandler)
+        # written from a background thread, rather than from the UI or render threads
+        TOMsMessageLog.tomsLogQueueHandler = logging.handlers.QueueHandler(
+            queue.SimpleQueue()
+        )
+        TOMsMessageLog.tomsLogQueueListener = logging.handlers.QueueListener(
+            TOMsMessageLog.tomsLogQueueHandler.queue,
+            TOMsMessageLog.tomsLogFileHandler,
+            respect_handler_level=True,
+        )
+        TOMsMessageLog.tomsLogQueueListener.start()
+        tomsLogger.addHandler(TOMsMessageLog.tomsLogQueueHandler)
 
         QgsMessageLog.logMessage(
             "Sorting out log file" + TOMsMessageLog.filename,
             tag="TOMs Panel",
             level=Qgis.Info,
         )
+
+    @classmethod
+    def closeLogFile(cls) -> None:
+        """Writes the queued messages to the log file and closes it"""
+
+        if TOMsMessageLog.tomsLogQueueHandler:
+            tomsLogger.removeHandler(TOMsMessageLog.tomsLogQueueHandler)
+            TOMsMessageLog.tomsLogQueueHandler = None
+
+        if TOMsMessageLog.tomsLogQueueListener:
+            # processes everything on the queue before returning
+            TOMsMessageLog.tomsLogQueueListener.stop()
+            TOMsMessageLog.tomsLogQueueListener = None
+
+        if TOMsMessageLog.tomsLogFileHandler:
+            TOMsMessageLog.tomsLogFileHandler.close()
+            TOMsMessageLog.tomsLogFileHandler = None
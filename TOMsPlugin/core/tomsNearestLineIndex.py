@@ -0,0 +1,135 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import math
+from typing import NamedTuple
+
+from qgis.core import QgsFeature, QgsGeometry, QgsPointXY, QgsSpatialIndex
+
+from ..constants import singleton
+from .tomsLayerSnapshots import TOMsLayerSnapshots
+from .tomsMessageLog import TOMsMessageLog
+
+
+class TOMsNearestLine(NamedTuple):
+    """Result of TOMsNearestLineIndex.nearestLine"""
+
+    feature: QgsFeature
+    point: QgsPointXY  # nearest point on the line
+    distance: float
+    vertexAfter: int  # vertex at the end of the nearest segment
+    azimuth: float  # azimuth of the nearest segment, in the direction of the line
+
+
+@singleton
+class TOMsNearestLineIndex(TOMsLayerSnapshots):
+    """
+    In-memory nearest neighbour index over line layers (RoadCentreLine, RoadCasement).
+
+    The index for a layer is built on first use and rebuilt whenever the layer is
+    edited, committed, rolled back or reloaded.
+    """
+
+    LAYER_NAMES = ["RoadCentreLine", "RoadCasement"]
+
+    def buildSnapshot(self, layer):
+        features = {}
+        index = QgsSpatialIndex(QgsSpatialIndex.FlagStoreFeatureGeometries)
+        for feature in layer.getFeatures():
+            if not feature.hasGeometry():
+                continue
+            features[feature.id()] = QgsFeature(feature)
+            index.addFeature(feature)
+
+        TOMsMessageLog.logMessage(
+            "In TOMsNearestLineIndex.buildSnapshot: {} ({} lines)".format(
+                layer.name(), len(features)
+            ),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+        return index, features
+
+    @staticmethod
+    def isExcluded(feature, geometryIDs):
+        if geometryIDs is None:
+            return False
+        return feature.attribute("GeometryID") in geometryIDs
+
+    def nearestLine(self, lineLayer, searchPt, tolerance, geometryIDs=None):
+        """
+        Returns a TOMsNearestLine for the line of lineLayer nearest to searchPt (within
+        tolerance), or None. Features whose GeometryID is in geometryIDs are ignored.
+
+        Raises KeyError if geometryIDs is given and the layer has no GeometryID field.
+        """
+
+        if lineLayer is None or searchPt is None:
+            return None
+
+        if geometryIDs is not None:
+            if lineLayer.fields().indexFromName("GeometryID") < 0:
+                raise KeyError("GeometryID")
+
+        searchPt = QgsPointXY(searchPt)
+
+        currSnapshot = self.snapshot(lineLayer)
+        if currSnapshot is None:
+            return None
+        index, features = currSnapshot
+
+        # ask for more neighbours until one is found that is not excluded
+        nrNeighbours = 1 if geometryIDs is None else len(geometryIDs) + 1
+        while True:
+            fids = index.nearestNeighbor(searchPt, nrNeighbours, tolerance)
+            candidates = [
+                features[fid]
+                for fid in fids
+                if not self.isExcluded(features[fid], geometryIDs)
+            ]
+            if candidates or len(fids) < nrNeighbours:
+                break
+            nrNeighbours = nrNeighbours * 2
+
+        nearest = None
+        for feature in candidates:
+            (
+                sqrDist,
+                closestPt,
+                vertexAfter,
+                _,
+            ) = feature.geometry().closestSegmentWithContext(searchPt)
+            if nearest is None or sqrDist < nearest[0]:
+                nearest = (sqrDist, feature, closestPt, vertexAfter)
+
+        if nearest is None:
+            return None
+
+        sqrDist, feature, closestPt, vertexAfter = nearest
+        lineGeom = feature.geometry()
+        segmentStart = QgsPointXY(lineGeom.vertexAt(vertexAfter - 1))
+        segmentEnd = QgsPointXY(lineGeom.vertexAt(vertexAfter))
+
+        return TOMsNearestLine(
+            feature=feature,
+            point=QgsPointXY(closestPt),
+            distance=math.sqrt(sqrDist),
+            vertexAfter=vertexAfter,
+            azimuth=segmentStart.azimuth(segmentEnd),
+        )
+
+    def nearestPoint(self, lineLayer, searchPt, tolerance, geometryIDs=None):
+        """Same as nearestLine, but returns (nearest point geometry, feature)"""
+
+        nearest = self.nearestLine(lineLayer, searchPt, tolerance, geometryIDs)
+        if nearest is None:
+            return None, None
+        return QgsGeometry.fromPointXY(nearest.point), nearest.feature
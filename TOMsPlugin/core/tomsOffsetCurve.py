@@ -0,0 +1,165 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import os
+from enum import Enum
+
+from qgis.core import QgsGeometry, QgsLineString, QgsMessageLog
+
+from ..generateGeometryUtils import GenerateGeometryUtils
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    QgsMessageLog.logMessage("Not able to import numpy ...", tag="TOMs Panel")
+    NUMPY_AVAILABLE = False
+
+
+ECHELON_GEOMETRY_TYPES = [5, 25, 9, 29]
+
+
+class ShapeEngine(Enum):
+    PYTHON = "python"
+    NUMPY = "numpy"
+
+    @staticmethod
+    def default():
+        """
+        The engine used by TOMsGeometryElement.getShape. NUMPY unless numpy is not
+        available or the environment variable TOMs_SHAPE_ENGINE is set to "python"
+        """
+        if not NUMPY_AVAILABLE:
+            return ShapeEngine.PYTHON
+        try:
+            return ShapeEngine(os.environ.get("TOMs_SHAPE_ENGINE", "numpy").lower())
+        except ValueError:
+            return ShapeEngine.NUMPY
+
+
+class OffsetCurveGenerator:
+    """
+    Array version of the vertex loop in TOMsGeometryElement.getShape.
+
+    The same operations are applied, in the same order, to all the vertices at once,
+    so the results match the Python engine (to within the last bit of sin/cos).
+    """
+
+    @staticmethod
+    def checkDegrees(azimuths):
+        # as GenerateGeometryUtils.checkDegrees, i.e., QgsGeometryUtils.normalizedAngle
+        angles = np.radians(azimuths)
+        angles = np.where(
+            (angles >= 2 * np.pi) | (angles <= -2 * np.pi),
+            np.fmod(angles, 2 * np.pi),
+            angles,
+        )
+        angles = np.where(angles < 0.0, angles + 2 * np.pi, angles)
+        return np.degrees(angles)
+
+    @staticmethod
+    def cosdirAzim(azimuths):
+        azRad = np.radians(azimuths)
+        return np.sin(azRad), np.cos(azRad)
+
+    @staticmethod
+    def generateShapeLines(
+        line, restGeomType, orientation, azimuthToCentreLine, shpExtent, offset
+    ):
+        """
+        Returns the shape line and the parallel line (as QgsGeometry) for the kerb line
+        given as a list of QgsPointXY (with at least two points)
+        """
+
+        shpExtent = float(shpExtent)
+        offset = float(offset)
+
+        xs = np.array([pt.x() for pt in line])
+        ys = np.array([pt.y() for pt in line])
+
+        # azimuth of each segment (as QgsPointXY.azimuth)
+        azimuths = OffsetCurveGenerator.checkDegrees(
+            np.arctan2(xs[1:] - xs[:-1], ys[1:] - ys[:-1]) * 180.0 / np.pi
+        )
+
+        # first vertex - determine which way to turn towards CL (center line)
+        turn = GenerateGeometryUtils.turnToCL(float(azimuths[0]), azimuthToCentreLine)
+
+        firstAz = GenerateGeometryUtils.checkDegrees(float(azimuths[0]) + turn)
+        firstCosa, firstCosb = GenerateGeometryUtils.cosdirAzim(firstAz)
+        firstX = xs[0] + (offset * firstCosa)
+        firstY = ys[0] + (offset * firstCosb)
+
+        diffEchelonAz = 0
+        if restGeomType in ECHELON_GEOMETRY_TYPES:
+            try:
+                orientation = float(orientation)
+            except Exception:
+                orientation = azimuthToCentreLine
+
+            diffEchelonAz = GenerateGeometryUtils.checkDegrees(
+                float(orientation) - firstAz
+            )
+
+            firstAz = GenerateGeometryUtils.checkDegrees(firstAz + diffEchelonAz)
+            firstCosa, firstCosb = GenerateGeometryUtils.cosdirAzim(firstAz)
+
+        firstExtentX = xs[0] + (shpExtent * firstCosa)
+        firstExtentY = ys[0] + (shpExtent * firstCosb)
+
+        # intermediate vertices - bisectors of the segments either side (calcBisector)
+        prevAzA = OffsetCurveGenerator.checkDegrees(azimuths[:-1] + float(turn))
+        currAzA = OffsetCurveGenerator.checkDegrees(azimuths[1:] + float(turn))
+        diffAngle = (prevAzA - currAzA) / float(2)
+        bisectAz = prevAzA - diffAngle
+        cosDiffAngle = np.cos(np.radians(diffAngle))
+        distWidth = shpExtent / cosDiffAngle
+        distOffset = offset / cosDiffAngle
+
+        cosa, cosb = OffsetCurveGenerator.cosdirAzim(bisectAz + diffEchelonAz)
+        widthXs = xs[1:-1] + (distWidth * cosa)
+        widthYs = ys[1:-1] + (distWidth * cosb)
+
+        # sameSign, as GenerateGeometryUtils.sameSign
+        flipOffset = (distWidth < 0) & (
+            np.abs(distWidth) + np.abs(distOffset) != np.abs(distWidth + distOffset)
+        )
+        thisOffset = np.where(flipOffset, -distOffset, distOffset)
+        parallelXs = xs[1:-1] + (thisOffset * cosa)
+        parallelYs = ys[1:-1] + (thisOffset * cosb)
+
+        # last vertex
+        lastAz = float(azimuths[-1])
+        lastCosa, lastCosb = GenerateGeometryUtils.cosdirAzim(
+            GenerateGeometryUtils.checkDegrees(lastAz + turn + diffEchelonAz)
+        )
+        lastExtentX = xs[-1] + (shpExtent * lastCosa)
+        lastExtentY = ys[-1] + (shpExtent * lastCosb)
+
+        # add end point (without any consideration of Echelon)
+        lastCosa, lastCosb = GenerateGeometryUtils.cosdirAzim(lastAz + turn)
+        lastX = xs[-1] + (offset * lastCosa)
+        lastY = ys[-1] + (offset * lastCosb)
+
+        shapeXs = np.concatenate(
+            ([firstX, firstExtentX], widthXs, [lastExtentX, lastX])
+        )
+        shapeYs = np.concatenate(
+            ([firstY, firstExtentY], widthYs, [lastExtentY, lastY])
+        )
+        parallelXs = np.concatenate(([firstX], parallelXs, [lastX]))
+        parallelYs = np.concatenate(([firstY], parallelYs, [lastY]))
+
+        return (
+            QgsGeometry(QgsLineString(shapeXs.tolist(), shapeYs.tolist())),
+            QgsGeometry(QgsLineString(parallelXs.tolist(), parallelYs.tolist())),
+        )
@@ -0,0 +1,61 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from types import MappingProxyType
+
+from qgis.core import QgsProject
+
+from ..constants import singleton
+from .tomsMessageLog import TOMsMessageLog
+
+
+@singleton
+class TOMsProjectLayers:
+    """
+    Layers of the project by name, for the expression functions.
+
+    QgsProject.mapLayersByName must not be called from the render threads while the
+    project is changed on the main thread, so an immutable {name: layer} dictionary is
+    built whenever layers are added, removed or renamed, and only replaced as a whole.
+    Must be created from the main thread.
+    """
+
+    def __init__(self):
+        self.layersByName = MappingProxyType({})
+
+        project = QgsProject.instance()
+        project.layersAdded.connect(self.onLayersAdded)
+        project.layersRemoved.connect(self.refresh)
+        project.cleared.connect(self.refresh)
+
+        self.onLayersAdded(project.mapLayers().values())
+
+    def onLayersAdded(self, layers):
+        for layer in layers:
+            layer.nameChanged.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self, *args):
+        layersByName = {}
+        # as mapLayersByName(name)[0], i.e., the first layer with the name
+        for layer in QgsProject.instance().mapLayers().values():
+            layersByName.setdefault(layer.name(), layer)
+
+        self.layersByName = MappingProxyType(layersByName)
+
+        TOMsMessageLog.logMessage(
+            "In TOMsProjectLayers.refresh: {} layers".format(len(layersByName)),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+    def layer(self, name):
+        """Returns the layer with the given name, or None"""
+        return self.layersByName.get(name)
@@ -15,6 +15,7 @@ from qgis.core import (
     QgsFeatureRequest,
     QgsGeometry,
     QgsRectangle,
+    QgsVectorLayer,
 )
 from qgis.PyQt.QtCore import QObject
 from qgis.PyQt.QtWidgets import QMessageBox
@@ -23,9 +24,33 @@ from ..constants import ProposalStatus, RestrictionAction
 from ..utils import getRestrictionLayersList
 from .tomsMessageLog import TOMsMessageLog
 from .tomsProposalElement import ProposalElementFactory, TOMsProposalElement
+from .tomsProposalMembership import TOMsProposalMembership
+from .tomsRestrictionLayers import TOMsRestrictionLayers
 from .tomsTile import TOMsTile
 
 
+def restrictionsBoundingBox(layer, restrictionStr):
+    """
+    Bounding box of the restrictions of the layer with the given (quoted, comma
+    separated) RestrictionIDs - including those hidden by the layer filter, such as the
+    restrictions closed by a proposal. The features are read from a copy of the layer
+    without the filter, so the layer itself is neither changed nor reloaded.
+    """
+
+    unfilteredLayer = QgsVectorLayer(layer.source(), layer.name(), layer.providerType())
+    unfilteredLayer.setSubsetString("")
+
+    request = QgsFeatureRequest().setFilterExpression(
+        '"RestrictionID" IN ({restrictions})'.format(restrictions=restrictionStr)
+    )
+    request.setNoAttributes()
+
+    boundingBox = QgsRectangle()
+    for restriction in unfilteredLayer.getFeatures(request):
+        boundingBox.combineExtentWith(restriction.geometry().boundingBox())
+    return boundingBox
+
+
 class TOMsProposal(QObject):
     """Class to represent a proposal"""
 
@@ -35,7 +60,7 @@ class TOMsProposal(QObject):
         QObject.__init__(self)
         TOMsMessageLog.logMessage("In TOMsProposal:init. ... ", level=Qgis.Info)
         self.thisProposal = None
-        self.restrictionsInProposals = None
+        self.membership = None
         self.proposalsManager = proposalsManager
 
         self.setProposalsLayer()
@@ -81,6 +106,11 @@ class TOMsProposal(QObject):
         self.thisProposalNr = proposalID
         self.setProposalsLayer()
 
+        # the restrictions of the proposal are read again on next use
+        if self.membership is not None:
+            self.membership.disconnect()
+            self.membership = None
+
         if proposalID is not None:
             request = QgsFeatureRequest().setFilterExpression(
                 f'"ProposalID" = {proposalID}'
@@ -180,37 +210,13 @@ class TOMsProposal(QObject):
     ):
         # Will return a list of restrictions within a Proposal subject to actionOnAcceptance
 
-        self.restrictionsInProposals = self.proposalsManager.tableNames.getLayer(
-            "RestrictionsInProposals"
-        )
-
-        query = (
-            '"ProposalID" = {proposalID} AND "RestrictionTableID" = {layerID}'
-        ).format(proposalID=str(self.thisProposalNr), layerID=str(layerID))
-
-        if actionOnAcceptance is not None:
-            query = (
-                f'{query} AND "ActionOnProposalAcceptance" = {actionOnAcceptance.value}'
+        if self.membership is None:
+            self.membership = TOMsProposalMembership(
+                self.proposalsManager.tableNames.getLayer("RestrictionsInProposals"),
+                self.thisProposalNr,
             )
 
-        TOMsMessageLog.logMessage(
-            "In __getRestrictionsInProposalForLayerForAction. query: " + str(query),
-            level=Qgis.Info,
-        )
-        request = QgsFeatureRequest().setFilterExpression(query)
-
-        restrictionList = []
-        for restrictionInProposalDetails in self.restrictionsInProposals.getFeatures(
-            request
-        ):
-            restrictionList.append(
-                [
-                    restrictionInProposalDetails["RestrictionID"],
-                    restrictionInProposalDetails,
-                ]
-            )
-
-        return restrictionList
+        return self.membership.getRestrictionsForLayer(layerID, actionOnAcceptance)
 
     def getProposalBoundingBox(self):
 
@@ -221,11 +227,13 @@ class TOMsProposal(QObject):
 
         if currProposalID > 0:  # need to consider a proposal
 
-            for (layerID, layerName) in getRestrictionLayersList(
+            restrictionLayers = TOMsRestrictionLayers().getRestrictionLayers(
                 self.proposalsManager.tableNames
-            ):
-                currLayer = self.proposalsManager.tableNames.getLayer(layerName)
+            )
+            for layerID, layerName, currLayer, _ in restrictionLayers:
                 restrictionStr = self.__getRestrictionsListForLayerForAction(layerID)
+                if not restrictionStr:
+                    continue
                 TOMsMessageLog.logMessage(
                     "In getProposalBoundingBox. ({}) request: {}".format(
                         layerName, restrictionStr
@@ -233,43 +241,9 @@ class TOMsProposal(QObject):
                     level=Qgis.Info,
                 )
 
-                # currLayer.blockSignals(True)
-                # unset filter to get geometries of closed features
                 if currLayer:
-                    layerFilterString = currLayer.subsetString()
-                    TOMsMessageLog.logMessage(
-                        "In getProposalBoundingBox. ("
-                        + layerName
-                        + ") filter:"
-                        + layerFilterString,
-                        level=Qgis.Info,
-                    )
-                    if not currLayer.dataProvider().setSubsetString(None):
-                        TOMsMessageLog.logMessage(
-                            "In TOMsProposal:getProposalBoundingBox. ("
-                            + layerName
-                            + ") filter error ....",
-                            level=Qgis.Warning,
-                        )
-
-                    query = '"RestrictionID" IN ({restrictions})'.format(
-                        restrictions=restrictionStr
-                    )
-
-                    request = QgsFeatureRequest().setFilterExpression(query)
-                    for currRestriction in currLayer.getFeatures(request):
-                        geometryBoundingBox.combineExtentWith(
-                            currRestriction.geometry().boundingBox()
-                        )
-
-                    currLayer.dataProvider().setSubsetString(layerFilterString)
-                    # currLayer.blockSignals(False)
-                    TOMsMessageLog.logMessage(
-                        "In In TOMsProposal:getProposalBoundingBox. ("
-                        + currLayer.name()
-                        + ") filter 1:"
-                        + currLayer.subsetString(),
-                        level=Qgis.Info,
+                    geometryBoundingBox.combineExtentWith(
+                        restrictionsBoundingBox(currLayer, restrictionStr)
                     )
 
         return geometryBoundingBox
@@ -297,12 +271,12 @@ class TOMsProposal(QObject):
 
             # loop through all the layers that might have restrictions
 
-            for (layerID, layerName) in getRestrictionLayersList(
+            restrictionLayers = TOMsRestrictionLayers().getRestrictionLayers(
                 self.proposalsManager.tableNames
-            ):
+            )
+            for layerID, _, thisLayer, _ in restrictionLayers:
 
                 # clear filter
-                thisLayer = self.proposalsManager.tableNames.getLayer(layerName)
                 thisLayerProvider = thisLayer.dataProvider()
                 currFilter = thisLayerProvider.subsetString()
 
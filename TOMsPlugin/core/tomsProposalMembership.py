@@ -0,0 +1,119 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeatureRequest
+
+from .tomsMessageLog import TOMsMessageLog
+
+
+class TOMsProposalMembership:
+    """
+    The rows of RestrictionsInProposals for one proposal, grouped by restriction layer
+    (RestrictionTableID).
+
+    The rows are read in a single request on first use. Rows added to or deleted from the
+    layer (e.g., by addRestrictionToProposal/deleteRestrictionInProposal) are added to or
+    removed from the membership straight away; after any other change (attribute
+    change, commit, rollback) the rows are read again on next use.
+    """
+
+    REFRESH_SIGNALS = [
+        "attributeValueChanged",
+        "afterCommitChanges",
+        "afterRollBack",
+        "dataChanged",
+    ]
+
+    def __init__(self, restrictionsInProposalsLayer, proposalID):
+        self.layer = restrictionsInProposalsLayer
+        self.proposalID = proposalID
+        self.restrictionsByLayerID = None  # {RestrictionTableID: {fid: feature}}
+        self.loads = 0
+
+        if self.layer is not None:
+            self.layer.featureAdded.connect(self.onFeatureAdded)
+            self.layer.featureDeleted.connect(self.onFeatureDeleted)
+            for signalName in self.REFRESH_SIGNALS:
+                getattr(self.layer, signalName).connect(self.invalidate)
+
+    def disconnect(self):
+        """Stops following the edits of the layer (when the proposal changes)"""
+
+        if self.layer is None:
+            return
+        self.layer.featureAdded.disconnect(self.onFeatureAdded)
+        self.layer.featureDeleted.disconnect(self.onFeatureDeleted)
+        for signalName in self.REFRESH_SIGNALS:
+            getattr(self.layer, signalName).disconnect(self.invalidate)
+        self.layer = None
+        self.restrictionsByLayerID = None
+
+    def load(self):
+        self.restrictionsByLayerID = {}
+        self.loads += 1
+        if self.layer is None:
+            return
+
+        request = QgsFeatureRequest().setFilterExpression(
+            f'"ProposalID" = {self.proposalID}'
+        )
+        nrRows = 0
+        for restrictionInProposal in self.layer.getFeatures(request):
+            self.addRow(restrictionInProposal)
+            nrRows += 1
+
+        TOMsMessageLog.logMessage(
+            "In TOMsProposalMembership.load: proposal %s (%s rows)",
+            self.proposalID,
+            nrRows,
+            level=TOMsMessageLog.DEBUG,
+        )
+
+    def addRow(self, restrictionInProposal):
+        layerID = restrictionInProposal["RestrictionTableID"]
+        self.restrictionsByLayerID.setdefault(layerID, {})[
+            restrictionInProposal.id()
+        ] = restrictionInProposal
+
+    def invalidate(self, *args):
+        self.restrictionsByLayerID = None
+
+    def onFeatureAdded(self, fid):
+        if self.restrictionsByLayerID is None:
+            return
+        restrictionInProposal = self.layer.getFeature(fid)
+        if restrictionInProposal["ProposalID"] == self.proposalID:
+            self.addRow(restrictionInProposal)
+
+    def onFeatureDeleted(self, fid):
+        if self.restrictionsByLayerID is None:
+            return
+        for restrictions in self.restrictionsByLayerID.values():
+            restrictions.pop(fid, None)
+
+    def getRestrictionsForLayer(self, layerID, actionOnAcceptance=None):
+        """
+        Returns a list of [RestrictionID, RestrictionsInProposals feature] for the
+        layer, for the given action (RestrictionAction) or all actions
+        """
+
+        if self.restrictionsByLayerID is None:
+            self.load()
+
+        return [
+            [restrictionInProposal["RestrictionID"], restrictionInProposal]
+            for restrictionInProposal in self.restrictionsByLayerID.get(
+                layerID, {}
+            ).values()
+            if actionOnAcceptance is None
+            or restrictionInProposal["ActionOnProposalAcceptance"]
+            == actionOnAcceptance.value
+        ]
@@ -0,0 +1,125 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import os
+import time
+from collections import deque
+
+from qgis.core import Qgis
+from qgis.PyQt.QtCore import QObject, QTimer
+
+from .tomsMessageLog import TOMsMessageLog
+
+
+class TOMsRefreshScheduler(QObject):
+    """
+    Applies the filters of the restriction layers for the current date and proposal,
+    and refreshes the map canvas.
+
+    Changes of date or proposal made in quick succession (e.g., stepping through the
+    dates) are applied together, once no change has been made for DEFAULT_DELAY ms (or
+    the environment variable TOMs_REFRESH_DELAY). A layer is only reloaded if its filter
+    has changed, and the canvas is refreshed once. The number of layer reloads of each
+    refresh is logged and kept in history.
+    """
+
+    DEFAULT_DELAY = 250  # ms
+    HISTORY_SIZE = 50
+
+    def __init__(self, proposalsManager, canvas):
+        QObject.__init__(self)
+
+        self.proposalsManager = proposalsManager
+        self.canvas = canvas
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(
+            int(os.environ.get("TOMs_REFRESH_DELAY", self.DEFAULT_DELAY))
+        )
+        self.timer.timeout.connect(self.flush)
+
+        self.pendingReasons = []
+        self.zoomToProposal = False
+        self.reloads = 0
+        self.history = deque(maxlen=self.HISTORY_SIZE)
+
+    def scheduleRefresh(self, reason, zoomToProposal=False):
+        """Refreshes once no other change has been scheduled for the delay"""
+
+        self.pendingReasons.append(reason)
+        self.zoomToProposal = self.zoomToProposal or zoomToProposal
+        self.timer.start()
+
+    def isPending(self):
+        return self.timer.isActive()
+
+    def cancel(self):
+        self.timer.stop()
+        self.pendingReasons = []
+        self.zoomToProposal = False
+
+    def flush(self, reason=None):
+        """Refreshes now, including any scheduled changes"""
+
+        self.timer.stop()
+        reasons, self.pendingReasons = self.pendingReasons, []
+        if reason is not None:
+            reasons.append(reason)
+        zoomToProposal, self.zoomToProposal = self.zoomToProposal, False
+
+        return self.refresh(reasons, zoomToProposal)
+
+    def refresh(self, reasons, zoomToProposal):
+        startTime = time.perf_counter()
+        self.reloads = 0
+
+        status = self.proposalsManager.applyRestrictionFilters()
+
+        if zoomToProposal:
+            box = self.proposalsManager.currentProposalObject().getProposalBoundingBox()
+            if not box.isNull() and self.canvas is not None:
+                self.canvas.setExtent(box)
+
+        if self.canvas is not None:
+            self.canvas.refresh()
+
+        record = {
+            "reasons": reasons,
+            "reloads": self.reloads,
+            "seconds": time.perf_counter() - startTime,
+        }
+        self.history.append(record)
+
+        TOMsMessageLog.logMessage(
+            "In TOMsRefreshScheduler.refresh (%s): %s layer reloads in %.3f s",
+            ", ".join(reasons),
+            record["reloads"],
+            record["seconds"],
+            level=Qgis.Info,
+        )
+
+        return status
+
+    def setSubsetString(self, layer, subsetString):
+        """
+        Sets the filter of the layer's provider, if it has changed - which reloads the
+        layer. The layer is redrawn on the next canvas refresh.
+        """
+
+        provider = layer.dataProvider()
+        if (provider.subsetString() or "") == (subsetString or ""):
+            return True
+
+        self.reloads += 1
+        status = provider.setSubsetString(subsetString)
+        layer.triggerRepaint(True)
+        return status
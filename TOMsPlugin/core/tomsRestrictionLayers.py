@@ -0,0 +1,143 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from typing import NamedTuple, Optional, Tuple
+
+from qgis.core import Qgis, QgsProject, QgsVectorLayer
+
+from ..constants import singleton
+from .tomsMessageLog import TOMsMessageLog
+
+# layers with the label positions and the label leaders of each restriction layer
+LABEL_POSITION_LAYER_NAMES = {
+    "Bays": ["Bays.label_pos"],
+    "Lines": ["Lines.label_pos", "Lines.label_loading_pos"],
+    "Signs": [],
+    "RestrictionPolygons": ["RestrictionPolygons.label_pos"],
+    "CPZs": ["CPZs.label_pos"],
+    "ParkingTariffAreas": ["ParkingTariffAreas.label_pos"],
+}
+LABEL_LEADER_LAYER_NAMES = {
+    "Bays": ["Bays.label_ldr"],
+    "Lines": ["Lines.label_ldr", "Lines.label_loading_ldr"],
+    "Signs": [],
+    "RestrictionPolygons": ["RestrictionPolygons.label_ldr"],
+    "CPZs": ["CPZs.label_ldr"],
+    "ParkingTariffAreas": ["ParkingTariffAreas.label_ldr"],
+}
+
+
+def getLabelLayerNames(layerName):
+    """Names of the label position and label leader layers of a restriction layer"""
+    return LABEL_POSITION_LAYER_NAMES.get(layerName, []) + LABEL_LEADER_LAYER_NAMES.get(
+        layerName, []
+    )
+
+
+class TOMsRestrictionLayer(NamedTuple):
+    """A restriction layer (a row of RestrictionLayers) and its label layers"""
+
+    code: int
+    name: str
+    layer: Optional[QgsVectorLayer]
+    labelLayers: Tuple[QgsVectorLayer, ...]
+
+
+@singleton
+class TOMsRestrictionLayers:
+    """
+    The restriction layers (from the RestrictionLayers table) with their label layers.
+
+    Built when TOMs is opened and again, on next use, after layers have been added to or
+    removed from the project.
+    """
+
+    def __init__(self):
+        self.tableNames = None
+        self.restrictionLayers = None
+
+        QgsProject.instance().layersAdded.connect(self.invalidate)
+        QgsProject.instance().layersRemoved.connect(self.invalidate)
+        QgsProject.instance().cleared.connect(self.invalidate)
+
+    def invalidate(self, *args):
+        self.restrictionLayers = None
+
+    def build(self, tableNames):
+        self.tableNames = tableNames
+        project = QgsProject.instance()
+
+        restrictionLayers = []
+        for layerType in tableNames.getLayer("RestrictionLayers").getFeatures():
+            layerName = layerType["RestrictionLayerName"]
+
+            layer = tableNames.getLayer(layerName)
+            if layer is None:
+                TOMsMessageLog.logMessage(
+                    "In TOMsRestrictionLayers.build: layer %s not found",
+                    layerName,
+                    level=Qgis.Warning,
+                )
+
+            labelLayers = []
+            for labelLayerName in getLabelLayerNames(layerName):
+                labelLayer = project.mapLayersByName(labelLayerName)
+                if labelLayer:
+                    labelLayers.append(labelLayer[0])
+                else:
+                    TOMsMessageLog.logMessage(
+                        "In TOMsRestrictionLayers.build: label layer %s not found",
+                        labelLayerName,
+                        level=Qgis.Warning,
+                    )
+
+            restrictionLayers.append(
+                TOMsRestrictionLayer(
+                    layerType["Code"], layerName, layer, tuple(labelLayers)
+                )
+            )
+
+        self.restrictionLayers = restrictionLayers
+
+        TOMsMessageLog.logMessage(
+            "In TOMsRestrictionLayers.build: %s restriction layers",
+            len(restrictionLayers),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+        return restrictionLayers
+
+    def getRestrictionLayers(self, tableNames=None):
+        """Returns the list of TOMsRestrictionLayer, building it if needed"""
+
+        if tableNames is not None and tableNames is not self.tableNames:
+            return self.build(tableNames)
+        if self.restrictionLayers is None:
+            return self.build(self.tableNames)
+        return self.restrictionLayers
+
+    def getLayerList(self, tableNames=None):
+        """
+        Returns a list of [code, layer name] for the restriction layers and then for
+        their label layers
+        """
+
+        restrictionLayers = self.getRestrictionLayers(tableNames)
+        layerList = [
+            [restrictionLayer.code, restrictionLayer.name]
+            for restrictionLayer in restrictionLayers
+        ]
+        for restrictionLayer in restrictionLayers:
+            layerList.extend(
+                [restrictionLayer.code, labelLayer.name()]
+                for labelLayer in restrictionLayer.labelLayers
+            )
+        return layerList
@@ -0,0 +1,180 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import math
+
+
+def segmentIntersection(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    """
+    Returns the point (x, y) where segments a and b intersect, or None if they do not
+    intersect or if they overlap along a line (collinear)
+    """
+
+    rx = ax2 - ax1
+    ry = ay2 - ay1
+    sx = bx2 - bx1
+    sy = by2 - by1
+    qpx = bx1 - ax1
+    qpy = by1 - ay1
+
+    denom = rx * sy - ry * sx
+
+    if denom == 0.0:
+        if qpx * ry - qpy * rx != 0.0:
+            return None  # parallel
+
+        # collinear - only a single shared point counts as an intersection
+        rr = rx * rx + ry * ry
+        if rr == 0.0:
+            return None
+        t0 = (qpx * rx + qpy * ry) / rr
+        t1 = t0 + (sx * rx + sy * ry) / rr
+        tMin = max(min(t0, t1), 0.0)
+        tMax = min(max(t0, t1), 1.0)
+        if tMin != tMax:
+            return None
+        if tMin == 0.0:
+            return ax1, ay1
+        if tMin == 1.0:
+            return ax2, ay2
+        return None
+
+    t = (qpx * sy - qpy * sx) / denom
+    u = (qpx * ry - qpy * rx) / denom
+
+    if t < 0.0 or t > 1.0 or u < 0.0 or u > 1.0:
+        return None
+
+    # use the vertices where the segments touch
+    if u == 0.0:
+        return bx1, by1
+    if u == 1.0:
+        return bx2, by2
+    if t == 0.0:
+        return ax1, ay1
+    if t == 1.0:
+        return ax2, ay2
+    return ax1 + t * rx, ay1 + t * ry
+
+
+class SegmentGrid:
+    """Uniform grid over the segments of a line, for bounding box queries"""
+
+    def __init__(self, xs, ys):
+        self.xMin = min(xs)
+        self.yMin = min(ys)
+        width = max(xs) - self.xMin
+        height = max(ys) - self.yMin
+
+        nrSegments = len(xs) - 1
+        lineLength = sum(
+            math.hypot(xs[i + 1] - xs[i], ys[i + 1] - ys[i]) for i in range(nrSegments)
+        )
+        meanSegmentLength = lineLength / nrSegments
+        self.cellSize = max(
+            meanSegmentLength,
+            max(width, height) / math.sqrt(nrSegments),
+            1e-9,
+        )
+
+        self.cells = {}
+        for segmentNr in range(nrSegments):
+            for cell in self.cellsFor(
+                xs[segmentNr], ys[segmentNr], xs[segmentNr + 1], ys[segmentNr + 1]
+            ):
+                self.cells.setdefault(cell, []).append(segmentNr)
+
+    def cellsFor(self, x1, y1, x2, y2):
+        ixMin = int((min(x1, x2) - self.xMin) // self.cellSize)
+        ixMax = int((max(x1, x2) - self.xMin) // self.cellSize)
+        iyMin = int((min(y1, y2) - self.yMin) // self.cellSize)
+        iyMax = int((max(y1, y2) - self.yMin) // self.cellSize)
+        for ix in range(ixMin, ixMax + 1):
+            for iy in range(iyMin, iyMax + 1):
+                yield ix, iy
+
+    def candidates(self, x1, y1, x2, y2):
+        segmentNrs = set()
+        for cell in self.cellsFor(x1, y1, x2, y2):
+            segmentNrs.update(self.cells.get(cell, ()))
+        return segmentNrs
+
+
+def resolveSelfIntersections(xs, ys):
+    """
+    Removes the loops from a self-intersecting line, given as lists of coordinates.
+
+    Starting from the first vertex, the current segment is tested against the segments
+    further along the line. If it intersects one (other than along a collinear overlap),
+    the line jumps to the last such intersection and carries on along the intersected
+    segment. Candidates are found with a grid, so the cost is about linear for kerbs.
+
+    Returns the coordinates of the new line.
+    """
+
+    nrPts = len(xs)
+    if nrPts < 3:
+        return list(xs), list(ys)
+
+    grid = SegmentGrid(xs, ys)
+
+    newXs = [xs[0]]
+    newYs = [ys[0]]
+
+    currStartVertexNr = 0
+    currX = xs[0]
+    currY = ys[0]
+
+    while True:
+        endX = xs[currStartVertexNr + 1]
+        endY = ys[currStartVertexNr + 1]
+
+        intersectLineStartVertexNr = -1
+        nextPt = None
+
+        # the last intersected segment is the one used - so test from the end
+        for testVertexNr in sorted(
+            grid.candidates(currX, currY, endX, endY), reverse=True
+        ):
+            if testVertexNr <= currStartVertexNr:
+                break
+            intersectPt = segmentIntersection(
+                currX,
+                currY,
+                endX,
+                endY,
+                xs[testVertexNr],
+                ys[testVertexNr],
+                xs[testVertexNr + 1],
+                ys[testVertexNr + 1],
+            )
+            if intersectPt is not None:
+                intersectLineStartVertexNr = testVertexNr
+                nextPt = intersectPt
+                break
+
+        if intersectLineStartVertexNr > 0:
+            # intersect was found
+            currX, currY = nextPt
+            currStartVertexNr = intersectLineStartVertexNr
+        else:
+            currStartVertexNr = currStartVertexNr + 1
+            currX = xs[currStartVertexNr]
+            currY = ys[currStartVertexNr]
+
+        newXs.append(currX)
+        newYs.append(currY)
+
+        # check to see if the end point of the test line is the end of the line ...
+        if currStartVertexNr == nrPts - 1:
+            break
+
+    return newXs, newYs
@@ -0,0 +1,147 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import os
+from typing import NamedTuple, Optional
+
+from qgis.core import NULL, Qgis, QgsExpressionContextUtils, QgsProject
+from qgis.PyQt.QtCore import QFileSystemWatcher, QObject, pyqtSignal
+
+from ..constants import singleton
+from ..restrictionTypeUtilsClass import TOMsConfigFile
+from .tomsMessageLog import TOMsMessageLog
+
+
+class TOMsGeometrySettings(NamedTuple):
+    """Project variables and TOMs.conf items used when generating geometries and labels"""
+
+    bayWidth: Optional[float]
+    bayLength: Optional[float]
+    bayOffsetFromKerb: Optional[float]
+    lineOffsetFromKerb: Optional[float]
+    crossoverShapeWidth: Optional[float]
+    minimumTextDisplayScale: float
+    distanceForIcons: Optional[float]
+    iconPath: Optional[str]
+    showBayDivisions: bool
+    simplifiedGeometryScale: float
+
+
+@singleton
+class TOMsSettingsManager(QObject):
+    """
+    Holds a single, immutable TOMsGeometrySettings for the current project.
+
+    The snapshot is built when the plugin is loaded and rebuilt only when a project is
+    read or cleared, or when the project variables or the TOMs.conf file change. Must be
+    created from the main thread.
+    """
+
+    settingsChanged = pyqtSignal()
+    """ signal will be emitted when the project variables or the config file have changed """
+
+    DEFAULT_MINIMUM_TEXT_DISPLAY_SCALE = 1250.0
+    # scale from which bays are drawn without dividers and zig-zags as lines (0: never)
+    DEFAULT_SIMPLIFIED_GEOMETRY_SCALE = 5000.0
+
+    def __init__(self):
+        QObject.__init__(self)
+
+        self.configFileWatcher = QFileSystemWatcher()
+        self.configFileWatcher.fileChanged.connect(self.refresh)
+
+        QgsProject.instance().readProject.connect(self.refresh)
+        QgsProject.instance().cleared.connect(self.refresh)
+        QgsProject.instance().customVariablesChanged.connect(self.refresh)
+
+        self.currSettings = self.readSettings()
+
+    def settings(self):
+        # replaced as a whole on refresh, so safe to read from the render threads
+        return self.currSettings
+
+    def refresh(self, *args):
+        TOMsMessageLog.logMessage(
+            "In TOMsSettingsManager.refresh ...", level=TOMsMessageLog.DEBUG
+        )
+        self.currSettings = self.readSettings()
+        self.settingsChanged.emit()
+
+    @staticmethod
+    def floatValue(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def readSettings(self):
+        projectScope = QgsExpressionContextUtils.projectScope(QgsProject.instance())
+
+        minimumTextDisplayScale = self.floatValue(
+            projectScope.variable("MinimumTextDisplayScale")
+        )
+        if minimumTextDisplayScale is None:
+            minimumTextDisplayScale = self.DEFAULT_MINIMUM_TEXT_DISPLAY_SCALE
+
+        simplifiedGeometryScale = self.floatValue(
+            projectScope.variable("SimplifiedGeometryScale")
+        )
+        if simplifiedGeometryScale is None:
+            simplifiedGeometryScale = self.DEFAULT_SIMPLIFIED_GEOMETRY_SCALE
+
+        iconPath = projectScope.variable("iconPath")
+
+        currSettings = TOMsGeometrySettings(
+            bayWidth=self.floatValue(projectScope.variable("BayWidth")),
+            bayLength=self.floatValue(projectScope.variable("BayLength")),
+            bayOffsetFromKerb=self.floatValue(
+                projectScope.variable("BayOffsetFromKerb")
+            ),
+            lineOffsetFromKerb=self.floatValue(
+                projectScope.variable("LineOffsetFromKerb")
+            ),
+            crossoverShapeWidth=self.floatValue(
+                projectScope.variable("CrossoverShapeWidth")
+            ),
+            minimumTextDisplayScale=minimumTextDisplayScale,
+            distanceForIcons=self.floatValue(projectScope.variable("distanceForIcons")),
+            iconPath=None if iconPath == NULL else str(iconPath),
+            showBayDivisions=self.readShowBayDivisions(),
+            simplifiedGeometryScale=simplifiedGeometryScale,
+        )
+
+        TOMsMessageLog.logMessage(
+            "In TOMsSettingsManager.readSettings: {}".format(currSettings),
+            level=Qgis.Info,
+        )
+
+        return currSettings
+
+    def readShowBayDivisions(self):
+        configPath = TOMsConfigFile.getTOMsConfigPath()
+        if configPath == NULL:
+            return False
+
+        configFile = os.path.abspath(os.path.join(configPath, "TOMs.conf"))
+
+        # (re)watch the file - editors often replace it rather than rewriting it
+        if self.configFileWatcher.files():
+            self.configFileWatcher.removePaths(self.configFileWatcher.files())
+        if not os.path.isfile(configFile):
+            return False
+        self.configFileWatcher.addPath(configFile)
+
+        configFileObject = TOMsConfigFile()
+        configFileObject.readTOMsConfigFile(configFile)
+        return (
+            configFileObject.getTOMsConfigElement("TOMsLayers", "ShowBayDivisions")
+            == "True"
+        )
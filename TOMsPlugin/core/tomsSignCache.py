@@ -0,0 +1,87 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from typing import List, NamedTuple, Optional
+
+from qgis.core import NULL, QgsGeometry, QgsPointXY
+
+from ..constants import singleton
+from .tomsCache import TOMsLruCache
+from .tomsSettings import TOMsSettingsManager
+
+
+class TOMsSignBundle(NamedTuple):
+    """Everything the prepareSign* expressions need for one sign"""
+
+    orientation: Optional[float]  # as getSignOrientationList
+    signLine: Optional[QgsGeometry]
+    iconPoints: Optional[List[QgsPointXY]]  # one for each plate
+    iconPaths: Optional[List[str]]
+
+
+@singleton
+class TOMsSignCache(TOMsLruCache):
+    """
+    Bounded LRU cache of TOMsSignBundle, so that the nearest RoadCentreLine is only
+    searched once for a sign (rather than once for each of the prepareSign* expressions
+    and each plate).
+
+    Entries are keyed on the sign geometry, its attributes (orientation, plates,
+    original_geom_wkt, ...) and TOMsGeometrySettings, and hold the RoadCentreLine
+    snapshot they were computed with, so a changed sign or road simply misses. Signs
+    edited through TOMsTransaction are also removed explicitly (see invalidate).
+
+    The cache can be disabled for debugging by setting the environment variable
+    TOMs_DISABLE_SIGN_CACHE.
+    """
+
+    DISABLE_VARIABLE = "TOMs_DISABLE_SIGN_CACHE"
+    DEFAULT_MAX_SIZE = 20000
+    KEYED_ON_GEOMETRY_ID = True
+
+    @staticmethod
+    def fingerprint(feature):
+        """Returns the key used to store the sign bundle of feature"""
+
+        geom = feature.geometry()
+        try:
+            geometryID = feature.attribute("GeometryID")
+        except KeyError:
+            geometryID = None
+
+        return (
+            None if geometryID == NULL else str(geometryID),
+            bytes(geom.asWkb()) if geom else b"",
+            tuple(
+                None if value == NULL else str(value) for value in feature.attributes()
+            ),
+            TOMsSettingsManager().settings(),
+        )
+
+    def getBundle(self, feature, roadSnapshot, generator):
+        """
+        Returns the TOMsSignBundle for feature, calling generator() only if there is no
+        entry computed with the current roadSnapshot
+        """
+
+        if not self.enabled:
+            return generator()
+
+        key = self.fingerprint(feature)
+
+        entry = self.get(key, lambda entry: entry[0] is roadSnapshot)
+        if entry is not None:
+            return entry[1]
+
+        bundle = generator()
+        self.put(key, (roadSnapshot, bundle))
+
+        return bundle
@@ -0,0 +1,236 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import (
+    Qgis,
+    QgsDateTimeRange,
+    QgsInterval,
+    QgsLayoutItemMap,
+    QgsProject,
+    QgsTemporalNavigationObject,
+    QgsUnitTypes,
+    QgsVectorLayerTemporalProperties,
+)
+from qgis.PyQt.QtCore import QDate, QDateTime, QObject, QTime
+
+from .tomsMessageLog import TOMsMessageLog
+from .tomsRestrictionLayers import TOMsRestrictionLayers
+
+
+def dayRange(date):
+    """The day of date, as a temporal range"""
+    begin = QDateTime(date, QTime(0, 0))
+    return QgsDateTimeRange(begin, begin.addDays(1), True, False)
+
+
+class TOMsTemporalMode(QObject):
+    """
+    Shows the restrictions at the current date through the QGIS temporal framework
+    (TOMs.conf TemporalMode = True), rather than with the date in the layer filters.
+
+    The restriction layers (and their label layers) get OpenDate/CloseDate as temporal
+    properties, so the date is filtered by the provider for each render, and the layer
+    filters - which then only deal with the current proposal - do not change with the
+    date. The temporal controller steps through the dates one day at a time, and the
+    current date follows it (and the other way round). The maps of the print layouts
+    (which do not use the temporal range of the canvas) are given the current date as
+    their temporal range. The settings of the controller and of the maps are restored
+    when the mode is deactivated.
+    """
+
+    def __init__(self, proposalsManager, canvas):
+        QObject.__init__(self)
+
+        self.proposalsManager = proposalsManager
+        self.canvas = canvas
+        self.active = False
+        self.savedProperties = {}  # {layerID: (isActive, mode, startField, endField)}
+        self.savedController = None  # (navigationMode, temporalExtents, frameDuration)
+        self.savedLayoutMaps = {}  # {(layoutName, mapUuid): (isTemporal, range)}
+
+    def isActive(self):
+        return self.active
+
+    def activate(self):
+        if self.active:
+            return
+        self.active = True
+
+        restrictionLayers = TOMsRestrictionLayers().getRestrictionLayers(
+            self.proposalsManager.tableNames
+        )
+        for restrictionLayer in restrictionLayers:
+            for layer in (restrictionLayer.layer,) + restrictionLayer.labelLayers:
+                if layer is not None:
+                    self.setTemporalProperties(layer)
+
+        # the filters no longer include the date
+        self.proposalsManager.updateMapCanvas()
+
+        self.setUpController(restrictionLayers)
+        self.onDateChanged()
+
+        self.proposalsManager.dateChanged.connect(self.onDateChanged)
+        self.canvas.temporalRangeChanged.connect(self.onTemporalRangeChanged)
+        QgsProject.instance().layoutManager().layoutAdded.connect(self.onLayoutAdded)
+
+        TOMsMessageLog.logMessage(
+            "In TOMsTemporalMode.activate: %s layers",
+            len(self.savedProperties),
+            level=Qgis.Info,
+        )
+
+    def deactivate(self):
+        if not self.active:
+            return
+        self.active = False
+
+        self.proposalsManager.dateChanged.disconnect(self.onDateChanged)
+        self.canvas.temporalRangeChanged.disconnect(self.onTemporalRangeChanged)
+        QgsProject.instance().layoutManager().layoutAdded.disconnect(self.onLayoutAdded)
+
+        restrictionLayers = TOMsRestrictionLayers().getRestrictionLayers(
+            self.proposalsManager.tableNames
+        )
+        for restrictionLayer in restrictionLayers:
+            for layer in (restrictionLayer.layer,) + restrictionLayer.labelLayers:
+                if layer is not None and layer.id() in self.savedProperties:
+                    self.restoreTemporalProperties(layer)
+        self.savedProperties = {}
+
+        self.restoreController()
+        self.restoreLayoutTemporalRanges()
+
+        # the filters include the date again (unless they are cleared first)
+        self.proposalsManager.refreshScheduler.scheduleRefresh("temporal mode")
+
+    def setTemporalProperties(self, layer):
+        properties = layer.temporalProperties()
+        self.savedProperties[layer.id()] = (
+            properties.isActive(),
+            properties.mode(),
+            properties.startField(),
+            properties.endField(),
+        )
+
+        properties.setMode(
+            QgsVectorLayerTemporalProperties.ModeFeatureDateTimeStartAndEndFromFields
+        )
+        properties.setStartField("OpenDate")
+        properties.setEndField("CloseDate")
+        properties.setIsActive(True)
+
+    def restoreTemporalProperties(self, layer):
+        isActive, mode, startField, endField = self.savedProperties[layer.id()]
+        properties = layer.temporalProperties()
+        properties.setMode(mode)
+        properties.setStartField(startField)
+        properties.setEndField(endField)
+        properties.setIsActive(isActive)
+
+    def setUpController(self, restrictionLayers):
+        """Steps of one day, from the first OpenDate to a year from today"""
+
+        controller = self.canvas.temporalController()
+        if not isinstance(controller, QgsTemporalNavigationObject):
+            return
+
+        self.savedController = (
+            controller.navigationMode(),
+            controller.temporalExtents(),
+            controller.frameDuration(),
+        )
+
+        firstDate = QDate.currentDate()
+        for restrictionLayer in restrictionLayers:
+            if restrictionLayer.layer is None:
+                continue
+            fieldIndex = restrictionLayer.layer.fields().indexFromName("OpenDate")
+            if fieldIndex < 0:
+                continue
+            openDate = restrictionLayer.layer.minimumValue(fieldIndex)
+            if isinstance(openDate, QDate) and openDate.isValid():
+                firstDate = min(firstDate, openDate)
+
+        controller.setFrameDuration(QgsInterval(1, QgsUnitTypes.TemporalDays))
+        controller.setTemporalExtents(
+            QgsDateTimeRange(
+                QDateTime(firstDate, QTime(0, 0)),
+                QDateTime(QDate.currentDate().addYears(1), QTime(0, 0)),
+                True,
+                False,
+            )
+        )
+        controller.setNavigationMode(QgsTemporalNavigationObject.Animated)
+
+    def restoreController(self):
+        controller = self.canvas.temporalController()
+        if self.savedController is None or not isinstance(
+            controller, QgsTemporalNavigationObject
+        ):
+            return
+
+        navigationMode, temporalExtents, frameDuration = self.savedController
+        controller.setFrameDuration(frameDuration)
+        controller.setTemporalExtents(temporalExtents)
+        controller.setNavigationMode(navigationMode)
+        self.savedController = None
+
+    def layoutMaps(self):
+        """((layout name, map uuid), map) for the maps of the print layouts"""
+
+        for layout in QgsProject.instance().layoutManager().printLayouts():
+            for item in layout.items():
+                if isinstance(item, QgsLayoutItemMap):
+                    yield (layout.name(), item.uuid()), item
+
+    def setLayoutTemporalRanges(self, date):
+        for key, layoutMap in self.layoutMaps():
+            if key not in self.savedLayoutMaps:
+                self.savedLayoutMaps[key] = (
+                    layoutMap.isTemporal(),
+                    layoutMap.temporalRange(),
+                )
+            layoutMap.setIsTemporal(True)
+            layoutMap.setTemporalRange(dayRange(date))
+
+    def restoreLayoutTemporalRanges(self):
+        for key, layoutMap in self.layoutMaps():
+            if key in self.savedLayoutMaps:
+                isTemporal, temporalRange = self.savedLayoutMaps[key]
+                layoutMap.setIsTemporal(isTemporal)
+                layoutMap.setTemporalRange(temporalRange)
+        self.savedLayoutMaps = {}
+
+    def onLayoutAdded(self, name):
+        self.setLayoutTemporalRanges(self.proposalsManager.date())
+
+    def onDateChanged(self):
+        date = self.proposalsManager.date()
+        self.setLayoutTemporalRanges(date)
+
+        controller = self.canvas.temporalController()
+        if isinstance(controller, QgsTemporalNavigationObject):
+            frameStart = QDateTime(date, QTime(0, 0))
+            controller.setCurrentFrameNumber(
+                controller.findBestFrameNumberForFrameStart(frameStart)
+            )
+        else:
+            self.canvas.setTemporalRange(dayRange(date))
+
+    def onTemporalRangeChanged(self):
+        temporalRange = self.canvas.temporalRange()
+        if not temporalRange.begin().isValid():
+            return
+
+        date = temporalRange.begin().date()
+        if date != self.proposalsManager.date():
+            self.proposalsManager.setDate(date)
@@ -17,7 +17,9 @@ from qgis.PyQt.QtWidgets import QMessageBox
 from qgis.utils import iface
 
 from ..constants import singleton
+from .tomsGeometryCache import TOMsGeometryCache
 from .tomsMessageLog import TOMsMessageLog
+from .tomsSignCache import TOMsSignCache
 
 
 @singleton
@@ -114,6 +116,12 @@ class TOMsTransaction(QObject):
                     level=Qgis.Info,
                 )
                 layer.raiseError.connect(functools.partial(self.printRaiseError, layer))
+                layer.geometryChanged.connect(
+                    functools.partial(self.invalidateGeneratedGeometry, layer)
+                )
+                layer.attributeValueChanged.connect(
+                    functools.partial(self.invalidateGeneratedGeometry, layer)
+                )
 
             self.errorOccurred = False
 
@@ -154,6 +162,15 @@ class TOMsTransaction(QObject):
         self.errorOccurred = True
         self.errorMessage = message
 
+    def invalidateGeneratedGeometry(self, layer, fid, *args):
+        # the feature has been edited, so any display geometry cached for it is out of date
+        try:
+            geometryID = layer.getFeature(fid).attribute("GeometryID")
+        except KeyError:
+            return  # not a restriction layer
+        TOMsGeometryCache().invalidate(geometryID)
+        TOMsSignCache().invalidate(geometryID)
+
     def commitTransactionGroup(self):
 
         TOMsMessageLog.logMessage(
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsGeometry, QgsRectangle, QgsSpatialIndex
+
+from ..constants import singleton
+from .tomsLayerSnapshots import TOMsLayerSnapshots
+from .tomsLookupCache import TOMsLookupCache
+from .tomsMessageLog import TOMsMessageLog
+
+
+class TOMsZoneLayerIndex:
+    """
+    Spatial index, prepared geometries and attribute dictionaries for one zone layer
+    (CPZs, PTAs, ...).
+
+    Everything is built here, on the main thread, and never changed afterwards, so the
+    render threads read the index without a lock.
+    """
+
+    def __init__(self, layer):
+        self.featuresByID = {}
+        self.enginesByID = {}
+        self.spatialIndex = QgsSpatialIndex()
+
+        for feature in layer.getFeatures():
+            self.featuresByID[feature.id()] = QgsFeature(feature)
+            self.spatialIndex.addFeature(feature)
+
+            if feature.hasGeometry():
+                geometry = feature.geometry()
+                engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+                engine.prepareGeometry()
+                # GEOS builds the point locator of a prepared geometry on first use
+                pointOnSurface = geometry.pointOnSurface()
+                if not pointOnSurface.isNull():
+                    engine.contains(pointOnSurface.constGet())
+                self.enginesByID[feature.id()] = engine
+
+        self.fieldNames = layer.fields().names()
+
+        # the first zone, in the order of the layer, is returned for each value
+        self.featuresByAttribute = {fieldName: {} for fieldName in self.fieldNames}
+        for fid in sorted(self.featuresByID):
+            feature = self.featuresByID[fid]
+            for fieldName, features in self.featuresByAttribute.items():
+                key = TOMsLookupCache.codeKey(feature.attribute(fieldName))
+                if key is not None:
+                    features.setdefault(key, feature)
+
+    def getFeatureContaining(self, point):
+        pointGeom = QgsGeometry.fromPointXY(point)
+
+        # the first zone, in the order of the layer, is returned if zones overlap
+        for fid in sorted(self.spatialIndex.intersects(QgsRectangle(point, point))):
+            engine = self.enginesByID.get(fid)
+            if engine is not None and engine.contains(pointGeom.constGet()):
+                return self.featuresByID[fid]
+
+        return None
+
+    def getFeatureWithAttribute(self, fieldName, value):
+        features = self.featuresByAttribute.get(fieldName)
+        if features is None:
+            return None
+
+        return features.get(TOMsLookupCache.codeKey(value))
+
+
+@singleton
+class TOMsZoneResolver(TOMsLayerSnapshots):
+    """
+    Answers "which zone contains this restriction" and "which zone has this code" for
+    the zone layers (CPZs, ParkingTariffAreas, MatchDayEventDayZones, PayParkingAreas).
+
+    The index for a layer is built on the main thread (see TOMsLayerSnapshots) and
+    rebuilt whenever the layer is edited (zones are only editable when AllowZoneEditing
+    is set), committed, rolled back or reloaded, so answers always match the current
+    layer contents.
+    """
+
+    LAYER_NAMES = ["CPZs", "ParkingTariffAreas", "MatchDayEventDayZones"]
+
+    def buildSnapshot(self, layer):
+        index = TOMsZoneLayerIndex(layer)
+
+        TOMsMessageLog.logMessage(
+            "In TOMsZoneResolver.buildSnapshot: {} ({} zones)".format(
+                layer.name(), len(index.featuresByID)
+            ),
+            level=TOMsMessageLog.DEBUG,
+        )
+
+        return index
+
+    def getZoneContaining(self, layer, point):
+        """Returns the feature of layer containing point (in layer coordinates)"""
+
+        if layer is None or point is None:
+            return None
+
+        index = self.snapshot(layer)
+        if index is None:
+            return None
+        return index.getFeatureContaining(point)
+
+    def getZoneWithAttribute(self, layer, fieldName, value):
+        """Returns the (first) feature of layer with fieldName = value"""
+
+        if layer is None or TOMsLookupCache.codeKey(value) is None:
+            return None
+
+        index = self.snapshot(layer)
+        if index is None:
+            return None
+        return index.getFeatureWithAttribute(fieldName, value)
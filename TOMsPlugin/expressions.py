@@ -23,21 +23,14 @@ register=False in order to delay registring of functions before we load the plug
 
 """
 
-import math
-import random
 import sys
 import traceback
 
-from qgis.core import (
-    Qgis,
-    QgsExpression,
-    QgsGeometry,
-    QgsMessageLog,
-    QgsPointXY,
-)
+from qgis.core import Qgis, QgsExpression, QgsGeometry, QgsMessageLog
 from qgis.utils import qgsfunction
 
 from .constants import RestrictionGeometryTypes
+from .core.tomsDemandPoints import TOMsDemandPointCache
 from .core.tomsGeometryElement import ElementGeometryFactory
 from .core.tomsMessageLog import TOMsMessageLog
 from .generateGeometryUtils import GenerateGeometryUtils
@@ -57,6 +50,7 @@ class TOMsExpressions:
             self.generateZigZag,
             self.getWaitingLabelLeader,
             self.getLoadingLabelLeader,
+            self.getLabelLeaders,
             self.getBayLabelLeader,
             self.getPolygonLabelLeader,
             self.getWaitingRestrictionLabelText,
@@ -76,12 +70,15 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=True, register=True)
-    def generateDisplayGeometry(feature, parent):
+    def generateDisplayGeometry(feature, parent, context):
 
         res = None
 
         try:
-            res = ElementGeometryFactory.getElementGeometry(feature)
+            # simplified (without bay dividers, ...) at small scales
+            res = ElementGeometryFactory.getElementGeometry(
+                feature, scale=GenerateGeometryUtils.getCurrentScale(context)
+            )
 
         except Exception as e:
             TOMsMessageLog.logMessage(
@@ -90,10 +87,13 @@ class TOMsExpressions:
                 level=Qgis.Warning,
             )
 
-        TOMsMessageLog.logMessage(
-            f'generateDisplayGeometry: {feature.attribute("GeometryID")}:{res.asWkt()}',
-            level=TOMsMessageLog.DEBUG,
-        )
+        if res is not None and TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+            TOMsMessageLog.logMessage(
+                "generateDisplayGeometry: %s:%s",
+                feature.attribute("GeometryID"),
+                res.asWkt(),
+                level=TOMsMessageLog.DEBUG,
+            )
         return res
 
     @staticmethod
@@ -183,11 +183,15 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=True, register=True)
-    def generateZigZag(feature, parent):
+    def generateZigZag(feature, parent, context):
         # Determine road name from the kerb line layer
 
+        res = None
         try:
-            res = ElementGeometryFactory.getElementGeometry(feature)
+            # a straight line at small scales
+            res = ElementGeometryFactory.getElementGeometry(
+                feature, scale=GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "generate_ZigZag: error in expression function: {}".format(e),
@@ -227,12 +231,32 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=True, register=True)
-    def getBayLabelLeader(feature, parent):
+    def getLabelLeaders(feature, parent, context):
+        # For label layers (multipoint): a leader from each label position to the restriction (from "geom")
+
+        labelLeaderGeom = None
+        try:
+            labelLeaderGeom = GenerateGeometryUtils.generateMultiLabelLeaders(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
+        except Exception as e:
+            TOMsMessageLog.logMessage(
+                "getLabelLeaders: error in expression function: {}".format(e),
+                level=Qgis.Warning,
+            )
+
+        return labelLeaderGeom
+
+    @staticmethod
+    @qgsfunction(args="auto", group="TOMs2", usesgeometry=True, register=True)
+    def getBayLabelLeader(feature, parent, context):
         # If the scale is within range (< 1250) and the label has been moved, create a line
 
         # TOMsMessageLog.logMessage("In getBayLabelLeader ", level=Qgis.Info)
         try:
-            labelLeaderGeom = GenerateGeometryUtils.generateBayLabelLeader(feature)
+            labelLeaderGeom = GenerateGeometryUtils.generateBayLabelLeader(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getBayLabelLeader: error in expression function: {}".format(e),
@@ -243,12 +267,14 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=True, register=True)
-    def getPolygonLabelLeader(feature, parent):
+    def getPolygonLabelLeader(feature, parent, context):
         # If the scale is within range (< 1250) and the label has been moved, create a line
 
         # TOMsMessageLog.logMessage("In getBayLabelLeader ", level=Qgis.Info)
         try:
-            labelLeaderGeom = GenerateGeometryUtils.generatePolygonLabelLeader(feature)
+            labelLeaderGeom = GenerateGeometryUtils.generatePolygonLabelLeader(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getPolygonLabelLeader: error in expression function: {}".format(e),
@@ -258,7 +284,7 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=False, register=True)
-    def getWaitingRestrictionLabelText(feature, parent):
+    def getWaitingRestrictionLabelText(feature, parent, context):
         # Returns the text to label the feature
 
         TOMsMessageLog.logMessage(
@@ -272,7 +298,9 @@ class TOMsExpressions:
             (
                 waitingText,
                 loadingText,
-            ) = GenerateGeometryUtils.getWaitingLoadingRestrictionLabelText(feature)
+            ) = GenerateGeometryUtils.getWaitingLoadingRestrictionLabelText(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getWaitingRestrictionLabelText: error in expression function: {}".format(
@@ -308,7 +336,7 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=False, register=True)
-    def getLoadingRestrictionLabelText(feature, parent):
+    def getLoadingRestrictionLabelText(feature, parent, context):
         # Returns the text to label the feature
 
         TOMsMessageLog.logMessage(
@@ -322,7 +350,9 @@ class TOMsExpressions:
             (
                 waitingText,
                 loadingText,
-            ) = GenerateGeometryUtils.getWaitingLoadingRestrictionLabelText(feature)
+            ) = GenerateGeometryUtils.getWaitingLoadingRestrictionLabelText(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
 
             TOMsMessageLog.logMessage(
                 "In getLoadingRestrictionLabelText ****:"
@@ -352,7 +382,7 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=False, register=True)
-    def getBayTimePeriodLabelText(feature, parent):
+    def getBayTimePeriodLabelText(feature, parent, context):
         # Returns the text to label the feature
 
         # TOMsMessageLog.logMessage("In getBayTimePeriodLabelText:", level=Qgis.Info)
@@ -362,7 +392,9 @@ class TOMsExpressions:
                 _,
                 _,
                 timePeriodText,
-            ) = GenerateGeometryUtils.getBayRestrictionLabelText(feature)
+            ) = GenerateGeometryUtils.getBayRestrictionLabelText(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getBayTimePeriodLabelText: error in expression function: {}".format(e),
@@ -375,7 +407,7 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=False, register=True)
-    def getBayMaxStayLabelText(feature, parent):
+    def getBayMaxStayLabelText(feature, parent, context):
         # Returns the text to label the feature
 
         try:
@@ -384,7 +416,9 @@ class TOMsExpressions:
                 maxStayText,
                 _,
                 _,
-            ) = GenerateGeometryUtils.getBayRestrictionLabelText(feature)
+            ) = GenerateGeometryUtils.getBayRestrictionLabelText(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getBayMaxStayLabelText: error in expression function: {}".format(e),
@@ -397,7 +431,7 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=False, register=True)
-    def getBayNoReturnLabelText(feature, parent):
+    def getBayNoReturnLabelText(feature, parent, context):
         # Returns the text to label the feature
 
         # TOMsMessageLog.logMessage("In getBayNoReturnLabelText:", level=Qgis.Info)
@@ -406,7 +440,9 @@ class TOMsExpressions:
                 _,
                 noReturnText,
                 _,
-            ) = GenerateGeometryUtils.getBayRestrictionLabelText(feature)
+            ) = GenerateGeometryUtils.getBayRestrictionLabelText(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getBayNoReturnLabelText: error in expression function: {}".format(e),
@@ -417,7 +453,7 @@ class TOMsExpressions:
 
     @staticmethod
     @qgsfunction(args="auto", group="TOMs2", usesgeometry=False, register=True)
-    def getBayLabelText(feature, parent):
+    def getBayLabelText(feature, parent, context):
         # Returns the text to label the feature
 
         TOMsMessageLog.logMessage("In getBayLabelText:", level=TOMsMessageLog.DEBUG)
@@ -426,7 +462,9 @@ class TOMsExpressions:
                 maxStayText,
                 noReturnText,
                 timePeriodText,
-            ) = GenerateGeometryUtils.getBayRestrictionLabelText(feature)
+            ) = GenerateGeometryUtils.getBayRestrictionLabelText(
+                feature, GenerateGeometryUtils.getCurrentScale(context)
+            )
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "getBayLabelText: error in expression function: {}".format(e),
@@ -501,7 +539,9 @@ class TOMsExpressions:
     def prepareSignLine(feature, parent):
         newLineGeom = None
         try:
-            newLineGeom, _ = GenerateGeometryUtils.getGeneratedSignLine(feature)
+            signLine = GenerateGeometryUtils.getSignBundle(feature).signLine
+            if signLine is not None:
+                newLineGeom = QgsGeometry(signLine)
         except Exception as e:
             QgsMessageLog.logMessage("prepareSignLine {}".format(e), tag="TOMs Panel")
             excType, _, excTraceback = sys.exc_info()
@@ -520,7 +560,7 @@ class TOMsExpressions:
 
         linePts = []
         try:
-            _, linePts = GenerateGeometryUtils.getGeneratedSignLine(feature)
+            linePts = GenerateGeometryUtils.getSignBundle(feature).iconPoints
         except Exception as e:
             QgsMessageLog.logMessage(
                 "prepareSignIconLocation {}".format(e), tag="TOMs Panel"
@@ -541,7 +581,7 @@ class TOMsExpressions:
     def prepareSignIcon(signNr, feature, parent):
         iconNames = []
         try:
-            iconNames = GenerateGeometryUtils.getSignIcons(feature)
+            iconNames = GenerateGeometryUtils.getSignBundle(feature).iconPaths
         except Exception as e:
             QgsMessageLog.logMessage("prepareSignIcon {}".format(e), tag="TOMs Panel")
             _, _, excTraceback = sys.exc_info()
@@ -559,7 +599,7 @@ class TOMsExpressions:
     def prepareSignOrientation(feature, parent):
         signOrientation = 0
         try:
-            signOrientation = GenerateGeometryUtils.getSignOrientationList(feature)
+            signOrientation = GenerateGeometryUtils.getSignBundle(feature).orientation
         except Exception as e:
             QgsMessageLog.logMessage(
                 "prepareSignOrientation {}".format(e), tag="TOMs Panel"
@@ -575,107 +615,21 @@ class TOMsExpressions:
     @staticmethod
     @qgsfunction(args="auto", group="TOMsDemand", usesgeometry=False, register=True)
     def generateDemandPoints(feature, parent):
-        # Returns the location of points representing demand
+        # Returns the location of points representing demand (see TOMsDemandPointCache)
 
         TOMsMessageLog.logMessage(
             "generateDemandPoints: {}".format(feature.attribute("GeometryID")),
             level=TOMsMessageLog.DEBUG,
         )
 
-        demand = math.ceil(float(feature.attribute("Demand")))
-
-        TOMsMessageLog.logMessage(
-            "generateDemandPoints: demand: {}".format(demand),
-            level=TOMsMessageLog.DEBUG,
-        )
-
-        if demand == 0:
-            return None
-
-        capacity = int(feature.attribute("NrBays"))
-
-        nrSpaces = capacity - demand
-        nrSpaces = max(nrSpaces, 0)
-
-        TOMsMessageLog.logMessage(
-            "generateDemandPoints: capacity: {}; nrSpaces: {}; demand: {}".format(
-                capacity, nrSpaces, demand
-            ),
-            level=TOMsMessageLog.DEBUG,
-        )
-
-        # now get geometry for demand locations
-
         try:
-            # geomShowingSpaces = ElementGeometryFactory.getElementGeometry(newFeature)
-            # TODO: for some reason the details from newFeature are not "saved" and used
-            # geomShowingSpaces = ElementGeometryFactory.getElementGeometry(feature, currGeomShapeID)
-            geomShowingSpaces = ElementGeometryFactory.getElementGeometry(feature)
+            return TOMsDemandPointCache().getDemandPoints(feature)
         except Exception as e:
             TOMsMessageLog.logMessage(
                 "generateDemandPoints: error in expression function: {}".format(e),
                 level=Qgis.Warning,
             )
-            return None
-
-        random.seed(
-            1234
-        )  # need to ramdomise, but it needs to be repeatable?!?, i.e., when you pan, they stay in the same place
-        listBaysToDelete = []
-        listBaysToDelete = random.sample(range(capacity), k=math.ceil(nrSpaces))
-
-        # deal with split geometries - half on/half off
-        if feature.attribute("GeomShapeID") == 22:
-            for i in range(
-                capacity, (capacity * 2)
-            ):  # NB: range stops one before end ...
-                listBaysToDelete.append(i)
-
-        TOMsMessageLog.logMessage(
-            "generateDemandPoints: bays to delete {}".format(listBaysToDelete),
-            level=TOMsMessageLog.DEBUG,
-        )
-
-        centroidGeomList = []
-        counter = 0
-        for polygonGeom in geomShowingSpaces.parts():
-            TOMsMessageLog.logMessage(
-                "generateDemandPoints: considering part {}".format(counter),
-                level=TOMsMessageLog.DEBUG,
-            )
-            if counter not in listBaysToDelete:
-                centrePt = QgsPointXY(polygonGeom.centroid())
-                TOMsMessageLog.logMessage(
-                    "generateDemandPoints: adding centroid for {}: {}".format(
-                        counter, centrePt.asWkt()
-                    ),
-                    level=TOMsMessageLog.DEBUG,
-                )
-                try:
-                    centroidGeomList.append(centrePt)
-                except Exception as e:
-                    TOMsMessageLog.logMessage(
-                        "generateDemandPoints: error adding centroid for counter {}: {}".format(
-                            counter, e
-                        ),
-                        level=Qgis.Warning,
-                    )
-            counter = counter + 1
-
-        TOMsMessageLog.logMessage(
-            "generateDemandPoints: nrDemandPoints {}".format(len(centroidGeomList)),
-            level=TOMsMessageLog.DEBUG,
-        )
-
-        try:
-            demandPoints = QgsGeometry.fromMultiPointXY(centroidGeomList)
-        except Exception as e:
-            TOMsMessageLog.logMessage(
-                "generateDemandPoints: error creating final geom: {}".format(e),
-                level=Qgis.Warning,
-            )
-
-        return demandPoints
+        return None
 
     def registerFunctions(self):
         tomsList = QgsExpression.Functions()
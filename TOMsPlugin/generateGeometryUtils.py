@@ -14,21 +14,28 @@ import os.path
 from cmath import phase, rect
 
 from qgis.core import (
+    NULL,
     Qgis,
-    QgsExpressionContextUtils,
     QgsFeatureRequest,
     QgsGeometry,
     QgsGeometryUtils,
     QgsPoint,
     QgsPointXY,
-    QgsProject,
-    QgsRectangle,
     QgsWkbTypes,
 )
-from qgis.PyQt.QtCore import QObject
+from qgis.PyQt.QtCore import QByteArray, QObject
 from qgis.utils import iface
 
+from .core.tomsLabelCache import TOMsLabelCache
+from .core.tomsLayerSnapshots import isMainThread
+from .core.tomsLineWalker import TOMsLineWalker
+from .core.tomsLookupCache import TOMsLookupCache
 from .core.tomsMessageLog import TOMsMessageLog
+from .core.tomsNearestLineIndex import TOMsNearestLineIndex
+from .core.tomsProjectLayers import TOMsProjectLayers
+from .core.tomsSettings import TOMsSettingsManager
+from .core.tomsSignCache import TOMsSignBundle, TOMsSignCache
+from .core.tomsZoneResolver import TOMsZoneResolver
 from .utils import getLookupDescription
 
 
@@ -146,13 +153,13 @@ class GenerateGeometryUtils(QObject):
 
         TOMsMessageLog.logMessage("In determineRoadName(helper):", level=TOMsMessageLog.DEBUG)
 
-        roadCasementLayer = QgsProject.instance().mapLayersByName("RoadCasement")[0]
+        roadCasementLayer = TOMsProjectLayers().layer("RoadCasement")
 
         # take the first point from the geometry
-        TOMsMessageLog.logMessage(
-            "In determineRoadName: {}".format(feature.geometry().asWkt()),
-            level=TOMsMessageLog.DEBUG,
-        )
+        if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+            TOMsMessageLog.logMessage(
+                "In determineRoadName: %s", feature.geometry().asWkt(), level=TOMsMessageLog.DEBUG
+            )
 
         geom = feature.geometry()
 
@@ -175,8 +182,9 @@ class GenerateGeometryUtils(QObject):
 
                 # testPt = line[0]
                 length = geom.length()
-                testPtGeom = geom.interpolate(length / 2.0)
-                testPt = testPtGeom.asPoint()
+                testPt = TOMsLineWalker(geom).pointAt(length / 2.0)
+                if testPt is None:
+                    return None, None
                 TOMsMessageLog.logMessage(
                     "In determineRoadName: GeometryID: {}. Length: {}. {}".format(
                         feature.attribute("GeometryID"), length, length / 2.0
@@ -292,7 +300,7 @@ class GenerateGeometryUtils(QObject):
 
         TOMsMessageLog.logMessage("In calculateAzimuthToRoadCentreLine(helper):", level=TOMsMessageLog.DEBUG)
 
-        roadCentreLineLayer = QgsProject.instance().mapLayersByName("RoadCentreLine")[0]
+        roadCentreLineLayer = TOMsProjectLayers().layer("RoadCentreLine")
 
         # take the a point from the geometry
         # line = feature.geometry().asPolyline()
@@ -306,42 +314,19 @@ class GenerateGeometryUtils(QObject):
 
         testPt = feature.geometry().centroid().asPoint()
 
-        # Find all Road Centre Line features within a "reasonable" distance
-        # and then check each one to find the shortest distance
+        # Find the nearest Road Centre Line within a "reasonable" distance
 
         toleranceRoadwidth = 25
-        searchRect = QgsRectangle(
-            testPt.x() - toleranceRoadwidth,
-            testPt.y() - toleranceRoadwidth,
-            testPt.x() + toleranceRoadwidth,
-            testPt.y() + toleranceRoadwidth,
-        )
-
-        request = QgsFeatureRequest()
-        request.setFilterRect(searchRect)
-        request.setFlags(QgsFeatureRequest.ExactIntersect)
-
-        shortestDistance = float("inf")
-        featureFound = False
+        nearestLine = TOMsNearestLineIndex().nearestLine(roadCentreLineLayer, testPt, toleranceRoadwidth)
 
-        # Loop through all features in the layer to find the closest feature
-        for feat in roadCentreLineLayer.getFeatures(request):
-            dist = feat.geometry().distance(QgsGeometry.fromPointXY(testPt))
-            if dist < shortestDistance:
-                shortestDistance = dist
-                closestFeature = feat
-                featureFound = True
-
-        TOMsMessageLog.logMessage(
-            "In calculateAzimuthToRoadCentreLine: shortestDistance: " + str(shortestDistance),
-            level=TOMsMessageLog.DEBUG,
-        )
+        if nearestLine:
+            TOMsMessageLog.logMessage(
+                "In calculateAzimuthToRoadCentreLine: shortestDistance: " + str(nearestLine.distance),
+                level=TOMsMessageLog.DEBUG,
+            )
 
-        if featureFound:
             # now obtain the line between the testPt and the nearest feature
-            startPt = QgsPoint(
-                QgsGeometry.asPoint(closestFeature.geometry().nearestPoint(QgsGeometry.fromPointXY(testPt)))
-            )
+            startPt = QgsPoint(nearestLine.point)
 
             TOMsMessageLog.logMessage(
                 "In calculateAzimuthToRoadCentreLine: startPoint: " + str(startPt.x()),
@@ -513,11 +498,55 @@ class GenerateGeometryUtils(QObject):
         return phase((rect(1, angle1) + rect(1, angle2)) / 2.0)
 
     @staticmethod
-    def generateMultiLabelLeaders(feature):
+    def readParentGeometry(value):
+        """
+        Returns the QgsGeometry for the "geom" attribute of a label layer feature, given
+        as a geometry, as WKB (QByteArray/bytes) or as (e)WKT
+        """
+
+        if isinstance(value, QgsGeometry):
+            return QgsGeometry(value)
+
+        if isinstance(value, (QByteArray, bytes, bytearray)):
+            geom = QgsGeometry()
+            geom.fromWkb(bytes(value))
+            return geom
+
+        if value is None or value == NULL:
+            return QgsGeometry()
+
+        # eWKT, e.g. "SRID=27700;LINESTRING(...)"
+        wkt = str(value)
+        return QgsGeometry.fromWkt(wkt[wkt.find(";") + 1 :])
+
+    @staticmethod
+    def getParentGeometry(feature):
+        """
+        Returns the main geometry of a label layer feature. It is read once per render
+        pass for each restriction and geometry (and shared by its label layers, e.g.
+        waiting and loading)
+        """
+
+        value = feature.attribute("geom")
+        try:
+            parentID = feature.attribute("GeometryID")
+        except KeyError:
+            parentID = None
+        if parentID is None or parentID == NULL:
+            return GenerateGeometryUtils.readParentGeometry(value)
+
+        return TOMsLabelCache().getRenderValue(
+            ("ParentGeometry", str(parentID), hash(str(value))),
+            lambda: GenerateGeometryUtils.readParentGeometry(value),
+        )
+
+    @staticmethod
+    def generateMultiLabelLeaders(feature, currScale=None):
         """This generates leaders for labels as multipoints"""
 
         minScale = float(GenerateGeometryUtils.getMininumScaleForDisplay())
-        currScale = float(iface.mapCanvas().scale())
+        if currScale is None:
+            currScale = GenerateGeometryUtils.getCurrentScale()
 
         if currScale <= minScale:
 
@@ -525,10 +554,9 @@ class GenerateGeometryUtils(QObject):
             labelGeometry = feature.geometry().asMultiPoint()
 
             # we need to get the main geometry too
-            # unfortunately, the attribute returns an eWKT instead of a QgsGeometry (see post on qgis-dev 22/04/2020)
-            mainEwkt = feature.attribute("geom")
-            mainWkt = mainEwkt[mainEwkt.index(";") + 1 :]
-            mainGeom = QgsGeometry.fromWkt(mainWkt)
+            mainGeom = GenerateGeometryUtils.getParentGeometry(feature)
+            if mainGeom.isEmpty():
+                return None
 
             # we build a collection for the leaders
             leaders = []
@@ -541,13 +569,28 @@ class GenerateGeometryUtils(QObject):
         return None
 
     @staticmethod
-    def generateBayLabelLeader(feature):
+    def getLineMidPoint(feature):
+        """Returns the midpoint of the (kerb) line of feature (or None), once per render pass"""
+
+        geom = feature.geometry()
+
+        def calculateMidPoint():
+            return TOMsLineWalker(geom).pointAt(geom.length() / 2.0)
+
+        return TOMsLabelCache().getRenderValue(
+            ("MidPoint", feature.id(), str(feature.attribute("GeometryID")), hash(bytes(geom.asWkb()))),
+            calculateMidPoint,
+        )
+
+    @staticmethod
+    def generateBayLabelLeader(feature, currScale=None):
 
         # TOMsMessageLog.logMessage("In generateBayLabelLeader", level=TOMsMessageLog.DEBUG)
         # check to see scale
 
         minScale = float(GenerateGeometryUtils.getMininumScaleForDisplay())
-        currScale = float(iface.mapCanvas().scale())
+        if currScale is None:
+            currScale = GenerateGeometryUtils.getCurrentScale()
 
         TOMsMessageLog.logMessage(
             "In generateBayLabelLeader. Current scale: " + str(currScale) + " min scale: " + str(minScale),
@@ -558,15 +601,18 @@ class GenerateGeometryUtils(QObject):
 
             if feature.attribute("label_X"):
 
-                length = feature.geometry().length()
                 TOMsMessageLog.logMessage(
                     "In generateBayLabelLeader. label_X set for " + str(feature.attribute("GeometryID")),
                     level=TOMsMessageLog.DEBUG,
                 )
 
+                midPoint = GenerateGeometryUtils.getLineMidPoint(feature)
+                if midPoint is None:
+                    return None
+
                 return QgsGeometry.fromPolyline(
                     [
-                        QgsPoint(feature.geometry().interpolate(length / 2.0).asPoint()),
+                        QgsPoint(midPoint),
                         QgsPoint(feature.attribute("label_X"), feature.attribute("label_Y")),
                     ]
                 )
@@ -574,13 +620,14 @@ class GenerateGeometryUtils(QObject):
         return None
 
     @staticmethod
-    def generatePolygonLabelLeader(feature):
+    def generatePolygonLabelLeader(feature, currScale=None):
 
         # TOMsMessageLog.logMessage("In generateBayLabelLeader", level=TOMsMessageLog.DEBUG)
         # check to see scale
 
         minScale = float(GenerateGeometryUtils.getMininumScaleForDisplay())
-        currScale = float(iface.mapCanvas().scale())
+        if currScale is None:
+            currScale = GenerateGeometryUtils.getCurrentScale()
 
         if currScale <= minScale:
 
@@ -600,32 +647,69 @@ class GenerateGeometryUtils(QObject):
 
         return None
 
+    @staticmethod
+    def preloadLayerSnapshots():
+        """
+        Reads the lookup, zone and road layers used by the expression functions (from
+        the main thread), so that the render threads only use the snapshots
+        """
+
+        TOMsLookupCache().preloadProjectLayers()
+        TOMsZoneResolver().preloadProjectLayers()
+        TOMsNearestLineIndex().preloadProjectLayers()
+
+    @staticmethod
+    def getCurrentScale(context=None):
+        """
+        Returns the scale of the map being rendered, from the "map_scale" variable of the
+        expression context (canvas, layout map or server request). Without one, the map
+        canvas is used if called from the main thread.
+        """
+
+        if context is not None and context.hasVariable("map_scale"):
+            try:
+                return float(context.variable("map_scale"))
+            except (TypeError, ValueError):
+                pass
+
+        if iface is not None and isMainThread():
+            return float(iface.mapCanvas().scale())
+
+        # no map - e.g., an attribute table. Show the labels
+        return 0.0
+
     @staticmethod
     def getMininumScaleForDisplay():
 
-        minScale = QgsExpressionContextUtils.projectScope(QgsProject.instance()).variable("MinimumTextDisplayScale")
+        minScale = TOMsSettingsManager().settings().minimumTextDisplayScale
 
         TOMsMessageLog.logMessage(
-            "In getMininumScaleForDisplay. minScale(1): " + str(minScale),
-            level=TOMsMessageLog.DEBUG,
+            "In getMininumScaleForDisplay. minScale(1): %s", minScale, level=TOMsMessageLog.DEBUG
         )
 
-        if minScale is None:
-            minScale = 1250
-
         return minScale
 
     @staticmethod
-    def getWaitingLoadingRestrictionLabelText(feature):
+    def getWaitingLoadingRestrictionLabelText(feature, currScale=None):
 
         TOMsMessageLog.logMessage("In getWaitingLoadingRestrictionLabelText", level=TOMsMessageLog.DEBUG)
 
         minScale = float(GenerateGeometryUtils.getMininumScaleForDisplay())
-        currScale = float(iface.mapCanvas().scale())
+        if currScale is None:
+            currScale = GenerateGeometryUtils.getCurrentScale()
 
         if currScale > minScale:
             return None, None
 
+        return TOMsLabelCache().getLabels(
+            "WaitingLoading",
+            feature,
+            lambda: GenerateGeometryUtils.calculateWaitingLoadingRestrictionLabelText(feature),
+        )
+
+    @staticmethod
+    def calculateWaitingLoadingRestrictionLabelText(feature):
+
         TOMsMessageLog.logMessage(
             "In getWaitingLoadingRestrictionLabelText(1): get details ...",
             level=TOMsMessageLog.DEBUG,
@@ -641,14 +725,16 @@ class GenerateGeometryUtils(QObject):
             return None, None
 
         TOMsMessageLog.logMessage(
-            "In getWaitingLoadingRestrictionLabelText(1): details found ... [{}]".format(geometryID),
+            "In getWaitingLoadingRestrictionLabelText(1): details found ... [%s]",
+            geometryID,
             level=TOMsMessageLog.DEBUG,
         )
 
-        timePeriodsLayer = QgsProject.instance().mapLayersByName("TimePeriodsInUse_View")[0]
+        timePeriodsLayer = TOMsProjectLayers().layer("TimePeriodsInUse_View")
 
         TOMsMessageLog.logMessage(
-            "In getWaitingLoadingRestrictionLabelText(1): getting lookup values ... [{}]".format(geometryID),
+            "In getWaitingLoadingRestrictionLabelText(1): getting lookup values ... [%s]",
+            geometryID,
             level=TOMsMessageLog.DEBUG,
         )
 
@@ -656,7 +742,9 @@ class GenerateGeometryUtils(QObject):
         loadDesc = GenerateGeometryUtils.getLookupLabelText(timePeriodsLayer, loadingTimeID)
 
         TOMsMessageLog.logMessage(
-            "In getWaitingLoadingRestrictionLabelText(1): waiting: " + str(waitDesc) + " loading: " + str(loadDesc),
+            "In getWaitingLoadingRestrictionLabelText(1): waiting: %s loading: %s",
+            waitDesc,
+            loadDesc,
             level=TOMsMessageLog.DEBUG,
         )
 
@@ -665,13 +753,12 @@ class GenerateGeometryUtils(QObject):
         cpzWaitingTimeID = GenerateGeometryUtils.getCPZWaitingTimeID(restrictionCPZ)
 
         TOMsMessageLog.logMessage(
-            "In getWaitingLoadingRestrictionLabelText ({}): wait_cpz: {}; wait_res: {}; load: {}; ed: {}".format(
-                geometryID,
-                cpzWaitingTimeID,
-                waitingTimeID,
-                loadingTimeID,
-                matchDayTimePeriodID,
-            ),
+            "In getWaitingLoadingRestrictionLabelText (%s): wait_cpz: %s; wait_res: %s; load: %s; ed: %s",
+            geometryID,
+            cpzWaitingTimeID,
+            waitingTimeID,
+            loadingTimeID,
+            matchDayTimePeriodID,
             level=TOMsMessageLog.DEBUG,
         )
 
@@ -682,9 +769,9 @@ class GenerateGeometryUtils(QObject):
         if matchDayTimePeriodID:
             cpzMatchDayTimePeriodID = GenerateGeometryUtils.getEDWaitingTimeID(restrictionEDZ)
             TOMsMessageLog.logMessage(
-                "In getWaitingLoadingRestrictionLabelText: ED: {}; restriction: {}".format(
-                    cpzMatchDayTimePeriodID, matchDayTimePeriodID
-                ),
+                "In getWaitingLoadingRestrictionLabelText: ED: %s; restriction: %s",
+                cpzMatchDayTimePeriodID,
+                matchDayTimePeriodID,
                 level=TOMsMessageLog.DEBUG,
             )
             if cpzMatchDayTimePeriodID != matchDayTimePeriodID:
@@ -697,7 +784,7 @@ class GenerateGeometryUtils(QObject):
                     waitDesc = "Match Day: {}".format(matchDayTimePeriodDesc)
 
         if additionalConditionID:
-            additionalConditionTypesLayer = QgsProject.instance().mapLayersByName("AdditionalConditionTypes")[0]
+            additionalConditionTypesLayer = TOMsProjectLayers().layer("AdditionalConditionTypes")
             additionalConditionDesc = getLookupDescription(additionalConditionTypesLayer, additionalConditionID)
             if waitDesc:
                 waitDesc = "{};{}".format(waitDesc, additionalConditionDesc)
@@ -705,24 +792,35 @@ class GenerateGeometryUtils(QObject):
                 waitDesc = "{}".format(additionalConditionDesc)
 
         TOMsMessageLog.logMessage(
-            "In getWaitingLoadingRestrictionLabelText({}); waiting: {}; loading: {}".format(
-                geometryID, waitDesc, loadDesc
-            ),
+            "In getWaitingLoadingRestrictionLabelText(%s); waiting: %s; loading: %s",
+            geometryID,
+            waitDesc,
+            loadDesc,
             level=TOMsMessageLog.DEBUG,
         )
         return waitDesc, loadDesc
 
     @staticmethod
-    def getBayRestrictionLabelText(feature):
+    def getBayRestrictionLabelText(feature, currScale=None):
 
         TOMsMessageLog.logMessage("In getBayRestrictionLabelText ..", level=TOMsMessageLog.DEBUG)
 
         minScale = float(GenerateGeometryUtils.getMininumScaleForDisplay())
-        currScale = float(iface.mapCanvas().scale())
+        if currScale is None:
+            currScale = GenerateGeometryUtils.getCurrentScale()
 
         if currScale > minScale:
             return None, None, None
 
+        return TOMsLabelCache().getLabels(
+            "Bay",
+            feature,
+            lambda: GenerateGeometryUtils.calculateBayRestrictionLabelText(feature),
+        )
+
+    @staticmethod
+    def calculateBayRestrictionLabelText(feature):
+
         maxStayID = feature.attribute("MaxStayID")
         noReturnID = feature.attribute("NoReturnID")
         timePeriodID = feature.attribute("TimePeriodID")
@@ -730,12 +828,13 @@ class GenerateGeometryUtils(QObject):
         additionalConditionID = feature.attribute("AdditionalConditionID")
         permitCode = feature.attribute("PermitCode")
 
-        lengthOfTimeLayer = QgsProject.instance().mapLayersByName("LengthOfTime")[0]
-        timePeriodsLayer = QgsProject.instance().mapLayersByName("TimePeriodsInUse_View")[0]
+        lengthOfTimeLayer = TOMsProjectLayers().layer("LengthOfTime")
+        timePeriodsLayer = TOMsProjectLayers().layer("TimePeriodsInUse_View")
 
         if feature.attribute("GeometryID"):
             TOMsMessageLog.logMessage(
-                "In getBayRestrictionLabelText: GeometryID: " + feature.attribute("GeometryID"),
+                "In getBayRestrictionLabelText: GeometryID: %s",
+                feature.attribute("GeometryID"),
                 level=TOMsMessageLog.DEBUG,
             )
 
@@ -757,15 +856,13 @@ class GenerateGeometryUtils(QObject):
         ) = GenerateGeometryUtils.getTariffZoneDetails(restrictionPTA)
 
         TOMsMessageLog.logMessage(
-            "In getBayRestrictionLabelText (1): "
-            + str(cpzWaitingTimeID)
-            + " PTA hours: "
-            + str(tariffZoneTimePeriodID),
+            "In getBayRestrictionLabelText (1): %s PTA hours: %s",
+            cpzWaitingTimeID,
+            tariffZoneTimePeriodID,
             level=TOMsMessageLog.DEBUG,
         )
         TOMsMessageLog.logMessage(
-            "In getBayRestrictionLabelText. bay hours: " + str(timePeriodID),
-            level=TOMsMessageLog.DEBUG,
+            "In getBayRestrictionLabelText. bay hours: %s", timePeriodID, level=TOMsMessageLog.DEBUG
         )
 
         if timePeriodID == 1:  # 'At Any Time'
@@ -773,7 +870,9 @@ class GenerateGeometryUtils(QObject):
 
         if cpzWaitingTimeID:
             TOMsMessageLog.logMessage(
-                "In getBayRestrictionLabelText: " + str(cpzWaitingTimeID) + " " + str(timePeriodID),
+                "In getBayRestrictionLabelText: %s %s",
+                cpzWaitingTimeID,
+                timePeriodID,
                 level=TOMsMessageLog.DEBUG,
             )
             if cpzWaitingTimeID == timePeriodID:
@@ -794,9 +893,9 @@ class GenerateGeometryUtils(QObject):
         if matchDayTimePeriodID:
             cpzMatchDayTimePeriodID = GenerateGeometryUtils.getEDWaitingTimeID(restrictionEDZ)
             TOMsMessageLog.logMessage(
-                "In getBayRestrictionLabelText: ED: {}; restriction: {}".format(
-                    cpzMatchDayTimePeriodID, matchDayTimePeriodID
-                ),
+                "In getBayRestrictionLabelText: ED: %s; restriction: %s",
+                cpzMatchDayTimePeriodID,
+                matchDayTimePeriodID,
                 level=TOMsMessageLog.DEBUG,
             )
             if cpzMatchDayTimePeriodID != matchDayTimePeriodID:
@@ -815,7 +914,7 @@ class GenerateGeometryUtils(QObject):
                 timePeriodDesc = "Permit: {}".format(permitCode)
 
         if additionalConditionID:
-            additionalConditionTypesLayer = QgsProject.instance().mapLayersByName("AdditionalConditionTypes")[0]
+            additionalConditionTypesLayer = TOMsProjectLayers().layer("AdditionalConditionTypes")
             additionalConditionDesc = getLookupDescription(additionalConditionTypesLayer, additionalConditionID)
             if timePeriodDesc:
                 timePeriodDesc = "{};{}".format(timePeriodDesc, additionalConditionDesc)
@@ -823,8 +922,7 @@ class GenerateGeometryUtils(QObject):
                 timePeriodDesc = "{}".format(additionalConditionDesc)
 
         TOMsMessageLog.logMessage(
-            "In getBayRestrictionLabelText. timePeriodDesc (2): " + str(timePeriodDesc),
-            level=TOMsMessageLog.DEBUG,
+            "In getBayRestrictionLabelText. timePeriodDesc (2): %s", timePeriodDesc, level=TOMsMessageLog.DEBUG
         )
 
         return maxStayDesc, noReturnDesc, timePeriodDesc
@@ -834,31 +932,13 @@ class GenerateGeometryUtils(QObject):
 
         # TOMsMessageLog.logMessage("In getLookupLabelText", level=TOMsMessageLog.DEBUG)
 
-        if code:
-            query = '"Code" = ' + str(code)
-            request = QgsFeatureRequest().setFilterExpression(query)
-
-            try:
-                row = next(lookupLayer.getFeatures(request))
-                return row["LabelText"]  # make assumption that only one row
-            except Exception as e:
-                TOMsMessageLog.logMessage(
-                    "getLookupLabelText: error in expression function: {}".format(e),
-                    level=Qgis.Warning,
-                )
-
-        # TOMsMessageLog.logMessage("In getLookupLabelText. returning without value ...", level=TOMsMessageLog.DEBUG)
-
-        return None
+        return TOMsLookupCache().getValue(lookupLayer, code, "LabelText")
 
     @staticmethod
     def getCurrentCPZDetails(feature):
 
         TOMsMessageLog.logMessage("In getCurrentCPZDetails", level=TOMsMessageLog.DEBUG)
-        try:
-            cpzLayer = QgsProject.instance().mapLayersByName("CPZs")[0]
-        except Exception:
-            cpzLayer = None
+        cpzLayer = TOMsProjectLayers().layer("CPZs")
 
         if cpzLayer:
             restrictionID = feature.attribute("GeometryID")
@@ -889,10 +969,7 @@ class GenerateGeometryUtils(QObject):
     def getCurrentEventDayDetails(feature):
 
         TOMsMessageLog.logMessage("In getCurrentEventDayDetails", level=TOMsMessageLog.DEBUG)
-        try:
-            edLayer = QgsProject.instance().mapLayersByName("MatchDayEventDayZones")[0]
-        except Exception:
-            edLayer = None
+        edLayer = TOMsProjectLayers().layer("MatchDayEventDayZones")
 
         if edLayer:
             restrictionID = feature.attribute("GeometryID")
@@ -923,10 +1000,7 @@ class GenerateGeometryUtils(QObject):
     def getCurrentPTADetails(feature):
 
         TOMsMessageLog.logMessage("In getCurrentPTADetails", level=TOMsMessageLog.DEBUG)
-        try:
-            ptaLayer = QgsProject.instance().mapLayersByName("ParkingTariffAreas")[0]
-        except Exception:
-            ptaLayer = None
+        ptaLayer = TOMsProjectLayers().layer("ParkingTariffAreas")
 
         if ptaLayer:
             restrictionID = feature.attribute("GeometryID")
@@ -975,10 +1049,7 @@ class GenerateGeometryUtils(QObject):
             ]  # choose second point to (try to) move away from any "ends" (may be best to get midPoint ...)
             # TOMsMessageLog.logMessage("In getPolygonForRestriction." + str(testPt.x()), level=TOMsMessageLog.DEBUG)
 
-            for poly in layer.getFeatures():
-                if poly.geometry().contains(QgsGeometry.fromPointXY(testPt)):
-                    # TOMsMessageLog.logMessage("In getPolygonForRestriction. feature found", level=TOMsMessageLog.DEBUG)
-                    return poly
+            return TOMsZoneResolver().getZoneContaining(layer, testPt)
 
         return None
 
@@ -1012,27 +1083,11 @@ class GenerateGeometryUtils(QObject):
             level=TOMsMessageLog.DEBUG,
         )
 
-        try:
-            cpzLayer = QgsProject.instance().mapLayersByName("CPZs")[0]
-        except Exception:
-            return None
-
-        if cpzNr:
-
-            query = "\"CPZ\" = '{}'".format(cpzNr)
-
-            TOMsMessageLog.logMessage(
-                "In getCPZWaitingTimeID. table: {}; query: {}".format(cpzLayer.name(), str(query)),
-                level=TOMsMessageLog.DEBUG,
-            )
-
-            try:
-                row = next(cpzLayer.getFeatures(query))
-            except Exception:
-                return None
+        cpzLayer = TOMsProjectLayers().layer("CPZs")
 
+        row = TOMsZoneResolver().getZoneWithAttribute(cpzLayer, "CPZ", cpzNr)
+        if row is not None:
             TOMsMessageLog.logMessage("In getCPZWaitingTimeID. Found CPZ.", level=TOMsMessageLog.DEBUG)
-
             return row["TimePeriodID"]
 
         return None
@@ -1042,25 +1097,17 @@ class GenerateGeometryUtils(QObject):
 
         TOMsMessageLog.logMessage("In getEDWaitingTimeID", level=TOMsMessageLog.DEBUG)
 
-        try:
-            edzLayer = QgsProject.instance().mapLayersByName("MatchDayEventDayZones")[0]
-        except Exception:
-            edzLayer = None
+        edzLayer = TOMsProjectLayers().layer("MatchDayEventDayZones")
 
-        if edzLayer:
-            for poly in edzLayer.getFeatures():
-                currentEDZ = poly.attribute("EDZ")
-
-                if currentEDZ == edzNr:
-                    TOMsMessageLog.logMessage("In getEDWaitingTimeID. Found EDZ.", level=TOMsMessageLog.DEBUG)
-                    edzWaitingTimeID = poly.attribute("TimePeriodID")
-                    # cpzMatchDayTimeID = poly.attribute("MatchDayTimePeriodID")
-                    # return cpzWaitingTimeID, cpzMatchDayTimeID
-                    TOMsMessageLog.logMessage(
-                        "In getEDWaitingTimeID. ID. {}".format(edzWaitingTimeID),
-                        level=TOMsMessageLog.DEBUG,
-                    )
-                    return edzWaitingTimeID
+        poly = TOMsZoneResolver().getZoneWithAttribute(edzLayer, "EDZ", edzNr)
+        if poly is not None:
+            TOMsMessageLog.logMessage("In getEDWaitingTimeID. Found EDZ.", level=TOMsMessageLog.DEBUG)
+            edzWaitingTimeID = poly.attribute("TimePeriodID")
+            TOMsMessageLog.logMessage(
+                "In getEDWaitingTimeID. ID. {}".format(edzWaitingTimeID),
+                level=TOMsMessageLog.DEBUG,
+            )
+            return edzWaitingTimeID
 
         return None
 
@@ -1069,28 +1116,22 @@ class GenerateGeometryUtils(QObject):
 
         TOMsMessageLog.logMessage("In getTariffZoneDetails", level=TOMsMessageLog.DEBUG)
 
-        try:
-            tpaLayer = QgsProject.instance().mapLayersByName("ParkingTariffAreas")[0]
-        except Exception:
-            tpaLayer = None
-
-        if tpaLayer:
-            for poly in tpaLayer.getFeatures():
-                currentPTA = poly.attribute("ParkingTariffArea")
+        tpaLayer = TOMsProjectLayers().layer("ParkingTariffAreas")
 
-                if currentPTA == tpaNr:
-                    TOMsMessageLog.logMessage(
-                        "In getTariffZoneDetails. Found PTA.",
-                        level=TOMsMessageLog.DEBUG,
-                    )
-                    ptaTimePeriodID = poly.attribute("TimePeriodID")
-                    ptaMaxStayID = poly.attribute("MaxStayID")
-                    ptaNoReturnID = poly.attribute("NoReturnID")
-                    TOMsMessageLog.logMessage(
-                        "In getTariffZoneMaxStayID. ID." + str(ptaMaxStayID),
-                        level=TOMsMessageLog.DEBUG,
-                    )
-                    return ptaTimePeriodID, ptaMaxStayID, ptaNoReturnID
+        poly = TOMsZoneResolver().getZoneWithAttribute(tpaLayer, "ParkingTariffArea", tpaNr)
+        if poly is not None:
+            TOMsMessageLog.logMessage(
+                "In getTariffZoneDetails. Found PTA.",
+                level=TOMsMessageLog.DEBUG,
+            )
+            ptaTimePeriodID = poly.attribute("TimePeriodID")
+            ptaMaxStayID = poly.attribute("MaxStayID")
+            ptaNoReturnID = poly.attribute("NoReturnID")
+            TOMsMessageLog.logMessage(
+                "In getTariffZoneMaxStayID. ID." + str(ptaMaxStayID),
+                level=TOMsMessageLog.DEBUG,
+            )
+            return ptaTimePeriodID, ptaMaxStayID, ptaNoReturnID
 
         return None, None, None
 
@@ -1103,58 +1144,11 @@ class GenerateGeometryUtils(QObject):
             "In findNearestPointOnLineLayer. Checking lineLayer: {}: {}".format(lineLayer.name(), geometryIDs),
             level=TOMsMessageLog.DEBUG,
         )
-        searchRect = QgsRectangle(
-            searchPt.x() - tolerance,
-            searchPt.y() - tolerance,
-            searchPt.x() + tolerance,
-            searchPt.y() + tolerance,
-        )
-
-        request = QgsFeatureRequest()
-        request.setFilterRect(searchRect)
-        request.setFlags(QgsFeatureRequest.ExactIntersect)
-
-        shortestDistance = float("inf")
-        # nearestPoint = QgsFeature()
-
-        # Loop through all features in the layer to find the closest feature
-        for feat in lineLayer.getFeatures(request):
-            TOMsMessageLog.logMessage(
-                "In findNearestPointOnLineLayer: {}".format(feat.id()),
-                level=TOMsMessageLog.DEBUG,
-            )
-            if geometryIDs is not None:
-                # print ('***** currGeometryID: {}; GeometryID: {}'.format(currGeometryID, f.attribute("GeometryID")))
-                try:
-                    testGeometryID = feat.attribute("GeometryID")
-                except KeyError:
-                    return (
-                        None,
-                        None,
-                    )  # layer does not have "GeometryID" field, i.e., not restriction layer
-
-                if testGeometryID in geometryIDs:
-                    continue
-            # Add any features that are found should be added to a list
-            # print ('feature found: {}'.format(f.id()))
-            closestPtOnFeature = feat.geometry().nearestPoint(QgsGeometry.fromPointXY(searchPt))
-            dist = feat.geometry().distance(QgsGeometry.fromPointXY(searchPt))
-            if dist < shortestDistance:
-                shortestDistance = dist
-                closestPoint = closestPtOnFeature
-                closestFeature = feat
-
-        TOMsMessageLog.logMessage(
-            "In findNearestPointOnLineLayer: shortestDistance: " + str(shortestDistance),
-            level=TOMsMessageLog.DEBUG,
-        )
 
-        if shortestDistance < float("inf"):
-            # nearestPoint = QgsFeature()
-            # add the geometry to the feature,
-            # nearestPoint.setGeometry(QgsGeometry(closestPtOnFeature))
-            return closestPoint, closestFeature  # returns a geometry
-        return None, None
+        try:
+            return TOMsNearestLineIndex().nearestPoint(lineLayer, searchPt, tolerance, geometryIDs)
+        except KeyError:
+            return None, None  # layer does not have "GeometryID" field, i.e., not restriction layer
 
     @staticmethod
     def getLineOrientationAtPoint(point, lineFeature):
@@ -1260,10 +1254,10 @@ class GenerateGeometryUtils(QObject):
 
         # Now generate a line in the appropriate direction
         if closestPoint:
-            TOMsMessageLog.logMessage(
-                "In getSignOrientation closestPoint: {}".format(closestPoint.asWkt()),
-                level=TOMsMessageLog.DEBUG,
-            )
+            if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+                TOMsMessageLog.logMessage(
+                    "In getSignOrientation closestPoint: %s", closestPoint.asWkt(), level=TOMsMessageLog.DEBUG
+                )
             # get the orientation of the line feature
             (
                 orientationToFeature,
@@ -1289,7 +1283,7 @@ class GenerateGeometryUtils(QObject):
         return [None, None, None, None, None, None, None]
 
     @staticmethod
-    def getSignLine(ptFeature, lineLayer, distanceForIcons):
+    def getSignLine(ptFeature, lineLayer, distanceForIcons, orientationList=None):
 
         try:
             signOrientation = ptFeature.attribute("SignOrientationTypeID")
@@ -1309,7 +1303,8 @@ class GenerateGeometryUtils(QObject):
         if signOrientation is None:
             return None
 
-        orientationList = GenerateGeometryUtils.getSignOrientation(ptFeature, lineLayer)
+        if orientationList is None:
+            orientationList = GenerateGeometryUtils.getSignOrientation(ptFeature, lineLayer)
 
         # Now generate a line in the appropriate direction
         if orientationList[1]:
@@ -1359,10 +1354,8 @@ class GenerateGeometryUtils(QObject):
                 return None
 
         if lineGeom:
-            TOMsMessageLog.logMessage(
-                "getSignLine lineGeom: {}".format(lineGeom.asWkt()),
-                level=TOMsMessageLog.DEBUG,
-            )
+            if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+                TOMsMessageLog.logMessage("getSignLine lineGeom: %s", lineGeom.asWkt(), level=TOMsMessageLog.DEBUG)
 
         return lineGeom
 
@@ -1389,11 +1382,14 @@ class GenerateGeometryUtils(QObject):
         # add points to line at equal distance
         if lineGeom is None:
             return None
+        walker = TOMsLineWalker(lineGeom)
+        lineLength = lineGeom.length()
         newLinePts = []
-        # add points along line for icons
+        # add points along line for icons (any beyond the end of the line are put at the end)
         for i in range(1, nrPts + 1, 1):
-            newPt = (lineGeom.interpolate(i * distance)).asPoint()
-            newLinePts.append(newPt)
+            newPt = walker.pointAt(min(i * distance, lineLength))
+            if newPt is not None:
+                newLinePts.append(newPt)
 
         return newLinePts
 
@@ -1402,34 +1398,33 @@ class GenerateGeometryUtils(QObject):
         return GenerateGeometryUtils.getGeneratedSignLine(feature)
 
     @staticmethod
-    def getGeneratedSignLine(feature):
+    def getGeneratedSignLine(feature, orientationList=None):
         TOMsMessageLog.logMessage(
             "getGeneratedSignLine ... {}".format(feature.attribute("GeometryID")),
             level=TOMsMessageLog.DEBUG,
         )
-        roadCentreLineLayer = QgsProject.instance().mapLayersByName("RoadCentreLine")[0]
-        try:
-            distanceForIcons = float(
-                QgsExpressionContextUtils.projectScope(QgsProject.instance()).variable("distanceForIcons")
-            )
-        except Exception:
+        roadCentreLineLayer = TOMsProjectLayers().layer("RoadCentreLine")
+        distanceForIcons = TOMsSettingsManager().settings().distanceForIcons
+        if distanceForIcons is None:
             return None, None
 
         # distanceForIcons = 10
         # iconSize = 4
         # nrPlatesInSign = generateGeometryUtils.getNrPlatesInSign(feature)
         # print ('nrPlates: {}'.format(nrPlatesInSign))
-        lineGeom = GenerateGeometryUtils.getSignLine(feature, roadCentreLineLayer, distanceForIcons)
+        lineGeom = GenerateGeometryUtils.getSignLine(
+            feature, roadCentreLineLayer, distanceForIcons, orientationList
+        )
         linePts = GenerateGeometryUtils.addPointsToSignLine(
             lineGeom,
             len(GenerateGeometryUtils.getPlatesInSign(feature)),
             distanceForIcons,
         )
         if lineGeom:
-            TOMsMessageLog.logMessage(
-                "getGeneratedSignLine: lineGeom: {}".format(lineGeom.asWkt()),
-                level=TOMsMessageLog.DEBUG,
-            )
+            if TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG):
+                TOMsMessageLog.logMessage(
+                    "getGeneratedSignLine: lineGeom: %s", lineGeom.asWkt(), level=TOMsMessageLog.DEBUG
+                )
         else:
             TOMsMessageLog.logMessage("getGeneratedSignLine: no geometry ...", level=TOMsMessageLog.DEBUG)
 
@@ -1438,15 +1433,14 @@ class GenerateGeometryUtils(QObject):
     @staticmethod
     def getSignIcons(ptFeature):
         TOMsMessageLog.logMessage("getSignIcons ... ", level=TOMsMessageLog.DEBUG)
-        try:
-            pathAbsolute = QgsExpressionContextUtils.projectScope(QgsProject.instance()).variable("iconPath")
-        except Exception as e:
-            TOMsMessageLog.logMessage("getSignIcons: iconPath not found {}".format(e), level=Qgis.Warning)
+        pathAbsolute = TOMsSettingsManager().settings().iconPath
+        if pathAbsolute is None:
+            TOMsMessageLog.logMessage("getSignIcons: iconPath not found", level=Qgis.Warning)
             return None
 
         platesInSign = GenerateGeometryUtils.getPlatesInSign(ptFeature)
         plateIconsInSign = []
-        signTypesLayer = QgsProject.instance().mapLayersByName("SignTypes")[0]
+        signTypesLayer = TOMsProjectLayers().layer("SignTypes")
         for plateType in platesInSign:
             signTypeRow = GenerateGeometryUtils.getLookupRow(signTypesLayer, plateType)
             if signTypeRow:
@@ -1460,18 +1454,18 @@ class GenerateGeometryUtils(QObject):
         return plateIconsInSign
 
     @staticmethod
-    def getSignOrientationList(ptFeature):
+    def getSignOrientationList(ptFeature, orientationList=None):
         TOMsMessageLog.logMessage("getSignOrientationList ...", level=TOMsMessageLog.DEBUG)
-        try:
-            roadCentreLineLayer = QgsProject.instance().mapLayersByName("RoadCentreLine")[0]
-        except Exception as e:
+        roadCentreLineLayer = TOMsProjectLayers().layer("RoadCentreLine")
+        if roadCentreLineLayer is None:
             TOMsMessageLog.logMessage(
-                "getSignOrientationList: RoadCentreLine layer not found {}".format(e),
+                "getSignOrientationList: RoadCentreLine layer not found",
                 level=Qgis.Warning,
             )
             return None
 
-        orientationList = GenerateGeometryUtils.getSignOrientation(ptFeature, roadCentreLineLayer)
+        if orientationList is None:
+            orientationList = GenerateGeometryUtils.getSignOrientation(ptFeature, roadCentreLineLayer)
 
         if orientationList[1]:  # check that valid values have been returned
             # This list give the orientation for the way the line is pointing.
@@ -1501,10 +1495,33 @@ class GenerateGeometryUtils(QObject):
 
         return 0
 
+    @staticmethod
+    def getSignBundle(feature):
+        """
+        Returns the TOMsSignBundle (orientation, sign line, icon points and icon paths)
+        for the sign feature. The nearest RoadCentreLine is only searched once and the
+        bundle is cached until the sign or the RoadCentreLine layer changes.
+        """
+
+        roadCentreLineLayer = TOMsProjectLayers().layer("RoadCentreLine")
+        roadSnapshot = None
+        if roadCentreLineLayer is not None:
+            roadSnapshot = TOMsNearestLineIndex().snapshot(roadCentreLineLayer)
+
+        def computeSignBundle():
+            orientationList = None
+            if roadCentreLineLayer is not None:
+                orientationList = GenerateGeometryUtils.getSignOrientation(feature, roadCentreLineLayer)
+            signLine, iconPoints = GenerateGeometryUtils.getGeneratedSignLine(feature, orientationList)
+            return TOMsSignBundle(
+                orientation=GenerateGeometryUtils.getSignOrientationList(feature, orientationList),
+                signLine=signLine,
+                iconPoints=iconPoints,
+                iconPaths=GenerateGeometryUtils.getSignIcons(feature),
+            )
+
+        return TOMsSignCache().getBundle(feature, roadSnapshot, computeSignBundle)
+
     @staticmethod
     def getLookupRow(lookupLayer, code):
-        query = "\"Code\" = '{}'".format(code)
-        request = QgsFeatureRequest().setFilterExpression(query)
-        for row in lookupLayer.getFeatures(request):
-            return row  # make assumption that only one row
-        return None
+        return TOMsLookupCache().getRow(lookupLayer, code)
@@ -14,12 +14,7 @@ import re
 import sys
 import traceback
 
-from qgis.core import (
-    Qgis,
-    QgsExpressionContextUtils,
-    QgsLayoutExporter,
-    QgsProject,
-)
+from qgis.core import Qgis, QgsLayoutExporter
 from qgis.PyQt.QtCore import QMetaObject, QSettings, Qt
 from qgis.PyQt.QtWidgets import (
     QCheckBox,
@@ -33,6 +28,7 @@ from qgis.PyQt.QtWidgets import (
 from qgis.utils import iface
 
 from ..constants import ProposalStatus
+from ..core.tomsExpressionProfiler import TOMsExpressionProfiler
 from ..core.tomsMessageLog import TOMsMessageLog
 from ..core.tomsProposal import TOMsProposal
 from .instantPrintTool import InstantPrintTool
@@ -313,16 +309,10 @@ class TOMsInstantPrintTool(InstantPrintTool):
     def tomsExportAtlas(self, printProposalObject):
 
         # TH (180608): Export function to deal with atlases
+        # (the label expressions use the scale of each atlas map, from the map_scale variable)
 
         settings = QSettings()
 
-        # The labels (generated by expression) take into account the main mapCanvas scale
-        # so here with an atlas, they can disappear if the main mapCanvas has a scale > MinimumTextDisplayScale.
-        # To fix this, when printing an atlas, we temporarily virtually remove the MinimumTextDisplayScale by
-        # setting a very high value.
-        prevMinScale = QgsExpressionContextUtils.projectScope(QgsProject.instance()).variable("MinimumTextDisplayScale")
-        QgsExpressionContextUtils.setProjectVariable(QgsProject.instance(), "MinimumTextDisplayScale", 9999999999999999)
-
         # TH (180608): Check to see whether or not the Composer is an Atlas
         currPrintLayout = self.layoutView
         currLayoutAtlas = currPrintLayout.atlas()
@@ -553,8 +543,8 @@ class TOMsInstantPrintTool(InstantPrintTool):
             altasFeatureFound = currLayoutAtlas.next()
 
         currLayoutAtlas.endRender()
+        TOMsExpressionProfiler().endRender("atlas")
 
-        QgsExpressionContextUtils.setProjectVariable(QgsProject.instance(), "MinimumTextDisplayScale", prevMinScale)
         QMessageBox.information(
             iface.mainWindow(), "Information", ("Printing completed")
         )
@@ -35,12 +35,20 @@ from qgis.utils import OverrideCursor, iface
 
 from .constants import ProposalStatus, RestrictionAction, UserPermission
 from .core.proposalsManager import TOMsProposalsManager
+from .core.tomsDemandPoints import TOMsDemandPointCache
+from .core.tomsGeometryCache import TOMsGeometryCache
+from .core.tomsLabelCache import TOMsLabelCache
+from .core.tomsLookupCache import TOMsLookupCache
 from .core.tomsMessageLog import TOMsMessageLog
+from .core.tomsRestrictionLayers import TOMsRestrictionLayers
+from .core.tomsSignCache import TOMsSignCache
 from .core.tomsTransaction import TOMsTransaction
+from .generateGeometryUtils import GenerateGeometryUtils
 from .instantPrint.tomsInstantPrintTool import TOMsInstantPrintTool
 from .manageRestrictionDetails import ManageRestrictionDetails
 from .restrictionTypeUtilsClass import TOMsConfigFile
 from .searchBar import SearchBar
+from .ui.expressionProfilerDockwidget import ExpressionProfilerDockWidget
 from .ui.proposalPanelDockwidget import ProposalPanelDockWidget
 from .utils import saveLastSelectedValue, setupPanelTabs
 
@@ -94,6 +102,21 @@ class ProposalsPanel:
         else:
             self.mappingUpdatesAction = None
 
+        if UserPermission.FULL_CONTROL:
+            self.profilerAction = QAction("Prof")
+            self.profilerAction.setCheckable(True)
+            self.profilerAction.triggered.connect(self.showExpressionProfiler)
+            self.tomsToolbar.addAction(self.profilerAction)
+            self.profilerAction.setToolTip("Show the timings of the TOMs expression functions")
+        else:
+            self.profilerAction = None
+        self.profilerDock = None
+
+        self.demandPointsAction = QAction("Demand")
+        self.demandPointsAction.triggered.connect(self.generateDemandPoints)
+        self.tomsToolbar.addAction(self.demandPointsAction)
+        self.demandPointsAction.setToolTip("Generate the demand points of the current survey layer")
+
         self.toolButton.toggled.connect(self.__enablePrintTool)
         iface.mapCanvas().mapToolSet.connect(self.__onPrintToolSet)
 
@@ -132,6 +155,29 @@ class ProposalsPanel:
 
         TOMsMessageLog.logMessage("Finished proposalsPanel init ...", level=TOMsMessageLog.DEBUG)
 
+    def showExpressionProfiler(self, visible):
+        if self.profilerDock is None:
+            self.profilerDock = ExpressionProfilerDockWidget()
+            self.profilerDock.visibilityChanged.connect(self.profilerAction.setChecked)
+            iface.addDockWidget(Qt.RightDockWidgetArea, self.profilerDock)
+
+        self.profilerDock.setVisible(visible)
+        if visible:
+            setupPanelTabs(self.profilerDock)
+
+    def generateDemandPoints(self):
+        """Adds (or refreshes) the demand point layer of the current survey layer"""
+
+        surveyLayer = iface.activeLayer()
+        if not isinstance(surveyLayer, QgsVectorLayer) or surveyLayer.fields().indexFromName("Demand") < 0:
+            QMessageBox.information(None, "Information", "Select a survey layer (with Demand) first")
+            return
+
+        with OverrideCursor(Qt.WaitCursor):
+            demandLayer = TOMsDemandPointCache().demandLayer(surveyLayer)
+        if QgsProject.instance().mapLayer(demandLayer.id()) is None:
+            QgsProject.instance().addMapLayer(demandLayer)
+
     def __enablePrintTool(self, active):  # pylint: disable=invalid-name
         self.tool.setEnabled(active)
 
@@ -175,8 +221,14 @@ class ProposalsPanel:
             self.actionProposalsPanel.setChecked(False)
             return
 
+        # the restriction layers (and their label layers) filtered for the proposal/date
+        TOMsRestrictionLayers().build(self.tableNames)
+
         self.proposalsManager.tomsActivated.emit()
 
+        # read the layers used by the expression functions before rendering
+        GenerateGeometryUtils.preloadLayerSnapshots()
+
         self.dock = ProposalPanelDockWidget()
         iface.addDockWidget(Qt.LeftDockWidgetArea, self.dock)
 
@@ -230,6 +282,10 @@ class ProposalsPanel:
         if self.mappingUpdatesAction:
             self.mappingUpdatesAction.setEnabled(True)
 
+        # optionally, show the date through the temporal controller
+        if self.tomsConfigFileObject.getTOMsConfigElement("TOMsLayers", "TemporalMode") == "True":
+            self.proposalsManager.temporalMode.activate()
+
         # TODO: Deal with the change of project ... More work required on this
         # self.TOMsProject = QgsProject.instance()
         # self.TOMsProject.cleared.connect(self.closeTOMsTools)
@@ -269,11 +325,17 @@ class ProposalsPanel:
 
         # Now clear the filters
 
+        self.proposalsManager.temporalMode.deactivate()
         self.proposalsManager.clearRestrictionFilters()
 
         # reset path names
         self.tableNames.removePathFromLayerForms()
 
+        TOMsGeometryCache().logStatistics()
+        TOMsLookupCache().logStatistics()
+        TOMsLabelCache().logStatistics()
+        TOMsSignCache().logStatistics()
+
     def createProposalcb(self):
         TOMsMessageLog.logMessage("In createProposalcb", level=Qgis.Info)
         # set up a "NULL" field for "No proposals to be shown"
@@ -18,6 +18,7 @@ from qgis.PyQt.QtWidgets import QMessageBox
 from qgis.utils import iface
 
 from .core.tomsMessageLog import TOMsMessageLog
+from .core.tomsRestrictionLayers import LABEL_LEADER_LAYER_NAMES, LABEL_POSITION_LAYER_NAMES
 
 
 class TOMsParams(QObject):
@@ -117,9 +118,9 @@ class TOMsConfigFile(QObject):
 
         self.config = configparser.ConfigParser()
 
-    def initialiseTOMsConfigFile(self):
-
-        # function to open file "toms.conf". Assume path is same as project file - unless environ variable is set
+    @staticmethod
+    def getTOMsConfigPath():
+        # path of "toms.conf". Assume path is same as project file - unless environ variable is set
 
         # check for environ variable
         configPath = None
@@ -131,6 +132,14 @@ class TOMsConfigFile(QObject):
         if configPath is None:
             configPath = QgsExpressionContextUtils.projectScope(QgsProject.instance()).variable("project_home")
 
+        return configPath
+
+    def initialiseTOMsConfigFile(self):
+
+        # function to open file "toms.conf". Assume path is same as project file - unless environ variable is set
+
+        configPath = self.getTOMsConfigPath()
+
         if configPath == NULL:
             QMessageBox.information(
                 None,
@@ -372,18 +381,7 @@ class TOMsLabelLayerNames(QObject):
         # given a layer return the associated layer with label geometry
         # get the corresponding label layer
 
-        if currRestrictionLayer.name() == "Bays":
-            labelLayerName = ["Bays.label_pos"]
-        if currRestrictionLayer.name() == "Lines":
-            labelLayerName = ["Lines.label_pos", "Lines.label_loading_pos"]
-        if currRestrictionLayer.name() == "Signs":
-            labelLayerName = []
-        if currRestrictionLayer.name() == "RestrictionPolygons":
-            labelLayerName = ["RestrictionPolygons.label_pos"]
-        if currRestrictionLayer.name() == "CPZs":
-            labelLayerName = ["CPZs.label_pos"]
-        if currRestrictionLayer.name() == "ParkingTariffAreas":
-            labelLayerName = ["ParkingTariffAreas.label_pos"]
+        labelLayerName = LABEL_POSITION_LAYER_NAMES.get(currRestrictionLayer.name(), [])
 
         if len(labelLayerName) == 0:
             return [""]
@@ -400,18 +398,7 @@ class TOMsLabelLayerNames(QObject):
         # given a layer return the associated layer with label geometry
         # get the corresponding label layer
 
-        if currRestrictionLayer.name() == "Bays":
-            labelLeaderLayersNames = ["Bays.label_ldr"]
-        if currRestrictionLayer.name() == "Lines":
-            labelLeaderLayersNames = ["Lines.label_ldr", "Lines.label_loading_ldr"]
-        if currRestrictionLayer.name() == "Signs":
-            labelLeaderLayersNames = []
-        if currRestrictionLayer.name() == "RestrictionPolygons":
-            labelLeaderLayersNames = ["RestrictionPolygons.label_ldr"]
-        if currRestrictionLayer.name() == "CPZs":
-            labelLeaderLayersNames = ["CPZs.label_ldr"]
-        if currRestrictionLayer.name() == "ParkingTariffAreas":
-            labelLeaderLayersNames = ["ParkingTariffAreas.label_ldr"]
+        labelLeaderLayersNames = LABEL_LEADER_LAYER_NAMES.get(currRestrictionLayer.name(), [])
 
         if len(labelLeaderLayersNames) == 0:
             return [""]
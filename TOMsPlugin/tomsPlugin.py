@@ -13,7 +13,16 @@ from qgis.core import Qgis, QgsMessageLog
 from qgis.utils import iface
 
 from .constants import UserPermission
+from .core.tomsExpressionProfiler import TOMsExpressionProfiler
+from .core.tomsGeometryCache import TOMsGeometryCache
+from .core.tomsLabelCache import TOMsLabelCache
+from .core.tomsLookupCache import TOMsLookupCache
 from .core.tomsMessageLog import TOMsMessageLog
+from .core.tomsNearestLineIndex import TOMsNearestLineIndex
+from .core.tomsProjectLayers import TOMsProjectLayers
+from .core.tomsSettings import TOMsSettingsManager
+from .core.tomsSignCache import TOMsSignCache
+from .core.tomsZoneResolver import TOMsZoneResolver
 from .expressions import TOMsExpressions
 from .proposalsPanel import ProposalsPanel
 
@@ -28,9 +37,22 @@ class TOMs:
         UserPermission.initialize()
         TOMsMessageLog.setLogFile()
 
+        # project variables and TOMs.conf are read once here (main thread) and on change
+        TOMsSettingsManager().settingsChanged.connect(TOMsGeometryCache().clear)
+        TOMsSettingsManager().settingsChanged.connect(TOMsLabelCache().clear)
+        TOMsSettingsManager().settingsChanged.connect(TOMsSignCache().clear)
+
+        # the expression functions find layers by name, and read the snapshots of the
+        # lookup, zone and road layers, from the render threads
+        TOMsProjectLayers()
+        TOMsLookupCache()
+        TOMsZoneResolver()
+        TOMsNearestLineIndex()
+
         TOMsMessageLog.logMessage("Registering expression functions ... ")
         self.expressionsObject = TOMsExpressions()
         self.expressionsObject.registerFunctions()  # Register the Expression functions that we need
+        TOMsExpressionProfiler().install(self.expressionsObject.functions)
 
         # Will be initialized in initGui
         self.tomsToolbar = None
@@ -46,9 +68,19 @@ class TOMs:
         self.tomsToolbar.setObjectName("TOMs Toolbar")
         self.doProposalsPanel = ProposalsPanel(self.tomsToolbar)
 
+        # label texts are memoised for one render pass
+        iface.mapCanvas().renderStarting.connect(TOMsLabelCache().startRenderPass)
+        iface.mapCanvas().mapCanvasRefreshed.connect(TOMsExpressionProfiler().endRender)
+
     def unload(self) -> None:
         """Removes the plugin menu item and icon from QGIS GUI."""
+        TOMsExpressionProfiler().uninstall()
         self.expressionsObject.unregisterFunctions()  # unregister all the Expression functions used
+        iface.mapCanvas().renderStarting.disconnect(TOMsLabelCache().startRenderPass)
+        iface.mapCanvas().mapCanvasRefreshed.disconnect(TOMsExpressionProfiler().endRender)
 
         # TODO: Check whether or not there are any current map tools
         TOMsMessageLog.logMessage("Unload completed ... ", level=Qgis.Info)
+
+        # write out what is still queued for the log file
+        TOMsMessageLog.closeLogFile()
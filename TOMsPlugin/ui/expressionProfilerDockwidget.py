@@ -0,0 +1,134 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# ---------------------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtWidgets import (
+    QCheckBox,
+    QDockWidget,
+    QFileDialog,
+    QHBoxLayout,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..core.tomsExpressionProfiler import REPORT_FIELDS, TOMsExpressionProfiler
+
+COLUMN_TITLES = {
+    "function": "Function",
+    "calls": "Calls",
+    "totalMs": "Total (ms)",
+    "meanMs": "Mean (ms)",
+    "p95Ms": "p95 (ms)",
+    "maxMs": "Max (ms)",
+    "cache": "Cache",
+    "cacheHitRate": "Cache hit rate (%)",
+}
+
+
+class ExpressionProfilerDockWidget(QDockWidget):
+    """Table of the timings of the TOMs expression functions (TOMsExpressionProfiler)"""
+
+    def __init__(self, parent=None):
+        super().__init__("TOMs expression profiler", parent)
+        self.setObjectName("TOMsExpressionProfilerDockWidget")
+
+        self.profiler = TOMsExpressionProfiler()
+
+        self.cbEnabled = QCheckBox("Profile")
+        self.cbDumpAfterRender = QCheckBox("Dump after each render")
+        self.btnReset = QPushButton("Reset")
+        self.btnExport = QPushButton("Export ...")
+
+        buttonsLayout = QHBoxLayout()
+        for widget in [self.cbEnabled, self.cbDumpAfterRender]:
+            buttonsLayout.addWidget(widget)
+        buttonsLayout.addStretch()
+        for widget in [self.btnReset, self.btnExport]:
+            buttonsLayout.addWidget(widget)
+
+        self.table = QTableWidget(0, len(REPORT_FIELDS))
+        self.table.setHorizontalHeaderLabels(
+            [COLUMN_TITLES[field] for field in REPORT_FIELDS]
+        )
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+
+        layout = QVBoxLayout()
+        layout.addLayout(buttonsLayout)
+        layout.addWidget(self.table)
+        contents = QWidget()
+        contents.setLayout(layout)
+        self.setWidget(contents)
+
+        self.cbEnabled.setChecked(self.profiler.enabled)
+        self.cbDumpAfterRender.setChecked(bool(self.profiler.dumpDirectory))
+
+        self.cbEnabled.toggled.connect(self.profiler.setEnabled)
+        self.cbDumpAfterRender.toggled.connect(self.onDumpAfterRenderToggled)
+        self.btnReset.clicked.connect(self.profiler.reset)
+        self.btnExport.clicked.connect(self.onExport)
+        self.profiler.profileChanged.connect(self.refresh)
+
+    def refresh(self):
+        self.cbEnabled.setChecked(self.profiler.enabled)
+        if not self.isVisible():
+            return
+
+        rows = self.profiler.report()
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for rowNr, row in enumerate(rows):
+            for columnNr, field in enumerate(REPORT_FIELDS):
+                value = row[field]
+                item = QTableWidgetItem()
+                if value is None:
+                    item.setText("")
+                elif isinstance(value, str):
+                    item.setText(value)
+                else:
+                    if field == "cacheHitRate":
+                        value = round(value * 100.0, 1)
+                    elif isinstance(value, float):
+                        value = round(value, 3)
+                    item.setData(Qt.DisplayRole, value)
+                self.table.setItem(rowNr, columnNr, item)
+        self.table.setSortingEnabled(True)
+        self.table.resizeColumnsToContents()
+
+    def onDumpAfterRenderToggled(self, checked):
+        if not checked:
+            self.profiler.dumpDirectory = None
+            return
+
+        dumpDirectory = QFileDialog.getExistingDirectory(
+            self,
+            "Directory for the expression profiles",
+            self.profiler.dumpDirectory or "",
+        )
+        if dumpDirectory:
+            self.profiler.dumpDirectory = dumpDirectory
+        else:
+            self.cbDumpAfterRender.setChecked(False)
+
+    def onExport(self):
+        fileName, _ = QFileDialog.getSaveFileName(
+            self, "Export expression profile", "", "CSV (*.csv);;JSON (*.json)"
+        )
+        if fileName:
+            self.profiler.dump(fileName)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
@@ -8,7 +8,9 @@ from qgis.core import (
 from qgis.PyQt.QtWidgets import QDockWidget, QMessageBox
 from qgis.utils import iface
 
+from .core.tomsLookupCache import TOMsLookupCache
 from .core.tomsMessageLog import TOMsMessageLog
+from .core.tomsRestrictionLayers import TOMsRestrictionLayers
 
 
 def restrictionInProposal(currRestrictionID, currRestrictionLayerID, proposalID):
@@ -128,16 +130,7 @@ def getLookupDescription(lookupLayer, code):
     searching in the lookupLayer
     """
 
-    if not code:
-        return None
-
-    query = '"Code" = ' + str(code)
-    request = QgsFeatureRequest().setFilterExpression(query)
-
-    for row in lookupLayer.getFeatures(request):
-        return row.attribute("Description")  # make assumption that only one row
-
-    return None
+    return TOMsLookupCache().getValue(lookupLayer, code, "Description")
 
 
 def setupPanelTabs(panel):
@@ -158,37 +151,10 @@ def setupPanelTabs(panel):
 
 def getRestrictionLayersList(tableNames):
     """
-    Returns the restriction layer list
+    Returns the restriction layer list ([code, layer name]), including the label layers
     """
 
-    restrictionLayers = tableNames.getLayer("RestrictionLayers")
-
-    layerTypeList = []
-    for layerType in restrictionLayers.getFeatures():
-
-        layerID = layerType["Code"]
-        layerName = layerType["RestrictionLayerName"]
-
-        layerTypeList.append([layerID, layerName])
-
-    # Add the labels layers...
-    layerTypeList.append([2, "Bays.label_pos"])
-    layerTypeList.append([3, "Lines.label_pos"])
-    layerTypeList.append([3, "Lines.label_loading_pos"])
-    # layerTypeList.append([5, 'Signs.label_pos'])
-    layerTypeList.append([4, "RestrictionPolygons.label_pos"])
-    layerTypeList.append([6, "CPZs.label_pos"])
-    layerTypeList.append([7, "ParkingTariffAreas.label_pos"])
-
-    layerTypeList.append([2, "Bays.label_ldr"])
-    layerTypeList.append([3, "Lines.label_ldr"])
-    layerTypeList.append([3, "Lines.label_loading_ldr"])
-    # layerTypeList.append([5, 'Signs.label_ldr'])
-    layerTypeList.append([4, "RestrictionPolygons.label_ldr"])
-    layerTypeList.append([6, "CPZs.label_ldr"])
-    layerTypeList.append([7, "ParkingTariffAreas.label_ldr"])
-
-    return layerTypeList
+    return TOMsRestrictionLayers().getLayerList(tableNames)
 
 
 def addRestrictionToProposal(restrictionID, restrictionLayerTableID, proposalID, proposedAction):
@@ -0,0 +1,130 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import pytest
+from qgis.core import (
+    QgsExpressionContextUtils,
+    QgsFeature,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProject,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsSettings import TOMsSettingsManager
+
+# project variables read by the display geometries (see TOMsGeometrySettings)
+GEOMETRY_VARIABLES = {
+    "BayWidth": 2.0,
+    "BayLength": 5.0,
+    "BayOffsetFromKerb": 0.25,
+    "LineOffsetFromKerb": 0.3,
+    "CrossoverShapeWidth": 1.5,
+}
+
+
+@pytest.fixture()
+def projectVariables():
+    """
+    Sets project variables, as projectVariables(name=value, ...), and returns the
+    TOMsSettingsManager with the settings read again. The variables are restored on
+    teardown.
+    """
+
+    project = QgsProject.instance()
+    projectScope = QgsExpressionContextUtils.projectScope(project)
+    previousValues = {}
+
+    def setProjectVariables(**variables):
+        for name, value in variables.items():
+            if name not in previousValues:
+                previousValues[name] = (
+                    projectScope.variable(name)
+                    if projectScope.hasVariable(name)
+                    else None
+                )
+            QgsExpressionContextUtils.setProjectVariable(project, name, value)
+        manager = TOMsSettingsManager()
+        manager.refresh()
+        return manager
+
+    yield setProjectVariables
+
+    for name, value in previousValues.items():
+        if value is None:
+            QgsExpressionContextUtils.removeProjectVariable(project, name)
+        else:
+            QgsExpressionContextUtils.setProjectVariable(project, name, value)
+    TOMsSettingsManager().refresh()
+
+
+@pytest.fixture()
+def geometrySettings(projectVariables):
+    """The TOMsSettingsManager, with the GEOMETRY_VARIABLES set"""
+    return projectVariables(**GEOMETRY_VARIABLES)
+
+
+@pytest.fixture()
+def bayDivisions(geometrySettings):
+    """
+    As geometrySettings, with the bay divisions shown (TOMs.conf ShowBayDivisions).
+    Any project variable set afterwards reads the settings again.
+    """
+    geometrySettings.currSettings = geometrySettings.currSettings._replace(
+        showBayDivisions=True
+    )
+    return geometrySettings
+
+
+def createRestrictionFeature(
+    geometry,
+    restGeomType,
+    geometryID="T_1",
+    azimuthToRoadCentreLine=0.0,
+    nrBays=2,
+    bayOrientation=None,
+):
+    """A feature with the attributes read by TOMsGeometryElement"""
+
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("GeomShapeID", QVariant.Int))
+    fields.append(QgsField("AzimuthToRoadCentreLine", QVariant.Double))
+    fields.append(QgsField("NrBays", QVariant.Int))
+    fields.append(QgsField("BayOrientation", QVariant.Double))
+    fields.append(QgsField("BayWidth", QVariant.Double))
+    feature = QgsFeature(fields)
+    if not isinstance(geometry, QgsGeometry):
+        # (x, y) of the kerb line
+        geometry = QgsGeometry.fromPolylineXY([QgsPointXY(x, y) for x, y in geometry])
+    feature.setGeometry(geometry)
+    feature.setAttributes(
+        [
+            geometryID,
+            restGeomType.value,
+            azimuthToRoadCentreLine,
+            nrBays,
+            bayOrientation,
+            None,
+        ]
+    )
+    return feature
+
+
+@pytest.fixture()
+def createFeature():
+    """
+    Factory of restriction features: createFeature(geometry or points, restGeomType,
+    geometryID, azimuthToRoadCentreLine, nrBays, bayOrientation)
+    """
+    return createRestrictionFeature
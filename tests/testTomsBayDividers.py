@@ -0,0 +1,159 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import logging
+import math
+import timeit
+
+import pytest
+from qgis.core import QgsGeometry, QgsPointXY
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsBayDividers import bayRings, edgeCrossing, edgeSegments
+from TOMsPlugin.core.tomsGeometryElement import (
+    GeneratedGeometryBayPolygonType,
+    GeneratedGeometryEchelonPolygonType,
+)
+
+
+def createKerbLine(length, nrVertices):
+    """A gently curving line of the given length (approximately)"""
+    step = length / (nrVertices - 1)
+    return [
+        QgsPointXY(i * step, 5.0 * math.sin(i * step / 20.0)) for i in range(nrVertices)
+    ]
+
+
+def createBay(createFeature, points, restGeomType, nrBays):
+    return createFeature(
+        QgsGeometry.fromPolylineXY(points), restGeomType, "B_1", 0.0, nrBays, 30.0
+    )
+
+
+def divideBay(element, shpExtent):
+    """The bay spaces, built in one go and by splitting the polygon"""
+
+    shape, parallelLine = element.getShape(shpExtent)
+    polygon = element.generatePolygon([(shape, parallelLine)])
+
+    spaces = element.addBayPolygonDividers(
+        QgsGeometry(polygon), shape, parallelLine, shpExtent
+    )
+    splitSpaces = element.splitBayPolygon(
+        QgsGeometry(polygon),
+        element.getBayDividers(shape, parallelLine, shpExtent),
+    )
+    return polygon, spaces, splitSpaces
+
+
+def testEdgeCrossing():
+    xs = [0.0, 10.0, 20.0]
+    ys = [1.0, 1.0, 1.0]
+
+    assert edgeCrossing(xs, ys, range(2), 5.0, 0.0, 5.0, 2.0) == ((0, 0.5), 5.0, 1.0)
+    # the end of a segment is the start of the next one
+    assert edgeCrossing(xs, ys, range(2), 10.0, 0.0, 10.0, 2.0)[0] == (1, 0.0)
+    assert edgeCrossing(xs, ys, range(2), 25.0, 0.0, 25.0, 2.0) is None
+
+    assert list(edgeSegments(10, 10, 0)) == [0, 1]
+    assert list(edgeSegments(10, 10, 8)) == [7, 8]
+    assert list(edgeSegments(8, 10, 4)) == list(range(7))
+
+
+def testBayRings():
+    # a 20 x 2 rectangle, cut in the middle
+    parallel = ([0.0, 20.0], [0.0, 0.0])
+    outside = ([0.0, 20.0], [2.0, 2.0])
+    crossings = [(((0, 0.5), 10.0, 0.0), ((0, 0.5), 10.0, 2.0))]
+
+    rings = bayRings(*parallel, *outside, crossings)
+    assert len(rings) == 2
+    for ring in rings:
+        polygon = QgsGeometry.fromPolygonXY([[QgsPointXY(x, y) for x, y in ring]])
+        assert polygon.area() == pytest.approx(20.0)
+
+
+@pytest.mark.usefixtures("bayDivisions")
+@pytest.mark.parametrize("nrBays", [2, 5, 12])
+@pytest.mark.parametrize(
+    "elementType, restGeomType",
+    [
+        (
+            GeneratedGeometryBayPolygonType,
+            RestrictionGeometryTypes.PARALLEL_BAY_POLYGON,
+        ),
+        (GeneratedGeometryEchelonPolygonType, RestrictionGeometryTypes.ECHELON_POLYGON),
+    ],
+)
+def testBaySpaces(createFeature, elementType, restGeomType, nrBays):
+    """The spaces built in one go are those given by splitting the polygon"""
+
+    element = elementType(
+        createBay(createFeature, createKerbLine(80.0, 9), restGeomType, nrBays)
+    )
+    if restGeomType == RestrictionGeometryTypes.ECHELON_POLYGON:
+        shpExtent = element.bayLength
+    else:
+        shpExtent = element.bayWidth
+    polygon, spaces, splitSpaces = divideBay(element, shpExtent)
+
+    assert spaces.constGet().numGeometries() == nrBays
+    assert spaces.area() == pytest.approx(polygon.area())
+    assert spaces.symDifference(splitSpaces).area() < 1e-6
+
+    for spaceNr in range(nrBays):
+        space = QgsGeometry(spaces.constGet().geometryN(spaceNr).clone())
+        assert space.isGeosValid()
+
+
+@pytest.mark.usefixtures("bayDivisions")
+def testBayDividersBenchmark(createFeature):
+    """Bay spaces built in one go and by splitting the polygon, for NrBays 1 to 50"""
+
+    kerb = createKerbLine(300.0, 60)
+    times = []
+
+    for nrBays in range(1, 51):
+        element = GeneratedGeometryBayPolygonType(
+            createBay(
+                createFeature,
+                kerb,
+                RestrictionGeometryTypes.PARALLEL_BAY_POLYGON,
+                nrBays,
+            )
+        )
+        shape, parallelLine = element.getShape()
+        polygon = element.generatePolygon([(shape, parallelLine)])
+
+        def inOneGo():
+            return element.addBayPolygonDividers(
+                QgsGeometry(polygon), shape, parallelLine
+            )
+
+        def bySplitting():
+            return element.splitBayPolygon(
+                QgsGeometry(polygon), element.getBayDividers(shape, parallelLine)
+            )
+
+        assert inOneGo().symDifference(bySplitting()).area() < 1e-6
+
+        oneGoTime = min(timeit.repeat(inOneGo, number=5, repeat=3)) / 5
+        splitTime = min(timeit.repeat(bySplitting, number=5, repeat=3)) / 5
+        times.append((nrBays, oneGoTime, splitTime))
+
+    for nrBays, oneGoTime, splitTime in times:
+        if nrBays in (1, 5, 10, 20, 30, 40, 50):
+            logging.info(
+                "300 m bay, NrBays %s: in one go %.2f ms; splitting %.2f ms",
+                nrBays,
+                oneGoTime * 1000,
+                splitTime * 1000,
+            )
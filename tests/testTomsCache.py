@@ -0,0 +1,49 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import os
+
+from TOMsPlugin.core.tomsCache import TOMsLruCache
+
+
+class GeometryIDCache(TOMsLruCache):
+    DISABLE_VARIABLE = "TOMs_DISABLE_TEST_CACHE"
+    DEFAULT_MAX_SIZE = 2
+    KEYED_ON_GEOMETRY_ID = True
+
+
+def testLruCache():
+    cache = GeometryIDCache()
+    assert cache.enabled
+
+    cache.put(("B_001", 1), "a")
+    cache.put(("B_002", 1), "b")
+    assert cache.get(("B_001", 1)) == "a"
+
+    # the least recently used entry is evicted
+    cache.put(("B_003", 1), "c")
+    assert cache.get(("B_002", 1)) is None
+    assert cache.get(("B_001", 1)) == "a"
+
+    assert cache.get(("B_003", 1), lambda value: value == "other") is None
+
+    cache.invalidate("B_001")
+    assert cache.get(("B_001", 1)) is None
+    assert list(cache.keysByGeometryID) == ["B_003"]
+
+    statistics = cache.statistics()
+    assert (statistics["hits"], statistics["misses"]) == (2, 3)
+    assert (statistics["evictions"], statistics["invalidations"]) == (1, 1)
+
+
+def testLruCacheDisabled(monkeypatch):
+    monkeypatch.setitem(os.environ, "TOMs_DISABLE_TEST_CACHE", "1")
+    assert not GeometryIDCache().enabled
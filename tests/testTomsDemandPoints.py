@@ -0,0 +1,172 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import random
+
+import pytest
+from qgis.core import (
+    NULL,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProject,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core import tomsDemandPoints
+from TOMsPlugin.core.tomsDemandPoints import TOMsDemandPointCache, selectEmptyBays
+
+
+def testSelectEmptyBays():
+    """The same bays for a restriction, whatever else has been drawn before"""
+
+    emptyBays = selectEmptyBays("B_0001", 10, 4, 1)
+    random.seed(1)
+    random.random()
+    assert selectEmptyBays("B_0001", 10, 4, 1) == emptyBays
+    assert len(set(emptyBays)) == 4
+
+    # the global generator is not touched
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    selectEmptyBays("B_0001", 10, 4, 1)
+    assert random.random() == expected
+
+    # half on/half off - the second set of bays is never shown
+    assert set(range(10, 20)) <= set(selectEmptyBays("B_0001", 10, 4, 22))
+
+
+def createSurveyLayer():
+    layer = QgsVectorLayer("LineString?crs=epsg:27700", "Bays", "memory")
+    layer.dataProvider().addAttributes(
+        [
+            QgsField("GeometryID", QVariant.String),
+            QgsField("GeomShapeID", QVariant.Int),
+            QgsField("NrBays", QVariant.Int),
+            QgsField("Demand", QVariant.Double),
+        ]
+    )
+    layer.updateFields()
+
+    features = []
+    for nr in range(3):
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(
+            QgsGeometry.fromPolylineXY(
+                [QgsPointXY(0, nr * 10), QgsPointXY(25, nr * 10)]
+            )
+        )
+        feature.setAttributes(["B_{}".format(nr), 1, 5, 2.0])
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+@pytest.fixture()
+def computed(monkeypatch):
+    """The GeometryIDs of the restrictions whose demand points are computed"""
+
+    computed = []
+
+    def calculateDemandPoints(feature):
+        computed.append(feature.attribute("GeometryID"))
+        return QgsGeometry.fromMultiPointXY(
+            [QgsPointXY(i, 0) for i in range(int(feature.attribute("Demand")))]
+        )
+
+    monkeypatch.setattr(
+        tomsDemandPoints, "calculateDemandPoints", calculateDemandPoints
+    )
+    return computed
+
+
+def testDemandPointCache(computed):
+    """Only restrictions with changed inputs are computed again"""
+
+    cache = TOMsDemandPointCache()
+    cache.enabled = True
+    cache.clear()
+
+    surveyLayer = createSurveyLayer()
+    for _ in range(2):
+        for feature in surveyLayer.getFeatures():
+            cache.getDemandPoints(feature)
+    assert sorted(computed) == ["B_0", "B_1", "B_2"]
+
+    feature = next(surveyLayer.getFeatures())
+    assert cache.getDemandPoints(feature).asWkt() == "MultiPoint ((0 0),(1 0))"
+
+    feature["Demand"] = 4.0
+    assert len(cache.getDemandPoints(feature).asMultiPoint()) == 4
+    assert computed[3:] == ["B_0"]
+
+    # restrictions without a GeometryID are computed each time
+    feature["GeometryID"] = NULL
+    cache.getDemandPoints(feature)
+    cache.getDemandPoints(feature)
+    assert computed[4:] == [NULL, NULL]
+    assert cache.statistics()["size"] == 3
+
+    # bounded size
+    cache.setMaxSize(2)
+    assert cache.statistics()["size"] == 2
+    cache.setMaxSize(TOMsDemandPointCache.DEFAULT_MAX_SIZE)
+
+
+def testDemandLayer(computed):
+    """The point layer of a survey layer, built in one pass and kept up to date"""
+
+    cache = TOMsDemandPointCache()
+    cache.enabled = True
+    cache.clear()
+
+    surveyLayer = createSurveyLayer()
+    demandLayer = cache.demandLayer(surveyLayer)
+    assert sorted(computed) == ["B_0", "B_1", "B_2"]
+    assert demandLayer.featureCount() == 6
+    geometryIDs = [feature["GeometryID"] for feature in demandLayer.getFeatures()]
+    assert sorted(geometryIDs) == ["B_0", "B_0", "B_1", "B_1", "B_2", "B_2"]
+
+    # the expression reads from the cache
+    feature = next(surveyLayer.getFeatures())
+    assert cache.getDemandPoints(feature).asWkt() == "MultiPoint ((0 0),(1 0))"
+    assert len(computed) == 3
+
+    # only the changed bay is computed again
+    surveyLayer.startEditing()
+    surveyLayer.changeAttributeValue(
+        feature.id(), surveyLayer.fields().indexFromName("Demand"), 4.0
+    )
+    surveyLayer.commitChanges()
+
+    assert cache.demandLayer(surveyLayer) is demandLayer
+    assert computed[3:] == ["B_0"]
+    assert demandLayer.featureCount() == 8
+
+
+def testDemandLayerRemoved(computed):
+    """The point layer goes with its survey layer"""
+
+    cache = TOMsDemandPointCache()
+    project = QgsProject.instance()
+
+    surveyLayer = createSurveyLayer()
+    project.addMapLayer(surveyLayer)
+    demandLayer = cache.demandLayer(surveyLayer)
+    project.addMapLayer(demandLayer)
+    demandLayerID = demandLayer.id()
+
+    project.removeMapLayer(surveyLayer.id())
+    assert project.mapLayer(demandLayerID) is None
+    assert not cache.demandLayers
@@ -0,0 +1,157 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+"""
+Parity of the PostGIS display geometry functions (DATAMODEL/0063a) with
+ElementGeometryFactory.
+
+Needs a PostGIS database, given as a libpq connection string by the environment
+variable TOMs_TEST_DATABASE, e.g. "service=toms_test". Nothing is left in the database.
+"""
+
+import math
+import os
+import random
+
+import pytest
+from qgis.core import QgsGeometry, QgsPointXY, QgsWkbTypes
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsGeometryElement import ElementGeometryFactory
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+FUNCTIONS_FILE = os.path.join(
+    os.path.dirname(__file__),
+    os.pardir,
+    "DATAMODEL",
+    "0063a_display_geometry_functions.sql",
+)
+
+TOLERANCE = 1e-6
+
+
+@pytest.fixture(scope="module")
+def cursor():
+    dsn = os.environ.get("TOMs_TEST_DATABASE")
+    if not dsn:
+        pytest.skip("TOMs_TEST_DATABASE not set")
+
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+            cur.execute("CREATE SCHEMA IF NOT EXISTS toms")
+            with open(FUNCTIONS_FILE, encoding="utf-8") as sqlFile:
+                cur.execute(sqlFile.read())
+            yield cur
+    finally:
+        # the functions (and schema) are not kept
+        connection.rollback()
+        connection.close()
+
+
+@pytest.fixture()
+def settings(bayDivisions):
+    return bayDivisions.currSettings
+
+
+def generateKerbs(nrKerbs, seed=18):
+    """Kerb lines of 2 to 6 vertices, with the azimuth to the road centre line"""
+
+    generator = random.Random(seed)
+    kerbs = []
+    for _ in range(nrKerbs):
+        heading = generator.uniform(0.0, 360.0)
+        x, y = generator.uniform(0, 1000), generator.uniform(0, 1000)
+        points = [QgsPointXY(x, y)]
+        for _ in range(generator.randint(1, 5)):
+            heading += generator.uniform(-40.0, 40.0)
+            length = generator.uniform(3.0, 25.0)
+            x += length * math.sin(math.radians(heading))
+            y += length * math.cos(math.radians(heading))
+            points.append(QgsPointXY(x, y))
+        side = generator.choice([-90.0, 90.0])
+        azimuthToCentreLine = (heading + side) % 360.0
+        kerbs.append((QgsGeometry.fromPolylineXY(points), azimuthToCentreLine))
+    return kerbs
+
+
+def selfApproachingKerb():
+    """
+    A kerb turning back on itself, 3 m from its start, with the road centre line on the
+    inside - the edges of each leg come within the bay width of the other leg
+    """
+
+    points = [(0.0, 0.0), (30.0, 0.0), (32.0, 1.5), (30.0, 3.0), (0.0, 3.0)]
+    return QgsGeometry.fromPolylineXY([QgsPointXY(x, y) for x, y in points]), 0.0
+
+
+def sqlDisplayGeometry(cur, feature, currSettings):
+    cur.execute(
+        """
+        SELECT ST_AsBinary(toms.toms_display_geometry(
+            ST_GeomFromWKB(%s, 27700), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s))
+        """,
+        (
+            psycopg2.Binary(bytes(feature.geometry().asWkb())),
+            feature["GeomShapeID"],
+            feature["AzimuthToRoadCentreLine"],
+            feature["NrBays"],
+            feature["BayOrientation"],
+            None,
+            currSettings.bayWidth,
+            currSettings.bayLength,
+            currSettings.bayOffsetFromKerb,
+            currSettings.lineOffsetFromKerb,
+            currSettings.crossoverShapeWidth,
+            currSettings.showBayDivisions,
+        ),
+    )
+    wkb = cur.fetchone()[0]
+    if wkb is None:
+        return None
+    geometry = QgsGeometry()
+    geometry.fromWkb(bytes(wkb))
+    return geometry
+
+
+def assertSameGeometry(pythonGeometry, sqlGeometry, description):
+    if pythonGeometry is None or pythonGeometry.isEmpty():
+        assert sqlGeometry is None or sqlGeometry.isEmpty(), description
+        return
+
+    assert sqlGeometry is not None, description
+    assert pythonGeometry.type() == sqlGeometry.type(), description
+    assert pythonGeometry.hausdorffDistance(sqlGeometry) < TOLERANCE, description
+    if pythonGeometry.type() == QgsWkbTypes.PolygonGeometry:
+        assert abs(pythonGeometry.area() - sqlGeometry.area()) < TOLERANCE, description
+
+
+@pytest.mark.parametrize("restGeomType", list(RestrictionGeometryTypes))
+def testDisplayGeometryParity(cursor, settings, createFeature, restGeomType):
+    """The SQL functions give the geometries of ElementGeometryFactory"""
+
+    kerbs = generateKerbs(25) + [selfApproachingKerb()]
+    for kerbNr, (kerb, azimuthToCentreLine) in enumerate(kerbs):
+        for nrBays, orientation in [(-1, None), (1, 45.0), (3, None), (4, 60.0)]:
+            feature = createFeature(
+                kerb, restGeomType, "T_1", azimuthToCentreLine, nrBays, orientation
+            )
+            description = "{} kerb {}: NrBays {}, orientation {}".format(
+                restGeomType, kerbNr, nrBays, orientation
+            )
+
+            assertSameGeometry(
+                ElementGeometryFactory.generateElementGeometry(feature, restGeomType),
+                sqlDisplayGeometry(cursor, feature, settings),
+                description,
+            )
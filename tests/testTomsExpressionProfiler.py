@@ -0,0 +1,111 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import csv
+import inspect
+import json
+
+from TOMsPlugin.core.tomsExpressionProfiler import (
+    REPORT_FIELDS,
+    TOMsExpressionProfiler,
+    percentile,
+)
+from TOMsPlugin.core.tomsLabelCache import TOMsLabelCache
+
+
+class ExpressionFunction:
+    """As the QgsExpressionFunction created by qgsfunction"""
+
+    def __init__(self, function):
+        self.function = function
+
+    def name(self):
+        return self.function.__name__
+
+    def call(self, *values):
+        return self.function(*values)
+
+
+def getBayLabelText(feature, parent, context):
+    return "Bay {}".format(feature)
+
+
+def getRoadName(feature, parent):
+    return "Road {}".format(feature)
+
+
+def testPercentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 1.0) == 100
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([], 0.95) == 0.0
+
+
+def testProfiler(tmp_path):
+    """Calls are only timed while the profiler is enabled"""
+
+    labelFunction = ExpressionFunction(getBayLabelText)
+    roadFunction = ExpressionFunction(getRoadName)
+
+    profiler = TOMsExpressionProfiler()
+    profiler.dumpDirectory = None
+    profiler.install([labelFunction, roadFunction])
+    profiler.setEnabled(False)
+
+    # off: the functions are untouched
+    assert labelFunction.function is getBayLabelText
+    assert profiler.endRender() == []
+
+    profiler.setEnabled(True)
+
+    # the arguments are still visible to qgsfunction
+    assert inspect.getfullargspec(labelFunction.function).args == [
+        "feature",
+        "parent",
+        "context",
+    ]
+
+    for featureNr in range(10):
+        assert labelFunction.call(featureNr, None, None) == "Bay {}".format(featureNr)
+    roadFunction.call(1, None)
+
+    # hit rate of the label cache since the profiler was enabled
+    TOMsLabelCache().enabled = True
+    TOMsLabelCache().startRenderPass()
+    TOMsLabelCache().getRenderValue(("Profiler", 1), lambda: 1)
+    TOMsLabelCache().getRenderValue(("Profiler", 1), lambda: 1)
+
+    rows = {row["function"]: row for row in profiler.report()}
+    assert rows["getBayLabelText"]["calls"] == 10
+    assert rows["getBayLabelText"]["cache"] == "TOMsLabelCache"
+    assert rows["getBayLabelText"]["cacheHitRate"] == 0.5
+    assert rows["getRoadName"]["calls"] == 1
+    assert rows["getRoadName"]["cacheHitRate"] is None
+    assert rows["getBayLabelText"]["p95Ms"] <= rows["getBayLabelText"]["maxMs"]
+
+    # dumps
+    profiler.dumpDirectory = str(tmp_path)
+    csvFile, jsonFile = profiler.endRender("atlas")
+
+    with open(csvFile, encoding="utf-8") as dumpFile:
+        csvRows = list(csv.DictReader(dumpFile))
+    assert list(csvRows[0].keys()) == REPORT_FIELDS
+    assert len(csvRows) == 2
+
+    with open(jsonFile, encoding="utf-8") as dumpFile:
+        assert len(json.load(dumpFile)["functions"]) == 2
+
+    # off again: the original functions are put back
+    profiler.uninstall()
+    assert labelFunction.function is getBayLabelText
+    assert roadFunction.function is getRoadName
+    profiler.dumpDirectory = None
@@ -0,0 +1,93 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import pytest
+from qgis.core import QgsFeature, QgsField, QgsGeometry, QgsPointXY, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsGeometryBake import bakeLayer, openBakeLayer
+
+
+def createBaysLayer(nrBays):
+    layer = QgsVectorLayer("LineString?crs=epsg:27700", "Bays", "memory")
+    provider = layer.dataProvider()
+    provider.addAttributes(
+        [
+            QgsField("GeometryID", QVariant.String),
+            QgsField("GeomShapeID", QVariant.Int),
+            QgsField("AzimuthToRoadCentreLine", QVariant.Double),
+            QgsField("NrBays", QVariant.Int),
+            QgsField("BayOrientation", QVariant.Double),
+            QgsField("BayWidth", QVariant.Double),
+        ]
+    )
+    layer.updateFields()
+
+    features = []
+    for bayNr in range(nrBays):
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(
+            QgsGeometry.fromPolylineXY(
+                [QgsPointXY(0, 10.0 * bayNr), QgsPointXY(12.0, 10.0 * bayNr)]
+            )
+        )
+        feature.setAttributes(
+            [
+                "B_{}".format(bayNr),
+                RestrictionGeometryTypes.PARALLEL_BAY.value,
+                90.0,
+                2,
+                None,
+                None,
+            ]
+        )
+        features.append(feature)
+    provider.addFeatures(features)
+
+    return layer
+
+
+@pytest.mark.usefixtures("geometrySettings")
+def testIncrementalBake(tmp_path):
+    """Only new or changed restrictions are generated again"""
+
+    baysLayer = createBaysLayer(5)
+    outputLayer = openBakeLayer(str(tmp_path / "bake.gpkg"), baysLayer.crs())
+    assert outputLayer.isValid()
+
+    statistics = bakeLayer(baysLayer, outputLayer)
+    assert statistics["generated"] == 5
+    assert outputLayer.featureCount() == 5
+    assert all(not row.geometry().isEmpty() for row in outputLayer.getFeatures())
+
+    # nothing has changed
+    statistics = bakeLayer(baysLayer, outputLayer)
+    assert statistics["generated"] == 0
+    assert statistics["unchanged"] == 5
+
+    # one changed and one deleted restriction
+    feature = next(baysLayer.getFeatures())
+    baysLayer.dataProvider().changeAttributeValues(
+        {feature.id(): {baysLayer.fields().indexFromName("NrBays"): 3}}
+    )
+    lastFeature = list(baysLayer.getFeatures())[-1]
+    baysLayer.dataProvider().deleteFeatures([lastFeature.id()])
+
+    statistics = bakeLayer(baysLayer, outputLayer)
+    assert statistics["generated"] == 1
+    assert statistics["unchanged"] == 3
+    assert statistics["deleted"] == 1
+    assert outputLayer.featureCount() == 4
+
+    # the file is opened again rather than created
+    outputLayer = openBakeLayer(str(tmp_path / "bake.gpkg"), baysLayer.crs())
+    assert outputLayer.featureCount() == 4
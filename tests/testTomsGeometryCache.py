@@ -0,0 +1,78 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsFields, QgsGeometry, QgsPointXY
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsGeometryCache import TOMsGeometryCache
+
+
+def createFeature(geometryID, xEnd=10.0, nrBays=2):
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("GeomShapeID", QVariant.Int))
+    fields.append(QgsField("NrBays", QVariant.Int))
+    feature = QgsFeature(fields)
+    feature.setGeometry(
+        QgsGeometry.fromPolylineXY([QgsPointXY(0, 0), QgsPointXY(xEnd, 0)])
+    )
+    feature.setAttributes([geometryID, 1, nrBays])
+    return feature
+
+
+def testGeometryCache():
+    """Check hits, misses, eviction and invalidation of the display geometry cache"""
+
+    cache = TOMsGeometryCache()
+    cache.setEnabled(True)
+    cache.clear()
+    cache.resetStatistics()
+    cache.setMaxSize(2)
+
+    calls = []
+
+    def generator():
+        calls.append(1)
+        return QgsGeometry.fromPointXY(QgsPointXY(len(calls), 0))
+
+    featureA = createFeature("B_001")
+    featureB = createFeature("B_002")
+    featureC = createFeature("B_003")
+    shape = RestrictionGeometryTypes.PARALLEL_BAY
+
+    cache.getElementGeometry(featureA, shape, generator)
+    cache.getElementGeometry(featureA, shape, generator)
+    assert len(calls) == 1
+    assert cache.statistics()["hits"] == 1
+
+    # a change to any input gives a new entry
+    cache.getElementGeometry(createFeature("B_001", nrBays=3), shape, generator)
+    assert len(calls) == 2
+
+    # bounded size - oldest entries are evicted
+    cache.getElementGeometry(featureB, shape, generator)
+    cache.getElementGeometry(featureC, shape, generator)
+    assert cache.statistics()["size"] == 2
+    assert cache.statistics()["evictions"] == 2
+
+    cache.invalidate("B_003")
+    assert cache.statistics()["size"] == 1
+    cache.getElementGeometry(featureC, shape, generator)
+    assert len(calls) == 5
+
+    # disabled cache always generates
+    cache.setEnabled(False)
+    cache.getElementGeometry(featureC, shape, generator)
+    assert len(calls) == 6
+
+    cache.setEnabled(True)
+    cache.setMaxSize(TOMsGeometryCache.DEFAULT_MAX_SIZE)
@@ -177,3 +177,13 @@ def testGeneratedSignLine():
         lineGeom, nrPlatesInSign, distanceForIcons
     )
     assert newLineGeom is None  # TODO: And this is normal?
+
+
+def testSignPointsBeyondLine():
+    """Icons that do not fit on the sign line are put at its end, not at the origin"""
+
+    lineGeom = QgsGeometry.fromPolylineXY([QgsPointXY(10, 10), QgsPointXY(10, 18)])
+    linePts = generateGeometryUtils.GenerateGeometryUtils.addPointsToSignLine(
+        lineGeom, 3, 4
+    )
+    assert linePts == [QgsPointXY(10, 14), QgsPointXY(10, 18), QgsPointXY(10, 18)]
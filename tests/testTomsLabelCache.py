@@ -0,0 +1,78 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsFields
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsLabelCache import TOMsLabelCache
+from TOMsPlugin.generateGeometryUtils import GenerateGeometryUtils
+
+
+def createFeature(featureID, maxStayID):
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("MaxStayID", QVariant.Int))
+    feature = QgsFeature(fields, featureID)
+    feature.setAttributes(["B_{}".format(featureID), maxStayID])
+    return feature
+
+
+def testLabelCache():
+    """Labels are computed once per feature and render pass"""
+
+    cache = TOMsLabelCache()
+    cache.enabled = True
+    cache.startRenderPass()
+    cache.resetStatistics()
+
+    calls = []
+
+    def generator():
+        calls.append(1)
+        return "1 hour", None, "Mon-Fri 8.00am-6.30pm"
+
+    feature = createFeature(1, 3)
+
+    # e.g., getBayMaxStayLabelText, getBayNoReturnLabelText, getBayTimePeriodLabelText
+    for _ in range(3):
+        assert cache.getLabels("Bay", feature, generator)[0] == "1 hour"
+    assert len(calls) == 1
+
+    # a different label type, feature or attribute value is computed again
+    cache.getLabels("WaitingLoading", feature, generator)
+    cache.getLabels("Bay", createFeature(2, 3), generator)
+    cache.getLabels("Bay", createFeature(1, 4), generator)
+    assert len(calls) == 4
+
+    # a new render pass starts from scratch
+    cache.startRenderPass()
+    cache.getLabels("Bay", feature, generator)
+    assert len(calls) == 5
+    assert cache.statistics()["hits"] == 2
+
+
+def testLabelLeaderGeometryChanged():
+    """Parent geometries are read again after a change, within the same render pass"""
+
+    cache = TOMsLabelCache()
+    cache.enabled = True
+    cache.startRenderPass()
+
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("geom", QVariant.String))
+    feature = QgsFeature(fields, 1)
+
+    feature.setAttributes(["B_1", "SRID=27700;LINESTRING(0 0, 10 0)"])
+    assert GenerateGeometryUtils.getParentGeometry(feature).length() == 10
+
+    feature.setAttributes(["B_1", "SRID=27700;LINESTRING(0 0, 20 0)"])
+    assert GenerateGeometryUtils.getParentGeometry(feature).length() == 20
@@ -0,0 +1,99 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsFields, QgsGeometry, QgsPointXY
+from qgis.PyQt.QtCore import QByteArray, QVariant
+
+from TOMsPlugin.core.tomsLabelCache import TOMsLabelCache
+from TOMsPlugin.generateGeometryUtils import GenerateGeometryUtils
+
+KERB = "LINESTRING(0 0, 10 0, 20 5)"
+
+
+def createLabelFeature(featureID, geometryID, parentGeom):
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("geom", QVariant.String))
+    feature = QgsFeature(fields, featureID)
+    feature.setAttributes([geometryID, parentGeom])
+    feature.setGeometry(
+        QgsGeometry.fromMultiPointXY([QgsPointXY(5, 3), QgsPointXY(15, 8)])
+    )
+    return feature
+
+
+def testReadParentGeometry():
+    """eWKT, WKT, WKB and geometries give the same parent geometry"""
+
+    expected = QgsGeometry.fromWkt(KERB)
+
+    for value in [
+        "SRID=27700;" + KERB,
+        KERB,
+        QByteArray(expected.asWkb()),
+        bytes(expected.asWkb()),
+        QgsGeometry(expected),
+    ]:
+        geom = GenerateGeometryUtils.readParentGeometry(value)
+        assert geom.equals(expected), value
+
+    assert GenerateGeometryUtils.readParentGeometry(None).isEmpty()
+
+
+def testMultiLabelLeaders():
+    """Leaders go from each label position to the nearest point of the parent"""
+
+    cache = TOMsLabelCache()
+    cache.enabled = True
+    cache.startRenderPass()
+
+    feature = createLabelFeature(1, "S_1", "SRID=27700;" + KERB)
+    leaders = GenerateGeometryUtils.generateMultiLabelLeaders(feature, 0.0)
+
+    lines = leaders.asMultiPolyline()
+    assert len(lines) == 2
+    assert lines[0][0] == QgsPointXY(5, 0)
+    assert lines[0][1] == QgsPointXY(5, 3)
+    assert lines[1][1] == QgsPointXY(15, 8)
+
+    # the same leaders from a WKB parent
+    wkbFeature = createLabelFeature(
+        2, "S_2", QByteArray(QgsGeometry.fromWkt(KERB).asWkb())
+    )
+    cache.startRenderPass()
+    assert GenerateGeometryUtils.generateMultiLabelLeaders(wkbFeature, 0.0).equals(
+        leaders
+    )
+
+    # out of scale
+    assert GenerateGeometryUtils.generateMultiLabelLeaders(feature, 1.0e9) is None
+
+
+def testParentGeometryReadOncePerRender():
+    """Label layers of the same restriction share the parent geometry"""
+
+    cache = TOMsLabelCache()
+    cache.enabled = True
+    cache.startRenderPass()
+    cache.resetStatistics()
+
+    waiting = createLabelFeature(1, "S_1", "SRID=27700;" + KERB)
+    loading = createLabelFeature(7, "S_1", "SRID=27700;" + KERB)
+
+    GenerateGeometryUtils.generateMultiLabelLeaders(waiting, 0.0)
+    GenerateGeometryUtils.generateMultiLabelLeaders(loading, 0.0)
+    assert cache.statistics()["misses"] == 1
+    assert cache.statistics()["hits"] == 1
+
+    # a new render pass reads it again
+    cache.startRenderPass()
+    GenerateGeometryUtils.generateMultiLabelLeaders(waiting, 0.0)
+    assert cache.statistics()["misses"] == 2
@@ -0,0 +1,127 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import threading
+
+import pytest
+from qgis.core import (
+    QgsExpressionContext,
+    QgsExpressionContextScope,
+    QgsFeature,
+    QgsField,
+    QgsProject,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsLookupCache import TOMsLookupCache
+from TOMsPlugin.generateGeometryUtils import GenerateGeometryUtils
+
+
+def createLookupLayer():
+    lookupLayer = QgsVectorLayer("None", "TimePeriodsInUse_View", "memory")
+    lookupProvider = lookupLayer.dataProvider()
+    lookupProvider.addAttributes(
+        [QgsField("Code", QVariant.Int), QgsField("LabelText", QVariant.String)]
+    )
+    lookupLayer.updateFields()
+
+    feature = QgsFeature(lookupLayer.fields())
+    feature.setAttributes([1, "Mon-Fri 8.00am-6.30pm"])
+    lookupProvider.addFeatures([feature])
+    return lookupLayer
+
+
+def getFromThread(function):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+def testStaleSnapshot():
+    """Render threads use the previous snapshot until it is rebuilt on the main thread"""
+
+    lookupLayer = createLookupLayer()
+    cache = TOMsLookupCache()
+    cache.preloadLayers([lookupLayer])
+
+    def getLabel():
+        return cache.getValue(lookupLayer, 1, "LabelText")
+
+    assert getFromThread(getLabel) == "Mon-Fri 8.00am-6.30pm"
+
+    lookupLayer.startEditing()
+    lookupLayer.changeAttributeValue(next(lookupLayer.getFeatures()).id(), 1, "Mon-Sat")
+    lookupLayer.commitChanges()
+
+    assert getFromThread(getLabel) == "Mon-Fri 8.00am-6.30pm"
+    assert getLabel() == "Mon-Sat"
+    assert getFromThread(getLabel) == "Mon-Sat"
+
+    # snapshots are read-only
+    with pytest.raises(TypeError):
+        cache.getRow(lookupLayer, 1)["LabelText"] = "changed"
+
+
+def testSnapshotNotBuiltOnRenderThread():
+    """A render thread gets no snapshot, and the snapshot is built on the main thread"""
+
+    lookupLayer = createLookupLayer()
+    cache = TOMsLookupCache()
+
+    assert getFromThread(lambda: cache.snapshot(lookupLayer)) is None
+    assert lookupLayer.id() not in cache.snapshotsByLayerID
+    assert lookupLayer.id() in cache.requestedLayerIDs
+
+    assert cache.getValue(lookupLayer, 1, "LabelText") == "Mon-Fri 8.00am-6.30pm"
+
+
+def testSnapshotPreloadedWhenLayerAdded():
+    lookupLayer = createLookupLayer()
+    cache = TOMsLookupCache()
+
+    QgsProject.instance().addMapLayer(lookupLayer)
+    try:
+        assert lookupLayer.id() in cache.snapshotsByLayerID
+        assert lookupLayer.id() in cache.connectionsByLayerID
+    finally:
+        layerID = lookupLayer.id()
+        QgsProject.instance().removeMapLayer(layerID)
+
+    assert layerID not in cache.snapshotsByLayerID
+    assert layerID not in cache.connectionsByLayerID
+
+
+def testClearKeepsConnections():
+    """A layer used again after clear() is not connected twice"""
+
+    lookupLayer = createLookupLayer()
+    cache = TOMsLookupCache()
+    cache.preloadLayers([lookupLayer])
+    connection = cache.connectionsByLayerID[lookupLayer.id()]
+
+    cache.clear()
+    cache.preloadLayers([lookupLayer])
+    assert cache.connectionsByLayerID[lookupLayer.id()] is connection
+
+
+def testCurrentScale():
+    """The scale comes from the map_scale variable of the expression context"""
+
+    context = QgsExpressionContext()
+    scope = QgsExpressionContextScope()
+    scope.setVariable("map_scale", 500.0)
+    context.appendScope(scope)
+
+    assert GenerateGeometryUtils.getCurrentScale(context) == 500.0
+    assert getFromThread(lambda: GenerateGeometryUtils.getCurrentScale(None)) == 0.0
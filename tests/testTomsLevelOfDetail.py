@@ -0,0 +1,90 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import pytest
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsGeometryCache import TOMsGeometryCache
+from TOMsPlugin.core.tomsGeometryElement import ElementGeometryFactory
+
+KERB_LINE = [(0, 0), (24.0, 0)]
+
+
+@pytest.fixture()
+def simplifiedGeometryScale(projectVariables):
+    """Used before bayDivisions: setting a variable reads the settings again"""
+    projectVariables(SimplifiedGeometryScale=5000)
+
+
+@pytest.mark.usefixtures("simplifiedGeometryScale", "bayDivisions")
+def testSimplifiedVariants(createFeature):
+    """Below the threshold, bays have no dividers and zig-zags are straight"""
+
+    bay = createFeature(
+        KERB_LINE, RestrictionGeometryTypes.PARALLEL_BAY_POLYGON, "B_1", nrBays=4
+    )
+    zigZag = createFeature(KERB_LINE, RestrictionGeometryTypes.ZIG_ZAG, "L_1", nrBays=4)
+
+    for feature, restGeomType in [
+        (bay, RestrictionGeometryTypes.PARALLEL_BAY_POLYGON),
+        (zigZag, RestrictionGeometryTypes.ZIG_ZAG),
+    ]:
+        assert not ElementGeometryFactory.isSimplified(restGeomType, 1250.0)
+        assert ElementGeometryFactory.isSimplified(restGeomType, 5000.0)
+
+    fullBay = ElementGeometryFactory.generateElementGeometry(
+        bay, RestrictionGeometryTypes.PARALLEL_BAY_POLYGON
+    )
+    simpleBay = ElementGeometryFactory.generateElementGeometry(
+        bay, RestrictionGeometryTypes.PARALLEL_BAY_POLYGON, simplified=True
+    )
+    assert fullBay.constGet().numGeometries() == 4
+    assert not simpleBay.isMultipart()
+    assert abs(fullBay.area() - simpleBay.area()) < 1e-6
+
+    fullZigZag = ElementGeometryFactory.generateElementGeometry(
+        zigZag, RestrictionGeometryTypes.ZIG_ZAG
+    )
+    simpleZigZag = ElementGeometryFactory.generateElementGeometry(
+        zigZag, RestrictionGeometryTypes.ZIG_ZAG, simplified=True
+    )
+    assert len(simpleZigZag.asPolyline()) < len(fullZigZag.asPolyline())
+
+    # lines have a single variant
+    assert not ElementGeometryFactory.isSimplified(
+        RestrictionGeometryTypes.PARALLEL_LINE, 10000.0
+    )
+
+
+@pytest.mark.usefixtures("simplifiedGeometryScale", "bayDivisions")
+def testSimplifiedVariantsCachedSeparately(createFeature):
+    cache = TOMsGeometryCache()
+    cache.setEnabled(True)
+    cache.clear()
+    cache.resetStatistics()
+
+    bay = createFeature(
+        KERB_LINE, RestrictionGeometryTypes.PARALLEL_BAY_POLYGON, "B_2", nrBays=4
+    )
+
+    full = ElementGeometryFactory.getElementGeometry(bay, scale=1000.0)
+    simple = ElementGeometryFactory.getElementGeometry(bay, scale=10000.0)
+    assert full.isMultipart() and not simple.isMultipart()
+    assert cache.statistics()["size"] == 2
+
+    # both are served from the cache
+    ElementGeometryFactory.getElementGeometry(bay, scale=1000.0)
+    ElementGeometryFactory.getElementGeometry(bay, scale=20000.0)
+    assert cache.statistics()["hits"] == 2
+
+    # and are both removed when the restriction is changed
+    cache.invalidate("B_2")
+    assert cache.statistics()["size"] == 0
@@ -0,0 +1,85 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import logging
+import math
+import timeit
+
+from qgis.core import QgsGeometry, QgsPointXY, QgsWkbTypes
+
+from TOMsPlugin.core.tomsLineWalker import TOMsLineWalker
+
+
+def createKerbLine(length, nrVertices):
+    """A gently curving line of the given length (approximately)"""
+    step = length / (nrVertices - 1)
+    return QgsGeometry.fromPolylineXY(
+        [
+            QgsPointXY(i * step, 5.0 * math.sin(i * step / 20.0))
+            for i in range(nrVertices)
+        ]
+    )
+
+
+def testLineWalker():
+    """Points from the walker are the same as from QgsGeometry.interpolate"""
+
+    geoms = [
+        createKerbLine(200.0, 400),
+        QgsGeometry.fromWkt("LINESTRING(0 0, 10 0, 10 0, 10 10)"),
+        QgsGeometry.fromWkt("MULTILINESTRING((0 0, 10 0), (20 0, 20 5, 30 5))"),
+        QgsGeometry.fromWkt("POLYGON((0 0, 10 0, 10 10, 0 10, 0 0))"),
+    ]
+
+    for geom in geoms:
+        if geom.type() == QgsWkbTypes.PolygonGeometry:
+            length = geom.constGet().perimeter()
+        else:
+            length = geom.length()
+        distances = [length * i / 97.0 for i in range(98)]
+
+        walker = TOMsLineWalker(geom)
+        for distance in distances:
+            expected = geom.interpolate(distance).asPoint()
+            assert walker.pointAt(distance) == expected
+
+        # going backwards restarts the walk
+        assert walker.pointAt(0.0) == geom.interpolate(0.0).asPoint()
+
+    assert TOMsLineWalker(geoms[0]).pointAt(geoms[0].length() + 1.0) is None
+
+
+def testLineWalkerBenchmark():
+    """Compare interpolate and the walker for the points of a 200 m zig-zag"""
+
+    geom = createKerbLine(200.0, 400)
+    interval = 3.0
+    distances = [
+        i * interval / 2 for i in range(1, int(geom.length() / interval) * 2 + 1)
+    ]
+
+    def withInterpolate():
+        return [geom.interpolate(distance).asPoint() for distance in distances]
+
+    def withWalker():
+        return TOMsLineWalker(geom).pointsAt(distances)
+
+    assert withInterpolate() == withWalker()
+
+    interpolateTime = min(timeit.repeat(withInterpolate, number=20, repeat=3))
+    walkerTime = min(timeit.repeat(withWalker, number=20, repeat=3))
+
+    logging.info(
+        "200 m zig-zag, %s points: interpolate %.2f ms; walker %.2f ms",
+        len(distances),
+        interpolateTime * 1000 / 20,
+        walkerTime * 1000 / 20,
+    )
@@ -0,0 +1,66 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsLookupCache import TOMsLookupCache
+from TOMsPlugin.generateGeometryUtils import GenerateGeometryUtils
+from TOMsPlugin.utils import getLookupDescription
+
+
+def testLookupCache():
+    """Check that lookups are read once and read again after an edit"""
+
+    lookupLayer = QgsVectorLayer("None", "LengthOfTime", "memory")
+    lookupProvider = lookupLayer.dataProvider()
+    lookupProvider.addAttributes(
+        [
+            QgsField("Code", QVariant.Int),
+            QgsField("Description", QVariant.String),
+            QgsField("LabelText", QVariant.String),
+        ]
+    )
+    lookupLayer.updateFields()
+
+    features = []
+    for code, description, labelText in [(1, "One hour", "1h"), (2, "Two hours", "2h")]:
+        feature = QgsFeature(lookupLayer.fields())
+        feature.setAttributes([code, description, labelText])
+        features.append(feature)
+    lookupProvider.addFeatures(features)
+
+    cache = TOMsLookupCache()
+    cache.clear()
+    cache.resetStatistics()
+
+    assert GenerateGeometryUtils.getLookupLabelText(lookupLayer, 1) == "1h"
+    assert GenerateGeometryUtils.getLookupLabelText(lookupLayer, 2) == "2h"
+    assert getLookupDescription(lookupLayer, 2) == "Two hours"
+    assert GenerateGeometryUtils.getLookupRow(lookupLayer, "1")["LabelText"] == "1h"
+    assert GenerateGeometryUtils.getLookupLabelText(lookupLayer, 3) is None
+    assert GenerateGeometryUtils.getLookupLabelText(lookupLayer, None) is None
+
+    statistics = cache.statistics()
+    assert statistics["loads"] == 1
+    assert statistics["hits"] == 4
+    assert statistics["misses"] == 1
+    assert statistics["memoryBytes"] > 0
+
+    # committed edits are picked up
+    lookupLayer.startEditing()
+    lookupLayer.changeAttributeValue(
+        next(lookupLayer.getFeatures()).id(), 2, "60 mins"
+    )
+    lookupLayer.commitChanges()
+
+    assert GenerateGeometryUtils.getLookupLabelText(lookupLayer, 1) == "60 mins"
+    assert cache.statistics()["loads"] == 2
@@ -0,0 +1,180 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import datetime
+import gzip
+import logging
+import os
+import timeit
+
+import pytest
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsGeometryElement import ElementGeometryFactory
+from TOMsPlugin.core.tomsMessageLog import (
+    TOMsLogFileHandler,
+    TOMsMessageLog,
+    logFileName,
+    tomsLogger,
+)
+
+
+class CountedArgument:
+    """Counts how often it is formatted"""
+
+    def __init__(self):
+        self.nrFormatted = 0
+
+    def __str__(self):
+        self.nrFormatted += 1
+        return "argument"
+
+
+def testDisabledLevel(caplog):
+    """Debug messages are neither formatted nor handled when debug is off"""
+
+    argument = CountedArgument()
+    TOMsMessageLog.setLoggingLevel(logging.INFO)
+    try:
+        assert not TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG)
+        TOMsMessageLog.logMessage("debug %s", argument, level=TOMsMessageLog.DEBUG)
+        assert argument.nrFormatted == 0
+        assert not caplog.records
+    finally:
+        TOMsMessageLog.setLoggingLevel(logging.DEBUG)
+
+
+def testEnabledLevel(caplog):
+    """Arguments are formatted, and the record points to the caller"""
+
+    argument = CountedArgument()
+    assert TOMsMessageLog.isEnabledFor(TOMsMessageLog.DEBUG)
+    TOMsMessageLog.logMessage("debug %s", argument, level=TOMsMessageLog.DEBUG)
+
+    assert caplog.records[-1].getMessage() == "debug argument"
+    assert caplog.records[-1].filename == "testTomsMessageLog.py"
+    assert caplog.records[-1].funcName == "testEnabledLevel"
+    assert argument.nrFormatted == 1
+
+
+@pytest.mark.usefixtures("geometrySettings")
+def testDebugLoggingBenchmark(createFeature, monkeypatch):
+    """
+    Generating display geometries (as during a render) with debug on and off. The times
+    are only logged; with debug off, no debug record is created.
+    """
+
+    kerb = [(5.0 * i, 0.1 * (i % 2)) for i in range(10)]
+    features = [
+        (
+            createFeature(kerb, restGeomType, "T_{}".format(featureNr), 90.0, 10, 45.0),
+            restGeomType,
+        )
+        for featureNr, restGeomType in enumerate(list(RestrictionGeometryTypes) * 5)
+    ]
+
+    def render():
+        for feature, restGeomType in features:
+            ElementGeometryFactory.generateElementGeometry(feature, restGeomType)
+
+    # the handlers are not part of the measure
+    handlers = logging.getLogger().handlers + tomsLogger.handlers
+    levels = [handler.level for handler in handlers]
+    for handler in handlers:
+        handler.setLevel(logging.CRITICAL)
+
+    debugRecords = []
+
+    def handle(record):
+        if record.levelno == logging.DEBUG:
+            debugRecords.append(record)
+
+    try:
+        debugTime = min(timeit.repeat(render, number=1, repeat=3))
+        TOMsMessageLog.setLoggingLevel(logging.INFO)
+        noDebugTime = min(timeit.repeat(render, number=1, repeat=3))
+
+        monkeypatch.setattr(tomsLogger, "handle", handle)
+        render()
+    finally:
+        TOMsMessageLog.setLoggingLevel(logging.DEBUG)
+        for handler, level in zip(handlers, levels):
+            handler.setLevel(level)
+
+    logging.info(
+        "%s display geometries: debug logging on %.1f ms; off %.1f ms",
+        len(features),
+        debugTime * 1000,
+        noDebugTime * 1000,
+    )
+    assert not debugRecords
+
+
+def testLogFileRotation(tmp_path, monkeypatch):
+    """
+    The log file is written in the background, rotated and gzipped, and only the
+    newest backups are kept
+    """
+
+    # about 2.3 KB of messages - more than four rollovers
+    monkeypatch.setenv("QGIS_LOGFILE_PATH", str(tmp_path))
+    monkeypatch.setenv("TOMs_LOG_MAX_BYTES", "400")
+    monkeypatch.setenv("TOMs_LOG_BACKUP_COUNT", "3")
+    monkeypatch.setenv("TOMs_LOG_COMPRESS", "1")
+
+    TOMsMessageLog.setLogFile()
+    try:
+        for messageNr in range(200):
+            TOMsMessageLog.logMessage(
+                "message %s", messageNr, level=TOMsMessageLog.DEBUG
+            )
+    finally:
+        # all the queued messages are written
+        TOMsMessageLog.closeLogFile()
+
+    fileName = logFileName(str(tmp_path), datetime.date.today())
+    assert sorted(os.listdir(tmp_path)) == [
+        os.path.basename(fileName),
+        os.path.basename(fileName) + ".1.gz",
+        os.path.basename(fileName) + ".2.gz",
+        os.path.basename(fileName) + ".3.gz",
+    ]
+    with open(fileName, encoding="utf-8") as logFile:
+        messages = logFile.read().splitlines()
+    assert messages[-1] == "message 199"
+
+    # each backup ends just before the next one starts
+    for backupNr in range(1, 4):
+        with gzip.open("{}.{}.gz".format(fileName, backupNr), "rt") as logFile:
+            backupMessages = logFile.read().splitlines()
+        assert backupMessages[-1] == "message {}".format(
+            int(messages[0].split()[1]) - 1
+        )
+        messages = backupMessages
+
+    # the oldest messages have been dropped
+    assert messages[0] != "message 0"
+
+
+def testLogFileNewDay(tmp_path):
+    """A new file is started each day"""
+
+    handler = TOMsLogFileHandler(str(tmp_path))
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    handler.currDate = yesterday
+    handler.baseFilename = logFileName(str(tmp_path), yesterday)
+
+    handler.handle(logging.LogRecord("TOMs", logging.INFO, "", 0, "hello", None, None))
+    handler.close()
+
+    assert os.listdir(tmp_path) == [
+        os.path.basename(logFileName(str(tmp_path), datetime.date.today()))
+    ]
@@ -0,0 +1,62 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import pytest
+from qgis.core import QgsFeature, QgsField, QgsGeometry, QgsPointXY, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsNearestLineIndex import TOMsNearestLineIndex
+
+
+def testNearestLineIndex():
+    """Check nearest line, point and azimuth, with and without exclusions"""
+
+    lineLayer = QgsVectorLayer("LineString?crs=epsg:27700", "RoadCentreLine", "memory")
+    lineProvider = lineLayer.dataProvider()
+    lineProvider.addAttributes([QgsField("GeometryID", QVariant.String)])
+    lineLayer.updateFields()
+
+    features = []
+    for geometryID, y in [("L_001", 0), ("L_002", 5)]:
+        feature = QgsFeature(lineLayer.fields())
+        feature.setGeometry(
+            QgsGeometry.fromPolylineXY([QgsPointXY(0, y), QgsPointXY(100, y)])
+        )
+        feature.setAttributes([geometryID])
+        features.append(feature)
+    lineProvider.addFeatures(features)
+
+    index = TOMsNearestLineIndex()
+
+    nearest = index.nearestLine(lineLayer, QgsPointXY(50, 1), 25)
+    assert nearest.feature["GeometryID"] == "L_001"
+    assert nearest.point == QgsPointXY(50, 0)
+    assert nearest.distance == pytest.approx(1.0)
+    assert nearest.azimuth == pytest.approx(90.0)
+
+    nearest = index.nearestLine(lineLayer, QgsPointXY(50, 1), 25, ["L_001"])
+    assert nearest.feature["GeometryID"] == "L_002"
+
+    assert (
+        index.nearestLine(lineLayer, QgsPointXY(50, 1), 25, ["L_001", "L_002"]) is None
+    )
+    assert index.nearestLine(lineLayer, QgsPointXY(500, 500), 25) is None
+
+    # edits are picked up
+    lineLayer.startEditing()
+    lineLayer.deleteFeature(
+        index.nearestLine(lineLayer, QgsPointXY(50, 1), 25).feature.id()
+    )
+    assert (
+        index.nearestLine(lineLayer, QgsPointXY(50, 1), 25).feature["GeometryID"]
+        == "L_002"
+    )
+    lineLayer.rollBack()
@@ -0,0 +1,66 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import pytest
+
+from TOMsPlugin.constants import RestrictionGeometryTypes
+from TOMsPlugin.core.tomsGeometryElement import (
+    ElementGeometryFactory,
+    TOMsGeometryElement,
+)
+from TOMsPlugin.core.tomsOffsetCurve import NUMPY_AVAILABLE, ShapeEngine
+
+KERB_LINES = [
+    [(0, 0), (30, 0)],
+    [(0, 0), (20, 0), (35, 8), (50, 30)],
+    [(0, 0), (10, 0.2), (10.5, 5), (0, 12)],  # tight bends
+    [(10, 10), (0, 10), (-3, 0), (-3, -20)],
+]
+
+
+def generate(feature, restGeomType, shapeEngine):
+    TOMsGeometryElement.shapeEngine = shapeEngine
+    try:
+        return ElementGeometryFactory.generateElementGeometry(feature, restGeomType)
+    finally:
+        TOMsGeometryElement.shapeEngine = ShapeEngine.default()
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not available")
+@pytest.mark.parametrize("restGeomType", list(RestrictionGeometryTypes))
+@pytest.mark.usefixtures("geometrySettings")
+def testOffsetCurveParity(createFeature, restGeomType):
+    """The numpy engine gives the same shapes as the Python engine"""
+
+    for lineNr, points in enumerate(KERB_LINES):
+        for azimuthToRoadCentreLine in [0.0, 90.0, 180.0, 270.0]:
+            feature = createFeature(
+                points,
+                restGeomType,
+                geometryID="T_{}".format(lineNr),
+                azimuthToRoadCentreLine=azimuthToRoadCentreLine,
+                nrBays=3,
+                bayOrientation=45.0,
+            )
+
+            pythonGeom = generate(feature, restGeomType, ShapeEngine.PYTHON)
+            numpyGeom = generate(feature, restGeomType, ShapeEngine.NUMPY)
+
+            if pythonGeom is None:
+                assert numpyGeom is None
+                continue
+
+            pythonVertices = list(pythonGeom.vertices())
+            numpyVertices = list(numpyGeom.vertices())
+            assert len(pythonVertices) == len(numpyVertices)
+            for pythonVertex, numpyVertex in zip(pythonVertices, numpyVertices):
+                assert numpyVertex.x() == pytest.approx(pythonVertex.x(), abs=1e-9)
+                assert numpyVertex.y() == pytest.approx(pythonVertex.y(), abs=1e-9)
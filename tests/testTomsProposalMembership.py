@@ -0,0 +1,95 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.constants import RestrictionAction
+from TOMsPlugin.core.tomsProposalMembership import TOMsProposalMembership
+
+
+def createRestrictionsInProposalsLayer(rows):
+    layer = QgsVectorLayer("None", "RestrictionsInProposals", "memory")
+    layer.dataProvider().addAttributes(
+        [
+            QgsField("ProposalID", QVariant.Int),
+            QgsField("RestrictionTableID", QVariant.Int),
+            QgsField("ActionOnProposalAcceptance", QVariant.Int),
+            QgsField("RestrictionID", QVariant.String),
+        ]
+    )
+    layer.updateFields()
+
+    features = []
+    for row in rows:
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes(list(row))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def restrictionIDs(membership, layerID, action=None):
+    return sorted(
+        restrictionID
+        for restrictionID, _ in membership.getRestrictionsForLayer(layerID, action)
+    )
+
+
+def testProposalMembership():
+    layer = createRestrictionsInProposalsLayer(
+        [
+            (1, 2, RestrictionAction.OPEN.value, "B_1"),
+            (1, 2, RestrictionAction.CLOSE.value, "B_2"),
+            (1, 3, RestrictionAction.OPEN.value, "L_1"),
+            (2, 2, RestrictionAction.OPEN.value, "B_3"),
+        ]
+    )
+    membership = TOMsProposalMembership(layer, 1)
+
+    assert restrictionIDs(membership, 2) == ["B_1", "B_2"]
+    assert restrictionIDs(membership, 2, RestrictionAction.OPEN) == ["B_1"]
+    assert restrictionIDs(membership, 2, RestrictionAction.CLOSE) == ["B_2"]
+    assert restrictionIDs(membership, 3) == ["L_1"]
+    assert restrictionIDs(membership, 4) == []
+
+    # all the layers are served from one request
+    assert membership.loads == 1
+
+    # restrictions added to and removed from the proposal
+    layer.startEditing()
+    newRow = QgsFeature(layer.fields())
+    newRow.setAttributes([1, 3, RestrictionAction.CLOSE.value, "L_2"])
+    layer.addFeature(newRow)
+    otherProposalRow = QgsFeature(layer.fields())
+    otherProposalRow.setAttributes([2, 3, RestrictionAction.OPEN.value, "L_3"])
+    layer.addFeature(otherProposalRow)
+
+    assert restrictionIDs(membership, 3) == ["L_1", "L_2"]
+
+    (b1,) = [
+        feature
+        for restrictionID, feature in membership.getRestrictionsForLayer(2)
+        if restrictionID == "B_1"
+    ]
+    layer.deleteFeature(b1.id())
+
+    assert restrictionIDs(membership, 2) == ["B_2"]
+    assert membership.loads == 1
+
+    # read again after the commit
+    layer.commitChanges()
+    assert restrictionIDs(membership, 2) == ["B_2"]
+    assert restrictionIDs(membership, 3) == ["L_1", "L_2"]
+    assert membership.loads == 2
+
+    membership.disconnect()
+    assert membership.getRestrictionsForLayer(2) == []
@@ -0,0 +1,110 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import json
+
+from qgis.core import QgsField, QgsRectangle, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsProposal import restrictionsBoundingBox
+from TOMsPlugin.core.tomsRefreshScheduler import TOMsRefreshScheduler
+
+
+class FilterSetter:
+    """Sets the filter of the layers, as TOMsProposalsManager.applyRestrictionFilters"""
+
+    def __init__(self, layers):
+        self.layers = layers
+        self.filterString = ""
+        self.nrCalls = 0
+        self.scheduler = TOMsRefreshScheduler(self, None)
+
+    def applyRestrictionFilters(self):
+        self.nrCalls += 1
+        for layer in self.layers:
+            self.scheduler.setSubsetString(layer, self.filterString)
+        return True
+
+
+def createLayer(name):
+    layer = QgsVectorLayer("LineString?crs=epsg:27700", name, "memory")
+    layer.dataProvider().addAttributes([QgsField("RestrictionID", QVariant.String)])
+    layer.updateFields()
+    return layer
+
+
+def testRefreshScheduler():
+    layers = [createLayer("Bays"), createLayer("Bays.label_pos")]
+    filterSetter = FilterSetter(layers)
+    scheduler = filterSetter.scheduler
+
+    # changes in quick succession are applied together
+    for restrictionID in ["B_1", "B_2", "B_3"]:
+        filterSetter.filterString = f"\"RestrictionID\" = '{restrictionID}'"
+        scheduler.scheduleRefresh("date")
+    assert scheduler.isPending()
+    assert filterSetter.nrCalls == 0
+
+    scheduler.flush()
+    assert not scheduler.isPending()
+    assert filterSetter.nrCalls == 1
+    assert all(layer.subsetString() == filterSetter.filterString for layer in layers)
+    assert scheduler.history[-1]["reasons"] == ["date", "date", "date"]
+    assert scheduler.history[-1]["reloads"] == 2
+
+    # layers with an unchanged filter are not reloaded
+    scheduler.flush("update")
+    assert scheduler.history[-1]["reasons"] == ["update"]
+    assert scheduler.history[-1]["reloads"] == 0
+
+    layers[1].dataProvider().setSubsetString(None)
+    scheduler.flush("update")
+    assert scheduler.history[-1]["reloads"] == 1
+
+    # cancelled changes are not applied
+    scheduler.scheduleRefresh("proposal")
+    scheduler.cancel()
+    assert not scheduler.isPending()
+    assert filterSetter.nrCalls == 3
+
+
+def testRestrictionsBoundingBox(tmp_path):
+    """Restrictions hidden by the filter are included, and the filter is kept"""
+
+    fileName = str(tmp_path / "Bays.geojson")
+    with open(fileName, "w", encoding="utf-8") as geojsonFile:
+        json.dump(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {"RestrictionID": restrictionID},
+                        "geometry": {"type": "LineString", "coordinates": coordinates},
+                    }
+                    for restrictionID, coordinates in [
+                        ("B_1", [[0, 0], [10, 0]]),
+                        ("B_2", [[20, 5], [30, 5]]),
+                        ("B_3", [[100, 100], [110, 100]]),
+                    ]
+                ],
+            },
+            geojsonFile,
+        )
+    layer = QgsVectorLayer(fileName, "Bays", "ogr")
+    filterString = "\"RestrictionID\" = 'B_1'"
+    layer.setSubsetString(filterString)
+    assert layer.featureCount() == 1
+
+    boundingBox = restrictionsBoundingBox(layer, "'B_1','B_2'")
+    assert boundingBox == QgsRectangle(0, 0, 30, 5)
+    assert layer.subsetString() == filterString
+    assert layer.featureCount() == 1
@@ -0,0 +1,38 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from TOMsPlugin.core.proposalsManager import dateFilterString, restrictionFilterString
+
+
+def testRestrictionFilterWithoutProposal():
+    assert restrictionFilterString("01-02-2023", 0, 2) == dateFilterString("01-02-2023")
+
+
+def testRestrictionFilterWithProposal():
+    """The filter refers to the proposal, rather than listing its restrictions"""
+
+    filterString = restrictionFilterString("01-02-2023", 12, 2)
+
+    assert filterString.startswith(
+        '"RestrictionID" IN (SELECT "RestrictionID" '
+        + "FROM toms.restrictions_in_proposal(12, 2, 1)) OR ("
+    )
+    assert dateFilterString("01-02-2023") in filterString
+    assert filterString.endswith(
+        'AND "RestrictionID" NOT IN (SELECT "RestrictionID" '
+        + "FROM toms.restrictions_in_proposal(12, 2, 2)))"
+    )
+    assert filterString.count("(") == filterString.count(")")
+
+    # the same whatever the proposal
+    assert restrictionFilterString("01-02-2023", 13, 2) == filterString.replace(
+        "(12,", "(13,"
+    )
@@ -0,0 +1,80 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsProject, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsRestrictionLayers import TOMsRestrictionLayers
+from TOMsPlugin.restrictionTypeUtilsClass import TOMsLayers
+from TOMsPlugin.utils import getRestrictionLayersList
+
+
+def createRestrictionLayersTable():
+    layer = QgsVectorLayer("None", "RestrictionLayers", "memory")
+    layer.dataProvider().addAttributes(
+        [
+            QgsField("Code", QVariant.Int),
+            QgsField("RestrictionLayerName", QVariant.String),
+        ]
+    )
+    layer.updateFields()
+
+    features = []
+    for code, name in [(2, "Bays"), (5, "Signs")]:
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([code, name])
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def testRestrictionLayers():
+    project = QgsProject.instance()
+    layers = {
+        name: QgsVectorLayer("LineString?crs=epsg:27700", name, "memory")
+        for name in ["Bays", "Signs", "Bays.label_pos"]
+    }
+    project.addMapLayers(list(layers.values()))
+
+    tableNames = TOMsLayers()
+    tableNames.tomsLayerDict = dict(
+        layers, RestrictionLayers=createRestrictionLayersTable()
+    )
+
+    registry = TOMsRestrictionLayers()
+    try:
+        registry.build(tableNames)
+
+        bays, signs = registry.getRestrictionLayers()
+        assert (bays.code, bays.name, bays.layer) == (2, "Bays", layers["Bays"])
+        assert bays.labelLayers == (layers["Bays.label_pos"],)
+        assert (signs.code, signs.layer, signs.labelLayers) == (5, layers["Signs"], ())
+
+        # the same list, until the layers of the project change
+        restrictionLayers = registry.getRestrictionLayers()
+        assert registry.getRestrictionLayers(tableNames) is restrictionLayers
+
+        leaderLayer = QgsVectorLayer(
+            "LineString?crs=epsg:27700", "Bays.label_ldr", "memory"
+        )
+        project.addMapLayer(leaderLayer)
+        bays, _ = registry.getRestrictionLayers()
+        assert bays.labelLayers == (layers["Bays.label_pos"], leaderLayer)
+
+        assert getRestrictionLayersList(tableNames) == [
+            [2, "Bays"],
+            [5, "Signs"],
+            [2, "Bays.label_pos"],
+            [2, "Bays.label_ldr"],
+        ]
+    finally:
+        project.removeAllMapLayers()
+        registry.invalidate()
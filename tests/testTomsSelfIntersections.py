@@ -0,0 +1,115 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+import logging
+import math
+import timeit
+
+import pytest
+from qgis.core import QgsGeometry, QgsPointXY, QgsWkbTypes
+
+from TOMsPlugin.core.tomsSelfIntersections import resolveSelfIntersections
+
+
+def curvedKerb(nrVertices):
+    """A curved line with loops (trochoid), as generated for tight kerbs"""
+    pts = []
+    for i in range(nrVertices):
+        t = i * 40.0 * math.pi / (nrVertices - 1)
+        pts.append(QgsPointXY(2.0 * t - 3.0 * math.sin(t), -3.0 * math.cos(t)))
+    return pts
+
+
+def resolveWithGeometries(ptsList):
+    """The previous implementation, using QgsGeometry.intersection for each pair"""
+
+    nrPts = len(ptsList)
+    currStartVertexNr = 0
+    currLineStartVertex = ptsList[0]
+    newPtsList = [QgsPointXY(currLineStartVertex)]
+
+    while True:
+        currLine = QgsGeometry.fromPolylineXY(
+            [currLineStartVertex, ptsList[currStartVertexNr + 1]]
+        )
+        intersectLineStartVertexNr = -1
+
+        for testVertexNr in range(currStartVertexNr + 1, nrPts - 1):
+            testLine = QgsGeometry.fromPolylineXY(
+                [ptsList[testVertexNr], ptsList[testVertexNr + 1]]
+            )
+            intersectPt = currLine.intersection(testLine)
+            if intersectPt:
+                if intersectPt.type() == QgsWkbTypes.PointGeometry:
+                    intersectLineStartVertexNr = testVertexNr
+                    nextPt = intersectPt
+
+        if intersectLineStartVertexNr > 0:
+            newPt = nextPt.asPoint()
+            newPtsList.append(newPt)
+            currLineStartVertex = newPt
+            currStartVertexNr = intersectLineStartVertexNr
+        else:
+            newPtsList.append(ptsList[currStartVertexNr + 1])
+            currStartVertexNr = currStartVertexNr + 1
+            currLineStartVertex = ptsList[currStartVertexNr]
+
+        if currStartVertexNr == nrPts - 1:
+            break
+
+    return newPtsList
+
+
+def resolveWithCoordinates(ptsList):
+    newXs, newYs = resolveSelfIntersections(
+        [pt.x() for pt in ptsList], [pt.y() for pt in ptsList]
+    )
+    return [QgsPointXY(x, y) for x, y in zip(newXs, newYs)]
+
+
+@pytest.mark.parametrize("nrVertices", [50, 500])
+def testResolveSelfIntersections(nrVertices):
+    """Same result as the pairwise QgsGeometry implementation"""
+
+    ptsList = curvedKerb(nrVertices)
+    assert not QgsGeometry.fromPolylineXY(ptsList).isSimple()
+
+    expected = resolveWithGeometries(ptsList)
+    result = resolveWithCoordinates(ptsList)
+
+    assert len(result) == len(expected)
+    for resultPt, expectedPt in zip(result, expected):
+        assert resultPt.x() == pytest.approx(expectedPt.x(), abs=1e-9)
+        assert resultPt.y() == pytest.approx(expectedPt.y(), abs=1e-9)
+
+
+@pytest.mark.parametrize("nrVertices", [50, 500, 5000])
+def testResolveSelfIntersectionsBenchmark(nrVertices):
+    ptsList = curvedKerb(nrVertices)
+
+    coordinatesTime = min(
+        timeit.repeat(lambda: resolveWithCoordinates(ptsList), number=1, repeat=3)
+    )
+    # the pairwise version takes minutes for 5000 vertices
+    if nrVertices <= 500:
+        geometriesTime = min(
+            timeit.repeat(lambda: resolveWithGeometries(ptsList), number=1, repeat=3)
+        )
+    else:
+        geometriesTime = float("nan")
+
+    logging.info(
+        "resolveSelfIntersections, %s vertices: pairwise geometries %.1f ms; "
+        "grid on coordinates %.1f ms",
+        nrVertices,
+        geometriesTime * 1000,
+        coordinatesTime * 1000,
+    )
@@ -0,0 +1,70 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import QgsFeature, QgsField, QgsFields, QgsGeometry, QgsPointXY
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsSignCache import TOMsSignBundle, TOMsSignCache
+
+
+def createSign(geometryID, signOrientationTypeID=1, originalWkt="POINT(0 0)"):
+    fields = QgsFields()
+    fields.append(QgsField("GeometryID", QVariant.String))
+    fields.append(QgsField("SignOrientationTypeID", QVariant.Int))
+    fields.append(QgsField("original_geom_wkt", QVariant.String))
+    fields.append(QgsField("SignType_1", QVariant.Int))
+    fields.append(QgsField("SignType_2", QVariant.Int))
+    feature = QgsFeature(fields)
+    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(0, 0)))
+    feature.setAttributes([geometryID, signOrientationTypeID, originalWkt, 101, 102])
+    return feature
+
+
+def testSignCache():
+    """One bundle per sign, recomputed when the sign or the road lines change"""
+
+    cache = TOMsSignCache()
+    cache.enabled = True
+    cache.clear()
+    cache.resetStatistics()
+
+    calls = []
+
+    def generator():
+        calls.append(1)
+        return TOMsSignBundle(
+            orientation=90.0, signLine=None, iconPoints=[], iconPaths=[]
+        )
+
+    roadSnapshot = object()
+    sign = createSign("S_001")
+
+    # line, orientation, and icon/location for each of the two plates
+    for _ in range(6):
+        assert cache.getBundle(sign, roadSnapshot, generator).orientation == 90.0
+    assert len(calls) == 1
+
+    # a change to the sign or its original geometry
+    for changedSign in [
+        createSign("S_001", signOrientationTypeID=2),
+        createSign("S_001", originalWkt="POINT(1 0)"),
+    ]:
+        cache.getBundle(changedSign, roadSnapshot, generator)
+    assert len(calls) == 3
+
+    # the road centre lines have changed
+    cache.getBundle(sign, object(), generator)
+    assert len(calls) == 4
+
+    cache.invalidate("S_001")
+    assert cache.statistics()["size"] == 0
+    cache.getBundle(sign, roadSnapshot, generator)
+    assert len(calls) == 5
@@ -0,0 +1,173 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from qgis.core import (
+    QgsDateTimeRange,
+    QgsField,
+    QgsInterval,
+    QgsLayoutItemMap,
+    QgsPrintLayout,
+    QgsProject,
+    QgsTemporalNavigationObject,
+    QgsUnitTypes,
+    QgsVectorLayer,
+    QgsVectorLayerTemporalProperties,
+)
+from qgis.PyQt.QtCore import QDate, QDateTime, QTime, QVariant
+
+from TOMsPlugin.core import proposalsManager
+from TOMsPlugin.core.proposalsManager import TOMsProposalsManager
+from TOMsPlugin.core.tomsRestrictionLayers import (
+    TOMsRestrictionLayer,
+    TOMsRestrictionLayers,
+)
+from TOMsPlugin.core.tomsTemporalMode import TOMsTemporalMode, dayRange
+
+
+def createRestrictionLayer():
+    layer = QgsVectorLayer("LineString?crs=epsg:27700", "Bays", "memory")
+    layer.dataProvider().addAttributes(
+        [
+            QgsField("RestrictionID", QVariant.String),
+            QgsField("OpenDate", QVariant.Date),
+            QgsField("CloseDate", QVariant.Date),
+        ]
+    )
+    layer.updateFields()
+    return layer
+
+
+class Interface:
+    def __init__(self, canvas):
+        self.canvas = canvas
+
+    def mapCanvas(self):
+        return self.canvas
+
+
+def testFrameChangeDoesNotReloadLayers(monkeypatch, qgis_canvas):
+    """In temporal mode, the date is filtered by QGIS, not in the layer filters"""
+
+    monkeypatch.setattr(proposalsManager, "iface", Interface(qgis_canvas))
+    monkeypatch.setattr(proposalsManager, "TOMsProposal", lambda manager: None)
+    layer = createRestrictionLayer()
+    monkeypatch.setattr(
+        TOMsRestrictionLayers(),
+        "getRestrictionLayers",
+        lambda tableNames=None: [TOMsRestrictionLayer(1, "Bays", layer, ())],
+    )
+
+    manager = TOMsProposalsManager()
+    manager.updateMapCanvas()
+    assert "to_date" in layer.subsetString()
+
+    manager.temporalMode.activate()
+    filterString = layer.subsetString()
+    assert filterString == '"OpenDate" IS NOT NULL'
+
+    # frames of the temporal controller
+    for day in range(1, 4):
+        qgis_canvas.setTemporalRange(dayRange(QDate(2023, 2, day)))
+        assert manager.date() == QDate(2023, 2, day)
+        assert not manager.refreshScheduler.isPending()
+    manager.updateMapCanvas()
+    assert manager.refreshScheduler.history[-1]["reloads"] == 0
+    assert layer.subsetString() == filterString
+
+    manager.temporalMode.deactivate()
+    manager.updateMapCanvas()
+    assert "to_date('03-02-2023', 'dd-MM-yyyy')" in layer.subsetString()
+
+
+def testLayoutTemporalRanges():
+    """Prints show the restrictions at the current date"""
+
+    project = QgsProject.instance()
+    layout = QgsPrintLayout(project)
+    layout.initializeDefaults()
+    layout.setName("TOMs print")
+    layoutMap = QgsLayoutItemMap(layout)
+    layout.addLayoutItem(layoutMap)
+    project.layoutManager().addLayout(layout)
+
+    try:
+        temporalMode = TOMsTemporalMode(None, None)
+        date = QDate(2023, 2, 1)
+        temporalMode.setLayoutTemporalRanges(date)
+        assert layoutMap.isTemporal()
+        assert layoutMap.temporalRange() == dayRange(date)
+
+        temporalMode.restoreLayoutTemporalRanges()
+        assert not layoutMap.isTemporal()
+    finally:
+        project.layoutManager().removeLayout(layout)
+
+
+def testDayRange():
+    date = QDate(2023, 2, 1)
+    assert dayRange(date) == QgsDateTimeRange(
+        QDateTime(date, QTime(0, 0)),
+        QDateTime(QDate(2023, 2, 2), QTime(0, 0)),
+        True,
+        False,
+    )
+
+
+def testTemporalProperties():
+    layer = QgsVectorLayer("LineString?crs=epsg:27700", "Bays", "memory")
+    layer.dataProvider().addAttributes(
+        [QgsField("OpenDate", QVariant.Date), QgsField("CloseDate", QVariant.Date)]
+    )
+    layer.updateFields()
+
+    temporalMode = TOMsTemporalMode(None, None)
+    temporalMode.setTemporalProperties(layer)
+
+    properties = layer.temporalProperties()
+    assert properties.isActive()
+    assert (
+        properties.mode()
+        == QgsVectorLayerTemporalProperties.ModeFeatureDateTimeStartAndEndFromFields
+    )
+    assert (properties.startField(), properties.endField()) == ("OpenDate", "CloseDate")
+
+    temporalMode.restoreTemporalProperties(layer)
+    assert not layer.temporalProperties().isActive()
+
+
+class Canvas:
+    def __init__(self):
+        self.controller = QgsTemporalNavigationObject()
+
+    def temporalController(self):
+        return self.controller
+
+
+def testControllerRestored():
+    canvas = Canvas()
+    controller = canvas.temporalController()
+    extents = QgsDateTimeRange(
+        QDateTime(QDate(2020, 1, 1), QTime(0, 0)),
+        QDateTime(QDate(2021, 1, 1), QTime(0, 0)),
+    )
+    controller.setTemporalExtents(extents)
+    controller.setFrameDuration(QgsInterval(1, QgsUnitTypes.TemporalHours))
+    controller.setNavigationMode(QgsTemporalNavigationObject.FixedRange)
+
+    temporalMode = TOMsTemporalMode(None, canvas)
+    temporalMode.setUpController([])
+    assert controller.navigationMode() == QgsTemporalNavigationObject.Animated
+    assert controller.frameDuration() == QgsInterval(1, QgsUnitTypes.TemporalDays)
+
+    temporalMode.restoreController()
+    assert controller.navigationMode() == QgsTemporalNavigationObject.FixedRange
+    assert controller.temporalExtents() == extents
+    assert controller.frameDuration() == QgsInterval(1, QgsUnitTypes.TemporalHours)
@@ -0,0 +1,98 @@
+# -----------------------------------------------------------
+# Licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# -----------------------------------------------------------
+# Tim Hancock/Matthias Kuhn 2017
+# Oslandia 2022
+
+from concurrent.futures import ThreadPoolExecutor
+
+from qgis.core import QgsFeature, QgsField, QgsGeometry, QgsPointXY, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from TOMsPlugin.core.tomsZoneResolver import TOMsZoneResolver
+
+
+def testZoneResolver():
+    """Check point-in-zone and by-code queries, before and after an edit"""
+
+    zoneLayer = QgsVectorLayer("Polygon?crs=epsg:27700&index=yes", "CPZs", "memory")
+    zoneProvider = zoneLayer.dataProvider()
+    zoneProvider.addAttributes(
+        [QgsField("CPZ", QVariant.String), QgsField("TimePeriodID", QVariant.Int)]
+    )
+    zoneLayer.updateFields()
+
+    features = []
+    for cpz, timePeriodID, xMin in [("A", 1, 0), ("B", 2, 100)]:
+        feature = QgsFeature(zoneLayer.fields())
+        feature.setGeometry(
+            QgsGeometry.fromWkt(
+                "POLYGON(({0} 0, {1} 0, {1} 100, {0} 100, {0} 0))".format(
+                    xMin, xMin + 100
+                )
+            )
+        )
+        feature.setAttributes([cpz, timePeriodID])
+        features.append(feature)
+    zoneProvider.addFeatures(features)
+
+    resolver = TOMsZoneResolver()
+
+    assert resolver.getZoneContaining(zoneLayer, QgsPointXY(50, 50))["CPZ"] == "A"
+    assert resolver.getZoneContaining(zoneLayer, QgsPointXY(150, 50))["CPZ"] == "B"
+    assert resolver.getZoneContaining(zoneLayer, QgsPointXY(250, 50)) is None
+
+    assert resolver.getZoneWithAttribute(zoneLayer, "CPZ", "B")["TimePeriodID"] == 2
+    assert resolver.getZoneWithAttribute(zoneLayer, "CPZ", "C") is None
+    assert resolver.getZoneWithAttribute(zoneLayer, "CPZ", None) is None
+
+    # edits are picked up without waiting for the commit
+    zoneLayer.startEditing()
+    zoneB = resolver.getZoneWithAttribute(zoneLayer, "CPZ", "B")
+    zoneLayer.changeAttributeValue(zoneB.id(), 0, "C")
+
+    assert resolver.getZoneWithAttribute(zoneLayer, "CPZ", "B") is None
+    assert resolver.getZoneContaining(zoneLayer, QgsPointXY(150, 50))["CPZ"] == "C"
+
+    zoneLayer.rollBack()
+    assert resolver.getZoneWithAttribute(zoneLayer, "CPZ", "B") is not None
+
+
+def testZoneLookupsInParallel():
+    """The index is read from several threads at once, without a lock"""
+
+    zoneLayer = QgsVectorLayer("Polygon?crs=epsg:27700", "CPZs", "memory")
+    zoneProvider = zoneLayer.dataProvider()
+    zoneProvider.addAttributes([QgsField("CPZ", QVariant.String)])
+    zoneLayer.updateFields()
+
+    features = []
+    for i in range(10):
+        feature = QgsFeature(zoneLayer.fields())
+        feature.setGeometry(
+            QgsGeometry.fromWkt(
+                "POLYGON(({0} 0, {1} 0, {1} 10, {0} 10, {0} 0))".format(
+                    i * 10, i * 10 + 10
+                )
+            )
+        )
+        feature.setAttributes([str(i)])
+        features.append(feature)
+    zoneProvider.addFeatures(features)
+
+    resolver = TOMsZoneResolver()
+    resolver.preloadLayers([zoneLayer])
+
+    def lookUp(i):
+        zone = resolver.getZoneContaining(zoneLayer, QgsPointXY(i * 10 + 5, 5))
+        return zone["CPZ"]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lookUp, [i % 10 for i in range(200)]))
+
+    assert results == [str(i % 10) for i in range(200)]